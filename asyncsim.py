@@ -0,0 +1,125 @@
+"""Run simulations without blocking an asyncio event loop.
+
+Used in the Logic Simulator project to embed the simulator in asyncio
+services, running the network in chunks of cycles and yielding to the event
+loop between them.
+
+Classes
+-------
+AsyncSimulator - runs a circuit in chunks of cycles as a coroutine.
+"""
+import asyncio
+import random
+
+DEFAULT_CHUNK = 1000  # cycles run between yields to the event loop
+
+
+class AsyncSimulator:
+
+    """Run a circuit in chunks of cycles, yielding to the event loop.
+
+    The network is run chunk cycles at a time, and after each chunk the
+    optional progress callback is called with the number of cycles done and
+    the number requested, and control returns to the event loop, so that
+    other tasks run meanwhile. A run is cancelled by cancelling the task
+    awaiting it: asyncio.CancelledError is raised at the end of a chunk,
+    with cycles_completed and the monitors holding every cycle run so far,
+    so the simulation can be continued afterwards.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    chunk: default number of cycles run between yields to the event loop.
+
+    Public methods
+    --------------
+    run_chunk(self, cycles): Runs the network for up to cycles cycles
+                             without yielding, returns the number completed.
+
+    run_cycles(self, cycles, chunk=None, progress=None): Runs the network
+                             in chunks, returns the number of cycles
+                             completed.
+
+    run(self, cycles, chunk=None, progress=None, seed=None): Runs the
+                             simulation from a cold start, returns the
+                             number of cycles completed.
+
+    continue_run(self, cycles, chunk=None, progress=None): Continues the
+                             simulation, returns the number of cycles
+                             completed.
+    """
+
+    def __init__(self, names, devices, network, monitors,
+                 chunk=DEFAULT_CHUNK):
+        """Initialise the instances and the simulation state."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.chunk = chunk
+
+        self.cycles_completed = 0  # number of simulation cycles completed
+        self.oscillating = False  # whether the last run oscillated
+
+    def run_chunk(self, cycles):
+        """Run the network for up to cycles cycles, recording the monitors.
+
+        Return the number of cycles completed, which is fewer than cycles if
+        the network oscillates.
+        """
+        completed = 0
+        execute_network = self.network.execute_network
+        record_signals = self.monitors.record_signals
+        while completed < cycles and execute_network():
+            record_signals()
+            completed += 1
+        self.cycles_completed += completed
+        if completed < cycles:
+            self.oscillating = True
+        return completed
+
+    async def run_cycles(self, cycles, chunk=None, progress=None):
+        """Run the network for cycles cycles, chunk cycles at a time.
+
+        progress, if given, is called with (cycles done, cycles) after each
+        chunk. Return the number of cycles completed, which is fewer than
+        cycles if the network oscillates.
+        """
+        if chunk is None:
+            chunk = self.chunk
+        chunk = max(chunk, 1)
+        self.oscillating = False
+        done = 0
+        while done < cycles:
+            chunk_cycles = min(chunk, cycles - done)
+            completed = self.run_chunk(chunk_cycles)
+            done += completed
+            if progress is not None:
+                progress(done, cycles)
+            if completed < chunk_cycles:
+                break
+            await asyncio.sleep(0)
+        return done
+
+    async def run(self, cycles, chunk=None, progress=None, seed=None):
+        """Run the simulation from a cold start for cycles cycles.
+
+        seed, if not None, seeds the random cold start-up of clocks and
+        D-types. Return the number of cycles completed.
+        """
+        self.cycles_completed = 0
+        self.monitors.reset_monitors()
+        if seed is not None:
+            random.seed(seed)
+        self.devices.cold_startup()
+        return await self.run_cycles(cycles, chunk, progress)
+
+    async def continue_run(self, cycles, chunk=None, progress=None):
+        """Continue the simulation for cycles cycles.
+
+        Return the number of cycles completed.
+        """
+        return await self.run_cycles(cycles, chunk, progress)
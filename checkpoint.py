@@ -0,0 +1,272 @@
+"""Save and restore checkpoints of long simulation runs.
+
+Used in the Logic Simulator project to write the state of a simulation to a
+file every so often, so that a run which is interrupted can be resumed from
+its last checkpoint instead of from cycle zero.
+
+Classes
+-------
+Checkpoint - writes and reads checkpoint files.
+"""
+import json
+import os
+import random
+import struct
+import tempfile
+import time
+
+from netfile import NetlistFile
+
+MAGIC = b'LOGSIMCP'
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, length of the state and of the netlist
+HEADER = struct.Struct('<8sHHIQ')
+
+SAMPLE_CYCLES = 64  # cycles run between readings of the clock
+
+
+class Checkpoint:
+
+    """Write and read checkpoint files of a simulation.
+
+    A checkpoint file holds a header followed by three sections:
+
+    state: a JSON object holding the run state given by the user interface,
+           the cycle count of the network, the state of the random number
+           generator, the outputs, clock counter, switch state and memory of
+           every device, and the name and length of every monitor trace.
+    netlist: the circuit in the binary netlist format, including the
+             monitors, so that the definition files are not needed.
+    traces: the recorded signals of every monitor, one byte per cycle.
+
+    Checkpoints are written under a temporary name and then renamed, so an
+    interrupted write leaves the last checkpoint whole. A run calls start()
+    and then update() whenever it reaches next_update, which is every
+    SAMPLE_CYCLES cycles, and a checkpoint is saved if interval seconds have
+    passed since the last one.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    path: path of the checkpoint file.
+    interval: number of seconds between checkpoints.
+
+    Public methods
+    --------------
+    get_device_states(self): Returns the state of every device.
+
+    set_device_states(self, device_states): Restores the state of every
+                                            device, returns True if
+                                            successful.
+
+    get_bytes(self, run_state): Returns a checkpoint of the simulation.
+
+    save(self, run_state): Writes a checkpoint file, returns True if
+                           successful.
+
+    start(self): Starts counting the cycles of a run.
+
+    update(self, done, run_state): Writes a checkpoint file if one is due.
+
+    load_bytes(self, data): Restores a checkpoint into the instances,
+                            returns the run state, or None if it cannot be
+                            restored.
+
+    load(self, path=None): Restores a checkpoint file into the instances,
+                           returns the run state, or None if it cannot be
+                           restored.
+    """
+
+    def __init__(self, names, devices, network, monitors, path,
+                 interval=60.0):
+        """Initialise the instances and the checkpoint options."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.path = path
+        self.interval = interval
+        self.clock = time.monotonic
+
+        self.next_update = SAMPLE_CYCLES  # cycles done at the next update
+        self.last_save_time = self.clock()
+
+    def get_port_name(self, port_id):
+        """Return the name string of a port ID, or None for no port."""
+        if port_id is None:
+            return None
+        return self.names.get_name_string(port_id)
+
+    def get_port_id(self, port_name):
+        """Return the name ID of a port name string, or None for no port."""
+        if port_name is None:
+            return None
+        return self.names.query(port_name)
+
+    def get_device_states(self):
+        """Return the state of every device.
+
+        The states are {device name: [outputs, clock counter, switch state,
+        memory]}, where outputs is a list of [port name, signal].
+        """
+        device_states = {}
+        for device in self.devices.devices_list:
+            outputs = [[self.get_port_name(output_id), signal]
+                       for output_id, signal in device.outputs.items()]
+            device_states[self.names.get_name_string(device.device_id)] = [
+                outputs, device.clock_counter, device.switch_state,
+                device.dtype_memory]
+        return device_states
+
+    def set_device_states(self, device_states):
+        """Restore the state of every device from get_device_states().
+
+        Return True if successful, or False if a device or port is unknown.
+        """
+        for device_name, state in device_states.items():
+            device = self.devices.get_device(self.names.query(device_name))
+            if device is None:
+                return False
+            outputs, device.clock_counter, device.switch_state, \
+                device.dtype_memory = state
+            for port_name, signal in outputs:
+                output_id = self.get_port_id(port_name)
+                if output_id not in device.outputs:
+                    return False
+                device.outputs[output_id] = signal
+        return True
+
+    def get_bytes(self, run_state):
+        """Return a checkpoint of the simulation in the checkpoint format.
+
+        run_state is a JSON-serialisable dictionary, such as the cycles
+        completed and the commands left to run, which is given back when the
+        checkpoint is loaded.
+        """
+        signal_lists = list(self.monitors.monitors_dictionary.values())
+        monitor_lengths = [
+            [self.devices.get_signal_name(device_id, output_id),
+             len(signal_list)] for (device_id, output_id), signal_list
+            in self.monitors.monitors_dictionary.items()]
+        [version, internal_state, gauss_next] = random.getstate()
+        state = json.dumps({
+            'run_state': run_state,
+            'cycle_count': self.network.cycle_count,
+            'random_state': [version, internal_state, gauss_next],
+            'devices': self.get_device_states(),
+            'monitors': monitor_lengths}).encode('utf-8')
+        netlist = NetlistFile(self.names, self.devices, self.network,
+                              self.monitors).get_bytes()
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(state),
+                             len(netlist))
+        return b''.join([header, state, netlist] +
+                        [bytes(signal_list) for signal_list in signal_lists])
+
+    def save(self, run_state):
+        """Write a checkpoint of the simulation to the checkpoint file.
+
+        The checkpoint is written under a temporary name and then renamed,
+        as in netcache.NetlistCache. Return True if successful.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(
+                dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(file_descriptor, 'wb') as checkpoint_file:
+                    checkpoint_file.write(self.get_bytes(run_state))
+                    checkpoint_file.flush()
+                    os.fsync(checkpoint_file.fileno())
+                os.replace(temporary_path, self.path)
+            except OSError:
+                os.remove(temporary_path)
+                raise
+        except OSError:
+            return False
+        return True
+
+    def start(self):
+        """Start counting the cycles of a run."""
+        self.next_update = SAMPLE_CYCLES
+
+    def update(self, done, run_state):
+        """Write a checkpoint if interval seconds have passed since the last.
+
+        done is the number of cycles of the run done so far. Return False if
+        a checkpoint was due but could not be written.
+        """
+        self.next_update = done + SAMPLE_CYCLES
+        now = self.clock()
+        if now - self.last_save_time < self.interval:
+            return True
+        self.last_save_time = now
+        return self.save(run_state)
+
+    def load_bytes(self, data):
+        """Restore a checkpoint into the instances, which must be new.
+
+        Return the run state saved with the checkpoint, or None if the data
+        is not a valid checkpoint.
+        """
+        data = memoryview(data)
+        if len(data) < HEADER.size:
+            return None
+        [magic, version, reserved, state_length,
+         netlist_length] = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        offset = HEADER.size
+        try:
+            state = json.loads(bytes(data[offset:offset + state_length]))
+            offset += state_length
+            netlist_file = NetlistFile(self.names, self.devices,
+                                       self.network, self.monitors)
+            if netlist_file.load_bytes(
+                    data[offset:offset + netlist_length]) != \
+                    netlist_file.NO_ERROR:
+                return None
+            offset += netlist_length
+
+            signal_names = [self.devices.get_signal_name(device_id,
+                                                         output_id)
+                            for device_id, output_id
+                            in self.monitors.monitors_dictionary]
+            monitor_lengths = dict(state['monitors'])
+            if sorted(monitor_lengths) != sorted(signal_names) or \
+                    len(data) != offset + sum(monitor_lengths.values()):
+                return None
+            # the traces are in the order they were saved in
+            traces = {}
+            for signal_name, length in state['monitors']:
+                traces[signal_name] = list(data[offset:offset + length])
+                offset += length
+            self.monitors.restore_signals([traces[signal_name] for
+                                           signal_name in signal_names])
+
+            if not self.set_device_states(state['devices']):
+                return None
+            self.network.cycle_count = state['cycle_count']
+            [version, internal_state, gauss_next] = state['random_state']
+            random.setstate((version, tuple(internal_state), gauss_next))
+        except (ValueError, KeyError, TypeError):
+            return None
+        return state['run_state']
+
+    def load(self, path=None):
+        """Restore the checkpoint file at path into the instances.
+
+        path defaults to the path of the checkpoint file. Return the run
+        state saved with the checkpoint, or None if the file cannot be read
+        or is not a valid checkpoint.
+        """
+        if path is None:
+            path = self.path
+        try:
+            with open(path, 'rb') as checkpoint_file:
+                return self.load_bytes(checkpoint_file.read())
+        except OSError:
+            return None
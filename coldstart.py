@@ -0,0 +1,241 @@
+"""Find the cycles of a circuit which depend on its random cold start-up.
+
+Used in the Logic Simulator project to run a circuit from a cold start with
+many random seeds in a pool of worker processes, and to report for each
+monitored signal which cycles are the same for every seed.
+
+Classes
+-------
+ColdStartAnalyser - runs a circuit with many seeds and compares the traces.
+
+Functions
+---------
+get_high_table - returns a translation table counting HIGH signals.
+run_seeds - runs the circuit in a worker process for a list of seeds.
+"""
+import hashlib
+import itertools
+import operator
+
+import sweep
+from netfile import NetlistFile
+
+
+def get_high_table(devices):
+    """Return a translation table mapping HIGH to 1 and other signals to 0.
+
+    The table is built from the signal levels of the devices instance.
+    """
+    high_table = bytearray(256)
+    high_table[devices.HIGH] = 1
+    return bytes(high_table)
+
+
+def run_seeds(task):
+    """Run the circuit of this worker process for each of a list of seeds.
+
+    task is [seeds, cycles]. The circuit must have been loaded with
+    sweep.load_worker(). Return [list of the cycles completed for each seed,
+    {signal name: [number of seeds for which the signal is HIGH in each
+    cycle, set of digests of the distinct traces]}].
+    """
+    seeds, cycles = task
+    devices = sweep.worker_circuit[1]
+    monitors = sweep.worker_circuit[3]
+    high_table = get_high_table(devices)
+    cycles_completed_list = []
+    signal_counts = {}
+    for seed in seeds:
+        cycles_completed_list.append(sweep.simulate([], seed, cycles))
+        for (device_id, output_id), signal_list in \
+                monitors.monitors_dictionary.items():
+            signal_name = devices.get_signal_name(device_id, output_id)
+            if signal_name not in signal_counts:
+                signal_counts[signal_name] = [[0] * cycles, set()]
+            high_counts, trace_digests = signal_counts[signal_name]
+            trace = bytes(signal_list)
+            trace_digests.add(hashlib.blake2b(trace, digest_size=8).digest())
+            high_trace = trace.translate(high_table) + bytes(cycles -
+                                                             len(trace))
+            high_counts[:] = map(operator.add, high_counts, high_trace)
+    return [cycles_completed_list, signal_counts]
+
+
+class ColdStartAnalyser:
+
+    """Run a circuit from a cold start with many seeds and compare the traces.
+
+    The random cold start-up of the clocks and D-types is seeded with each
+    seed in turn, and the runs are shared between worker processes, which
+    each load the circuit once as in sweep.SweepRunner. The workers count
+    how many runs are HIGH in every cycle, so only these counts are sent
+    back. A cycle of a monitored signal is deterministic if the signal has
+    the same level in that cycle for every run which reached it, and
+    seed-dependent otherwise.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    cycles: number of simulation cycles in each run.
+    max_workers: number of worker processes, defaults to the number of
+                 processors. With one worker the runs are in this process.
+
+    Public methods
+    --------------
+    run_seeds(self, seeds): Runs the circuit for every seed and adds up the
+                            results.
+
+    add_results(self, tasks, results): Adds the results of the worker
+                                       processes to the totals.
+
+    get_signal_statistics(self, signal_name): Returns the statistics of the
+                                              cycles of a monitored signal.
+
+    get_profile(self, signal_name): Returns a trace showing which cycles of
+                                    a monitored signal are deterministic.
+
+    write_report(self, file): Writes the statistics and profile of every
+                              monitored signal.
+
+    analyse(self, file, seed_count, first_seed=0): Runs the circuit with
+                             seed_count seeds and writes the report, returns
+                             the number of runs that oscillated.
+    """
+
+    def __init__(self, names, devices, network, monitors, cycles,
+                 max_workers=None):
+        """Initialise the instances and the results."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.cycles = cycles
+        self.max_workers = max_workers
+
+        self.seed_count = 0
+        self.oscillating_seeds = []
+        # run_counts[i] is the number of runs which completed cycle i
+        self.run_counts = [0] * cycles
+        # {signal name: [HIGH count in each cycle, set of trace digests]}
+        self.signal_counts = {}
+
+    def run_seeds(self, seeds):
+        """Run the circuit for every seed, adding up the results."""
+        seeds = list(seeds)
+        chunk_size = 16
+        tasks = [[seeds[start:start + chunk_size], self.cycles]
+                 for start in range(0, len(seeds), chunk_size)]
+        netlist = NetlistFile(self.names, self.devices, self.network,
+                              self.monitors).get_bytes()
+        if self.max_workers == 1:
+            sweep.load_worker(netlist)
+            self.add_results(tasks, map(run_seeds, tasks))
+        else:
+            # only imported when needed, as in shards.py
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers, initializer=sweep.load_worker,
+                    initargs=(netlist,)) as pool:
+                self.add_results(tasks, pool.map(run_seeds, tasks))
+
+    def add_results(self, tasks, results):
+        """Add the results of run_seeds for every task to the totals."""
+        for (seeds, cycles), (cycles_completed_list, signal_counts) in \
+                zip(tasks, results):
+            self.seed_count += len(seeds)
+            for seed, cycles_completed in zip(seeds, cycles_completed_list):
+                if cycles_completed < self.cycles:
+                    self.oscillating_seeds.append(seed)
+                self.run_counts[:cycles_completed] = map(
+                    operator.add, self.run_counts,
+                    itertools.repeat(1, cycles_completed))
+            for signal_name, (high_counts, trace_digests) in \
+                    signal_counts.items():
+                if signal_name not in self.signal_counts:
+                    self.signal_counts[signal_name] = [[0] * self.cycles,
+                                                       set()]
+                totals = self.signal_counts[signal_name]
+                totals[0][:] = map(operator.add, totals[0], high_counts)
+                totals[1].update(trace_digests)
+
+    def get_signal_statistics(self, signal_name):
+        """Return the statistics of the cycles of a monitored signal.
+
+        Return [number of deterministic cycles, number of seed-dependent
+        cycles, first seed-dependent cycle or None, number of cycles before
+        the signal is deterministic to the end, number of distinct traces].
+        """
+        high_counts, trace_digests = self.signal_counts[signal_name]
+        dependent_cycles = [cycle for cycle, (high_count, run_count)
+                            in enumerate(zip(high_counts, self.run_counts))
+                            if 0 < high_count < run_count]
+        reached_cycles = sum(run_count > 0 for run_count in self.run_counts)
+        if dependent_cycles:
+            first_dependent = dependent_cycles[0]
+            settled_cycle = dependent_cycles[-1] + 1
+        else:
+            first_dependent = None
+            settled_cycle = 0
+        return [reached_cycles - len(dependent_cycles), len(dependent_cycles),
+                first_dependent, settled_cycle, len(trace_digests)]
+
+    def get_profile(self, signal_name):
+        """Return a trace showing which cycles of a signal are deterministic.
+
+        Each cycle is '-' if the signal is always HIGH, '_' if it is always
+        LOW, '?' if it depends on the seed, and ' ' if no run reached it.
+        """
+        high_counts = self.signal_counts[signal_name][0]
+        profile = []
+        for high_count, run_count in zip(high_counts, self.run_counts):
+            if run_count == 0:
+                profile.append(' ')
+            elif high_count == run_count:
+                profile.append('-')
+            elif high_count == 0:
+                profile.append('_')
+            else:
+                profile.append('?')
+        return ''.join(profile)
+
+    def write_report(self, file):
+        """Write the statistics and profile of every monitored signal."""
+        file.write(_('Cold start-up analysis: {seed_count} seeds, {cycles} '
+                     'cycles').format(seed_count=self.seed_count,
+                                      cycles=self.cycles) + '\n')
+        file.write(_('Runs oscillating: {count}').format(
+            count=len(self.oscillating_seeds)) + '\n\n')
+        signal_names = sorted(self.signal_counts)
+        if not signal_names:
+            return
+        margin = max(len(signal_name) for signal_name in signal_names)
+        headings = [_('Signal'), _('Deterministic'), _('Seed-dependent'),
+                    _('First dependent'), _('Settled after'),
+                    _('Distinct traces')]
+        margin = max(margin, len(headings[0]))
+        widths = [margin] + [len(heading) for heading in headings[1:]]
+        file.write('  '.join(heading.ljust(width) for heading, width
+                             in zip(headings, widths)).rstrip() + '\n')
+        for signal_name in signal_names:
+            statistics = self.get_signal_statistics(signal_name)
+            columns = [signal_name] + ['-' if value is None else str(value)
+                                       for value in statistics]
+            file.write('  '.join(column.ljust(width) for column, width
+                                 in zip(columns, widths)).rstrip() + '\n')
+        file.write('\n')
+        for signal_name in signal_names:
+            file.write(signal_name.ljust(margin) + ': ' +
+                       self.get_profile(signal_name) + '\n')
+
+    def analyse(self, file, seed_count, first_seed=0):
+        """Run the circuit with seed_count seeds and write the report.
+
+        The seeds are first_seed, first_seed + 1, and so on. Return the
+        number of runs for which the network oscillated.
+        """
+        self.run_seeds(range(first_seed, first_seed + seed_count))
+        self.write_report(file)
+        return len(self.oscillating_seeds)
@@ -0,0 +1,47 @@
+"""Shared fixtures for the tests of the Logic Simulator modules."""
+import gettext
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+# Install null translation for the _() patterns in the modules under test
+nulltranslation = gettext.NullTranslations()
+nulltranslation.install()
+
+
+@pytest.fixture
+def make_instances():
+    """Return a function making new instances of the inner classes.
+
+    The function returns [names, devices, network, monitors] for a new,
+    empty network.
+    """
+    def make():
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        return [names, devices, network, monitors]
+    return make
+
+
+@pytest.fixture
+def parse_file(make_instances):
+    """Return a function parsing a definition file into new instances.
+
+    The function returns [names, devices, network, monitors] for the circuit
+    in the file at the given path, which must parse without errors.
+    """
+    def parse(path):
+        [names, devices, network, monitors] = make_instances()
+        parser = Parser(names, devices, network, monitors,
+                        Scanner(str(path), names))
+        assert parser.parse_network()
+        return [names, devices, network, monitors]
+    return parse
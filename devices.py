@@ -78,6 +78,12 @@ class Devices:
     get_signal_ids(self, signal_name): Returns the device and output IDs of
                                        the specified signal.
 
+    remove_devices(self, device_ids): Removes the specified devices from the
+                                      network.
+
+    restore_devices(self, removed_devices): Adds removed devices back to the
+                                            network.
+
     set_switch(self, device_id, signal): Sets switch_state of specified device
                                          to signal.
 
@@ -92,10 +98,22 @@ class Devices:
 
     make_d_type(self, device_id): Makes a D-type device.
 
+    build_devices(self, device_ids, device_kind, device_property=None,
+                  no_of_inputs=0): Adds devices of the same kind without
+                                   checking them.
+
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    check_device_property(self, device_kind, device_property=None): Returns
+                       errors if a device of device_kind cannot have the
+                       specified property.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
+
+    make_devices(self, device_ids, device_kind, device_property=None): Creates
+                       several devices of the same kind at once and returns
+                       errors if unsuccessful.
     """
 
     def __init__(self, names):
@@ -104,6 +122,7 @@ class Devices:
         self.names = names
 
         self.devices_list = []
+        self.device_dict = {}  # {device_id: Device}, for constant time get
 
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR", "NOT"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC"]
@@ -130,10 +149,7 @@ class Devices:
 
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.device_dict.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -154,6 +170,7 @@ class Devices:
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_dict.setdefault(device_id, new_device)
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -201,17 +218,49 @@ class Devices:
             return None
 
     def get_signal_ids(self, signal_name):
-        """Return the device and output IDs of the specified signal."""
+        """Return the device and output IDs of the specified signal.
+
+        The names are only queried, so an unknown name gives a None ID
+        rather than being added to the names table.
+        """
         name_string_list = signal_name.split(".")
-        name_id_list = self.names.lookup(name_string_list)
-        device_id = name_id_list[0]
-        if len(name_id_list) == 2:
-            output_id = name_id_list[1]
+        device_id = self.names.query(name_string_list[0])
+        if len(name_string_list) == 2:
+            output_id = self.names.query(name_string_list[1])
         else:
             output_id = None
 
         return [device_id, output_id]
 
+    def remove_devices(self, device_ids):
+        """Remove the specified devices from the network.
+
+        Connections to the outputs of the devices are not removed. Return
+        True if successful.
+        """
+        device_ids = set(device_ids)
+        if not device_ids.issubset(self.device_dict):
+            return False  # device not found
+        self.devices_list = [device for device in self.devices_list
+                             if device.device_id not in device_ids]
+        for device_id in device_ids:
+            del self.device_dict[device_id]
+        return True
+
+    def restore_devices(self, removed_devices):
+        """Add Device instances removed by remove_devices() back again.
+
+        The devices keep their outputs, clock counters and memory, so no
+        cold start-up is done. Return True if successful.
+        """
+        if any(device.device_id in self.device_dict
+               for device in removed_devices):
+            return False  # device present
+        for device in removed_devices:
+            self.devices_list.append(device)
+            self.device_dict[device.device_id] = device
+        return True
+
     def set_switch(self, device_id, signal):
         """Set the switch state of the specified device to signal.
 
@@ -228,9 +277,7 @@ class Devices:
 
     def make_switch(self, device_id, initial_state):
         """Make a switch device and set its initial state."""
-        self.add_device(device_id, self.SWITCH)
-        self.add_output(device_id, output_id=None)
-        self.set_switch(device_id, initial_state)
+        self.build_devices([device_id], self.SWITCH, initial_state)
 
     def make_clock(self, device_id, clock_half_period):
         """Make a clock device with the specified half period.
@@ -238,10 +285,7 @@ class Devices:
         clock_half_period is an integer > 0. It is the number of simulation
         cycles before the clock switches state.
         """
-        self.add_device(device_id, self.CLOCK)
-        device = self.get_device(device_id)
-        device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        self.build_devices([device_id], self.CLOCK, clock_half_period)
 
     def make_RC(self, device_id, RC_settling_time):
         """Make an RC device with the specified settling time
@@ -249,29 +293,51 @@ class Devices:
         RC_settling_time(n) is an integer > 0. The RC output starts with 1 when
         powered up and settles to 0 after n cycles
         """
-        self.add_device(device_id, self.RC)
-        device = self.get_device(device_id)
-        device.RC_settling_time = RC_settling_time
-        self.add_output(device_id, None, self.HIGH)  # initialised to HIGH
+        self.build_devices([device_id], self.RC, RC_settling_time)
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
-        self.add_device(device_id, device_kind)
-        self.add_output(device_id, output_id=None)
-
-        for input_number in range(1, no_of_inputs + 1):
-            input_name = "".join(["I", str(input_number)])
-            [input_id] = self.names.lookup([input_name])
-            self.add_input(device_id, input_id)
+        self.build_devices([device_id], device_kind,
+                           no_of_inputs=no_of_inputs)
 
     def make_d_type(self, device_id):
         """Make a D-type device."""
-        self.add_device(device_id, self.D_TYPE)
-        for input_id in self.dtype_input_ids:
-            self.add_input(device_id, input_id)
-        for output_id in self.dtype_output_ids:
-            self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        self.build_devices([device_id], self.D_TYPE)
+
+    def build_devices(self, device_ids, device_kind, device_property=None,
+                      no_of_inputs=0):
+        """Add devices of the same kind and qualifier without checking them.
+
+        Gates get no_of_inputs inputs, looked up once for all the devices.
+        All the devices are added before a single cold start-up.
+        """
+        if device_kind == self.D_TYPE:
+            input_ids = self.dtype_input_ids
+            output_ids = self.dtype_output_ids
+        else:
+            output_ids = [None]
+            input_ids = self.names.lookup(
+                ["".join(["I", str(input_number)])
+                 for input_number in range(1, no_of_inputs + 1)])
+        output_signal = self.HIGH if device_kind == self.RC else self.LOW
+
+        for device_id in device_ids:
+            new_device = Device(device_id)
+            new_device.device_kind = device_kind
+            new_device.inputs = dict.fromkeys(input_ids)
+            if device_kind != self.CLOCK:  # clock outputs set at start-up
+                new_device.outputs = dict.fromkeys(output_ids, output_signal)
+            if device_kind == self.SWITCH:
+                new_device.switch_state = device_property
+            elif device_kind == self.CLOCK:
+                new_device.clock_half_period = device_property
+            elif device_kind == self.RC:
+                new_device.RC_settling_time = device_property
+            self.devices_list.append(new_device)
+            self.device_dict[device_id] = new_device
+
+        if device_kind in (self.CLOCK, self.D_TYPE):
+            self.cold_startup()  # random start of clocks and D-type memory
 
     def cold_startup(self):
         """Simulate cold start-up of D-types and clocks.
@@ -291,76 +357,85 @@ class Devices:
                 device.clock_counter = \
                     random.randrange(device.clock_half_period)
 
-    def make_device(self, device_id, device_kind, device_property=None):
-        """Create the specified device.
+    def check_device_property(self, device_kind, device_property=None):
+        """Check that a device of device_kind can have device_property.
 
-        Return self.NO_ERROR if successful. Return corresponding error if not.
+        Return self.NO_ERROR if it can. Return corresponding error if not.
         """
-        # Device has already been added to the devices_list
-        if self.get_device(device_id) is not None:
-            error_type = self.DEVICE_PRESENT
-
-        elif device_kind == self.SWITCH:
-            # Device property is the switch initial state: 0(LOW) or 1(HIGH)
+        if device_kind in (self.SWITCH, self.RC, self.CLOCK):
             if device_property is None:
                 error_type = self.NO_QUALIFIER
-            elif device_property not in [self.LOW, self.HIGH]:
-                error_type = self.INVALID_QUALIFIER
-            else:
-                self.make_switch(device_id, device_property)
-                error_type = self.NO_ERROR
-
-        elif device_kind == self.RC:
-            if device_property is None:
-                error__type = self.NO_QUALIFIER
-            elif (device_property <= 0) or \
-                    not isinstance(device_property, int):
-                error_type = self.INVALID_QUALIFIER
-            else:
-                self.make_RC(device_id, device_property)
-                error_type = self.NO_ERROR
-
-        elif device_kind == self.CLOCK:
-            # Device property is the clock half period > 0
-            if device_property is None:
-                error_type = self.NO_QUALIFIER
-            elif device_property <= 0:
-                error_type = self.INVALID_QUALIFIER
-            else:
-                self.make_clock(device_id, device_property)
-                error_type = self.NO_ERROR
-
-        elif device_kind in self.gate_types:
-            # Device property is the number of inputs
-            if device_kind == self.XOR:
-                if device_property is not None:
-                    error_type = self.QUALIFIER_PRESENT
+            elif device_kind == self.SWITCH:
+                # Device property is the initial state: 0(LOW) or 1(HIGH)
+                if device_property not in [self.LOW, self.HIGH]:
+                    error_type = self.INVALID_QUALIFIER
                 else:
-                    self.make_gate(device_id, device_kind, 2)
                     error_type = self.NO_ERROR
-            elif device_kind == self.NOT:
-                if device_property is not None:
-                    error_type = self.QUALIFIER_PRESENT
+            elif device_kind == self.RC:
+                if (device_property <= 0) or \
+                        not isinstance(device_property, int):
+                    error_type = self.INVALID_QUALIFIER
                 else:
-                    self.make_gate(device_id, device_kind, 1)
                     error_type = self.NO_ERROR
-            else:  # other gates
-                if device_property is None:
-                    error_type = self.NO_QUALIFIER
-                elif device_property not in range(1, 17):  # between 1 and 16
+            else:
+                # Device property is the clock half period > 0
+                if device_property <= 0:
                     error_type = self.INVALID_QUALIFIER
                 else:
-                    self.make_gate(device_id, device_kind, device_property)
                     error_type = self.NO_ERROR
 
-        elif device_kind == self.D_TYPE:
+        elif device_kind in (self.XOR, self.NOT, self.D_TYPE):
             if device_property is not None:
                 error_type = self.QUALIFIER_PRESENT
             else:
-                self.make_d_type(device_id)
+                error_type = self.NO_ERROR
+
+        elif device_kind in self.gate_types:
+            # Device property is the number of inputs
+            if device_property is None:
+                error_type = self.NO_QUALIFIER
+            elif device_property not in range(1, 17):  # between 1 and 16
+                error_type = self.INVALID_QUALIFIER
+            else:
                 error_type = self.NO_ERROR
 
         else:
             error_type = self.BAD_DEVICE
 
         return error_type
+
+    def make_device(self, device_id, device_kind, device_property=None):
+        """Create the specified device.
+
+        Return self.NO_ERROR if successful. Return corresponding error if not.
+        """
+        return self.make_devices([device_id], device_kind, device_property)
+
+    def make_devices(self, device_ids, device_kind, device_property=None):
+        """Create several devices of the same kind and qualifier at once.
+
+        The device kind and qualifier are checked once, the gate input names
+        are looked up once, and all the devices are added before a single
+        cold start-up. Return self.NO_ERROR if successful, or the
+        corresponding error if not, in which case no device is made.
+        """
+        device_ids = list(device_ids)
+        if len(set(device_ids)) != len(device_ids) or \
+                any(device_id in self.device_dict for device_id in device_ids):
+            return self.DEVICE_PRESENT
+
+        error_type = self.check_device_property(device_kind, device_property)
+        if error_type != self.NO_ERROR:
+            return error_type
+
+        if device_kind == self.XOR:
+            no_of_inputs = 2
+        elif device_kind == self.NOT:
+            no_of_inputs = 1
+        elif device_kind in self.gate_types:
+            no_of_inputs = device_property
+        else:
+            no_of_inputs = 0
+        self.build_devices(device_ids, device_kind, device_property,
+                           no_of_inputs)
+        return self.NO_ERROR
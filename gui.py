@@ -22,8 +22,10 @@ from names import Names
 from devices import Devices
 from network import Network
 from monitors import Monitors
-from scanner import Scanner
-from parse import Parser
+from netcache import NetlistCache
+from netfile import NetlistFile
+from incremental import IncrementalParser
+from signalindex import SignalIndex
 
 # Global constants for canvas settings
 offset = 29
@@ -67,6 +69,10 @@ class MyGLCanvas(wxcanvas.GLCanvas):
     draw_horizontal_signal(self, start, cycle_count, step, level, pos):
         Draw signal High or Low
 
+    draw_mixed_signal(self, start, column, step, pos): Draw a column in
+                                                       which the signal
+                                                       changes level
+
     draw_rect_background(self, start_x, start_y, end_x, end_y, color=0.94):
         Draw rectangular background.
 
@@ -150,6 +156,7 @@ class MyGLCanvas(wxcanvas.GLCanvas):
 
         # Initialise variables for zooming
         self.zoom = 1
+        self.overview = False  # show every cycle on one page
 
     def initTexture(self):
         """init the texture - this has to happen after an OpenGL context
@@ -225,8 +232,11 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.parent.update_scroll_bar()
 
         # Display page info in status bar
-        page_disp = _('Page: ')+str(self.current_page) \
-            + '/'+str(self.page_number)
+        if self.overview:
+            page_disp = _('Overview')
+        else:
+            page_disp = _('Page: ')+str(self.current_page) \
+                + '/'+str(self.page_number)
         self.parent.page_disp(page_disp)
         self.parent.text_bar(text)
 
@@ -380,6 +390,17 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         GL.glVertex2f(x/self.zoom, y)
         GL.glVertex2f(x_next/self.zoom, y)
 
+    def draw_mixed_signal(self, start, column, step, pos):
+        """Four vertices outlining a column with both signal levels"""
+        x = start+column*step
+        x_next = start+(column+1)*step
+        y_low = 75+pos*50-offset
+        y_high = 75+25+pos*50-offset
+        GL.glVertex2f(x/self.zoom, y_low)
+        GL.glVertex2f(x/self.zoom, y_high)
+        GL.glVertex2f(x_next/self.zoom, y_high)
+        GL.glVertex2f(x_next/self.zoom, y_low)
+
     def draw_rect_background(self, start_x, start_y, end_x, end_y, color=0.94):
         """Draw rectangular background.
 
@@ -446,20 +467,19 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             cur_x += step
         GL.glVertex2f(cur_x, cur_y + 8)
         GL.glEnd()
-        # Draw scale numbers
-        scale_num = 60 * (self.current_page - 1)
+        # Draw scale numbers, spread over every cycle in the overview
         cur_x = start_x
         cur_y = start_y - 15
         offset_ratio = 3.5/self.zoom
-        for cycle in range(6):
+        for cycle in range(0, 70, 10):
+            if self.overview:
+                scale_num = cycle * self.cycles // 60
+            else:
+                scale_num = 60 * (self.current_page - 1) + cycle
             self.render_text(str(scale_num),
                              cur_x - len(str(scale_num)) *
                              offset_ratio, cur_y + offset)
-            scale_num += 10
             cur_x += step * 10
-        self.render_text(str(scale_num),
-                         cur_x - len(str(scale_num)) *
-                         offset_ratio, cur_y + offset)
 
     def get_ruler_cycle_num(self, step, start_x):
         """Get the current cycle number based on current x pos."""
@@ -494,8 +514,12 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         cycle_count = 0  # count number of cycles displayed
         pos = 0  # signal position, shifted upward for each signal
         start = 50  # start point for rasterisation
-        # No of cycles to be displayed on this page
-        last_cycle = min((self.cycles-(self.current_page-1)*60), 60)
+        # No of cycles to be displayed on this page, or of ruler divisions
+        # when every cycle is shown in the overview
+        if self.overview:
+            last_cycle = 60 if self.cycles > 0 else 0
+        else:
+            last_cycle = min((self.cycles-(self.current_page-1)*60), 60)
         # end point for rasterisation
         end = max(last_cycle*9*self.zoom + start, start)
         if last_cycle != 0:
@@ -512,6 +536,16 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         # real cycle num here
         current_cycle_num_real = current_cycle_num + 60*(self.current_page - 1)
 
+        if self.overview and last_cycle != 0:
+            # One column per pixel, or per cycle when there are fewer
+            # cycles, each drawn from the summary of the cycles it spans
+            columns = max(min(self.cycles, int(end-start)), 1)
+            column_step = (end-start)/columns
+            current_column = self.get_ruler_cycle_num(column_step/self.zoom,
+                                                      50/self.zoom)
+            current_cycle_num_real = \
+                (current_column-1)*self.cycles//columns + 1
+
         # Draw the first strip under the first device
         strip_raise = 113
         self.draw_rect_background(0, strip_raise+2-50,
@@ -579,6 +613,33 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             GL.glColor3f(0.0, 0.0, 1.0)  # signal trace is blue
             GL.glBegin(GL.GL_LINE_STRIP)
 
+            if self.overview:
+                if last_cycle != 0:
+                    levels = self.monitors.get_signal_summary(
+                        device_id, output_id, 0, self.cycles, columns)
+                    for column, level in enumerate(levels):
+                        if level == self.devices.HIGH:
+                            self.draw_horizontal_signal(start, column,
+                                                        column_step, 1, pos)
+                        elif level == self.devices.LOW:
+                            self.draw_horizontal_signal(start, column,
+                                                        column_step, 0, pos)
+                        elif level == self.monitors.MIXED:
+                            self.draw_mixed_signal(start, column,
+                                                   column_step, pos)
+                    if monitor_highlighted and \
+                            1 <= current_column <= columns:
+                        level = levels[current_column-1]
+                        if level == self.devices.HIGH:
+                            infobox_value = 1
+                        elif level == self.devices.LOW:
+                            infobox_value = 0
+                        elif level == self.monitors.MIXED:
+                            infobox_value = _('mixed')
+                pos = pos+1
+                GL.glEnd()
+                continue
+
             # Iterate over each cycle and render
             cycle_count = 0
             for signal in signal_list[(self.current_page-1)*60:
@@ -758,6 +819,8 @@ class Gui(wx.Frame):
     --------------
     open_new(self, path): Open new definition file
 
+    refresh_network(self): Update the lists after the network changed
+
     on_open(self): Event handler for open
 
     on_close(self, event): Event handler for close, including stop worker
@@ -804,6 +867,9 @@ class Gui(wx.Frame):
     on_zoom_out_button(self, event): Handle the event when
                                      zoom out button pressed
 
+    on_overview_button(self, event): Handle the event when the overview
+                                     button is toggled
+
     on_hbar(self, event): Handle the event when horizontal scroll bar is moved
 
     on_vbar(self, event): Handle the event when vertical scroll bar is moved
@@ -840,6 +906,7 @@ class Gui(wx.Frame):
         self.network = network
         self.monitors = monitors
         self.names = names
+        self.signal_index = SignalIndex(names, devices)
 
         # Get monitors
         self.monitored_list, self.unmonitored_list = \
@@ -851,6 +918,12 @@ class Gui(wx.Frame):
         self.cycles_completed = 0
         self.worker = RunThread(self)
 
+        # Definition file and its statements, or its text until they are
+        # recorded, for reloading edited files
+        self.definition_path = None
+        self.statements = None
+        self.definition_source = None
+
         # Get switch list
         self.switch_ids = self.devices.find_devices(self.devices.SWITCH)
         self.switches = []
@@ -910,6 +983,8 @@ class Gui(wx.Frame):
                                               size=(50, 50))
         self.zoom_out_button = wx.BitmapButton(self, wx.ID_ANY, minus,
                                                size=(50, 50))
+        self.overview_button = wx.ToggleButton(self, wx.ID_ANY,
+                                               _("Overview"))
 
         # Display texture mapping
         # self.hero_button = wx.Button(self, wx.ID_ANY, "HERO")
@@ -948,6 +1023,8 @@ class Gui(wx.Frame):
 
         self.zoom_in_button.Bind(wx.EVT_BUTTON, self.on_zoom_in_button)
         self.zoom_out_button.Bind(wx.EVT_BUTTON, self.on_zoom_out_button)
+        self.overview_button.Bind(wx.EVT_TOGGLEBUTTON,
+                                  self.on_overview_button)
         # self.hero_button.Bind(wx.EVT_BUTTON, self.on_hero_button)
         self.hbar.Bind(wx.EVT_SCROLL, self.on_hbar)
         self.vbar.Bind(wx.EVT_SCROLL, self.on_vbar)
@@ -999,6 +1076,7 @@ class Gui(wx.Frame):
         side_sizer.Add(double_butt_4, 0.2, wx.BOTTOM | wx.LEFT | wx.RIGHT, 10)
         double_butt_4.Add(self.zoom_in_button, 1, wx.RIGHT | wx.LEFT, 18)
         double_butt_4.Add(self.zoom_out_button, 1, wx.RIGHT | wx.LEFT, 18)
+        side_sizer.Add(self.overview_button, 1, wx.ALL, 5)
         side_sizer.Add(double_butt_5, 1, wx.ALL, 0)
         double_butt_5.Add(self.prev_button, 0.8, wx.ALL, 0)
         double_butt_5.Add(self.next_button, 0.8, wx.ALL, 0)
@@ -1010,21 +1088,63 @@ class Gui(wx.Frame):
         self.SetSizer(main_sizer)
 
     def open_new(self, path):
-        """Initialise instances of the four inner simulator classes"""
+        """Initialise instances of the four inner simulator classes
+
+        If the file is the one already open, only its changed statements are
+        applied to the current network when possible.
+        """
+        reloading = path == self.definition_path
+        if reloading and (self.statements is not None or
+                          self.definition_source is not None):
+            self.worker.stop()
+            if self.worker.is_alive():
+                self.worker.join()
+            incremental_parser = IncrementalParser(
+                self.names, self.devices, self.network, self.monitors,
+                self.statements)
+            if self.statements is None:
+                # recorded on the first reload only, from the text read when
+                # the file was opened
+                incremental_parser.record_statements(
+                    path, self.definition_source)
+                self.statements = incremental_parser.statements
+                self.definition_source = None
+            if incremental_parser.reparse(path, self.cycles_completed):
+                self.statements = incremental_parser.statements
+                self.refresh_network()
+                return
+
         new_names = Names()
         new_devices = Devices(new_names)
         new_network = Network(new_names, new_devices)
         new_monitors = Monitors(new_names, new_devices, new_network)
-        new_scanner = Scanner(path, new_names)
-        parser = Parser(new_names, new_devices, new_network,
-                        new_monitors, new_scanner)
-        if parser.parse_network():
+        # The text is kept so that its statements can be recorded when the
+        # file is first reloaded, since the cache entries do not hold them
+        source = None
+        if not NetlistFile(new_names, new_devices, new_network,
+                           new_monitors).is_netlist_file(path):
+            try:
+                with open(path) as definition_file:
+                    source = definition_file.read()
+            except (OSError, UnicodeDecodeError):
+                source = None
+        cache = NetlistCache()
+        [success, parser] = cache.parse_network(
+            path, new_names, new_devices, new_network, new_monitors)
+        if success:
             if self.monitor_window == 1:
                 self.top.program_close()
             self.worker.stop()
             self.reinit(new_names, new_devices, new_network, new_monitors)
             self.canvas.monitored_list = \
                 list(self.monitors.monitors_dictionary.keys())
+            self.definition_path = path
+            self.statements = None
+            self.definition_source = source
+        elif parser is None:
+            errormsg = ErrorDispFrame(
+                self, _("Error! Could not load netlist file."))
+            errormsg.Show()
         else:
             message = parser.message
             count = parser.error_count
@@ -1234,7 +1354,7 @@ class Gui(wx.Frame):
                 break
             devices.append(self.switches[index][0])
         for device in devices:
-            switch_id = self.names.query(device)
+            switch_id = self.signal_index.get_device_id(device)
             if self.devices.set_switch(switch_id, switch_state):
                 text = _("Successfully set switches.")
             else:
@@ -1258,16 +1378,11 @@ class Gui(wx.Frame):
             self.canvas.render(_("Warning! Still have uncompleted cycles!"))
 
     def get_monitor_ids(self, signal):
-        """Gets id according to the name"""
-        if signal is not None and '.' in signal:
-            device, port = signal.split('.')
-            device_id = self.names.query(device)
-            port_id = self.names.query(port)
-        else:
-            device = signal
-            device_id = self.names.query(device)
-            port_id = None
-        return device_id, port_id
+        """Gets id according to the name, or (None, None) if unknown"""
+        signal_ids = self.signal_index.get_signal_ids(signal)
+        if signal_ids is None:
+            return None, None
+        return tuple(signal_ids)
 
     def on_sig_add_button(self, event):
         """Handles the event when Add/Delete signal button pressed"""
@@ -1302,6 +1417,18 @@ class Gui(wx.Frame):
         self.canvas.render(text)
         self.update_scroll_bar()
 
+    def on_overview_button(self, event):
+        """Handles the event when the overview button is toggled"""
+        self.canvas.overview = self.overview_button.GetValue()
+        if self.canvas.overview:
+            text = _('Show every cycle')
+        else:
+            text = _('Show one page')
+        self.canvas.pan_x = 0
+        self.canvas.init = False
+        self.canvas.render(text)
+        self.update_scroll_bar()
+
     def on_hbar(self, event):
         """Handles the event when horizontal scroll bar is moved"""
         pos = self.hbar.GetThumbPosition()
@@ -1405,6 +1532,30 @@ class Gui(wx.Frame):
         self.worker = RunThread(self)
         self.worker.start()
 
+    def refresh_network(self):
+        """Update the signal and switch lists after the network changed,
+        keeping the cycles completed and the monitor traces"""
+        self.signal_index.build()
+        self.monitored_list, self.unmonitored_list = \
+            self.monitors.get_signal_names()
+        self.total_list = self.monitored_list + self.unmonitored_list
+        self.worker = RunThread(self)
+
+        self.switch_ids = self.devices.find_devices(self.devices.SWITCH)
+        self.switches = []
+        self.get_switch_signals()
+        self.list_ctrl.ClearAll()
+        self.list_ctrl.InsertColumn(0, _('Switches'), width=90)
+        self.list_ctrl.InsertColumn(1, _('Values'), width=75)
+        self.pop_switch_list(new_instance=1)
+
+        self.canvas.monitored_list = \
+            list(self.monitors.monitors_dictionary.keys())
+        self.canvas.signal_count = \
+            len(self.canvas.monitors.monitors_dictionary)
+        self.update_vbar()
+        self.canvas.Refresh()
+
     def reinit(self, names, devices, network, monitors):
         """Re-initialisation when new file is opened"""
         # Make objects local
@@ -1412,6 +1563,7 @@ class Gui(wx.Frame):
         self.network = network
         self.monitors = monitors
         self.names = names
+        self.signal_index = SignalIndex(names, devices)
 
         # Get monitors
         self.monitored_list, self.unmonitored_list = \
@@ -0,0 +1,263 @@
+"""Apply the changes in an edited definition file to an existing network.
+
+Used in the Logic Simulator project to reload a definition file by
+re-parsing only the statements which have changed, keeping the rest of the
+network and the traces of the monitors it does not affect.
+
+Classes
+-------
+IncrementalParser - re-parses the changed statements of a definition file.
+"""
+import difflib
+
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+class IncrementalParser:
+
+    """Re-parse the changed statements of an edited definition file.
+
+    The statements of the edited file are compared with the statements
+    recorded when the network was parsed. The changes made by removed
+    statements are undone, together with the connections and monitors of
+    any device they defined, and the added statements are parsed and
+    applied to the network. If the edited file has errors, the network is
+    restored and the file should be parsed in full to report them.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    statements: the statements recorded by the parser of the network, as
+                given by a Parser made with record_statements=True, or None
+                if they are to be recorded by record_statements().
+
+    Public methods
+    --------------
+    record_statements(self, path, source): Records the statements of the
+                       definition text the network was made from, returns
+                       True if successful.
+
+    scan_statements(self, path): Returns the symbols and text of every
+                                 statement in the file, or None if the file
+                                 is not a sequence of complete statements.
+
+    get_used_devices(self, effect): Returns the IDs of the devices used by a
+                                    connection or monitor.
+
+    undo_effect(self, effect): Undoes a change made to the network, returns
+                               the removed devices or trace.
+
+    redo_effect(self, effect, removed): Makes a change to the network again,
+                                        restoring the removed devices or
+                                        trace.
+
+    reparse(self, path, cycles_completed=0): Applies the changes in the
+                       edited file to the network, returns True if
+                       successful.
+    """
+
+    def __init__(self, names, devices, network, monitors, statements=None):
+        """Initialise the instances and the recorded statements."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.statements = None if statements is None else list(statements)
+
+    def record_statements(self, path, source):
+        """Record the statements of the definition text at path.
+
+        The text is parsed into new devices, network and monitors sharing
+        the names, so that the effects recorded use the IDs of the network
+        made from it, which may have been loaded from a cache instead of
+        being parsed. Return True if successful.
+        """
+        devices = Devices(self.names)
+        network = Network(self.names, devices)
+        monitors = Monitors(self.names, devices, network)
+        scanner = Scanner(path, self.names, source=source)
+        parser = Parser(self.names, devices, network, monitors, scanner,
+                        test_mode=True, record_statements=True)
+        if not parser.parse_network():
+            return False
+        self.statements = parser.statements
+        return True
+
+    def scan_statements(self, path):
+        """Return [(symbols, text)] for every statement in the file.
+
+        Return None if the file has scanning errors or symbols outside
+        complete statements.
+        """
+        scanner = Scanner(path, self.names)
+        [left_paren_id, right_paren_id] = self.names.lookup(['(', ')'])
+        symbol_stream = scanner.symbols()
+        statements = []
+        for symbol_type, symbol_id, line, column in symbol_stream:
+            if symbol_type == scanner.EOF:
+                return statements
+            if symbol_type != scanner.PUNCTUATION or \
+                    symbol_id != left_paren_id:
+                return None
+            start = scanner.index - 1
+            symbols = [(symbol_type, symbol_id)]
+            while symbol_id != right_paren_id:
+                symbol_type, symbol_id, line, column = next(symbol_stream)
+                if symbol_type in (scanner.EOF, scanner.SYNTAX_ERROR) or \
+                        symbol_id == left_paren_id:
+                    return None
+                symbols.append((symbol_type, symbol_id))
+            statements.append((tuple(symbols), scanner.to_text(
+                scanner.source[start:scanner.index])))
+
+    def get_used_devices(self, effect):
+        """Return the IDs of the devices used by a connection or monitor."""
+        if effect[0] == 'connection':
+            return [effect[1], effect[3]]
+        elif effect[0] == 'monitor':
+            return [effect[1]]
+        else:
+            return []
+
+    def undo_effect(self, effect):
+        """Undo a change made to the network.
+
+        Return the Device instances removed by a device effect, or the
+        signal list removed by a monitor effect, so that redo_effect() can
+        restore their state.
+        """
+        if effect[0] == 'device':
+            removed = [self.devices.get_device(device_id)
+                       for device_id in effect[1]]
+            self.devices.remove_devices(effect[1])
+            return removed
+        elif effect[0] == 'connection':
+            self.network.remove_connection(*effect[1:])
+            return None
+        else:
+            removed = self.monitors.monitors_dictionary[effect[1:]]
+            self.monitors.remove_monitor(*effect[1:])
+            return removed
+
+    def redo_effect(self, effect, removed):
+        """Make a change undone by undo_effect() again.
+
+        removed is the value undo_effect() returned, so devices keep their
+        state, without a new cold start-up, and monitors keep their traces.
+        """
+        if effect[0] == 'device':
+            self.devices.restore_devices(removed)
+        elif effect[0] == 'connection':
+            self.network.make_connection(*effect[1:])
+        else:
+            self.monitors.restore_monitor(*effect[1:], removed)
+
+    def reparse(self, path, cycles_completed=0):
+        """Apply the changes in the edited file at path to the network.
+
+        Monitors of devices redefined by the changed statements, and new
+        monitors, start with cycles_completed BLANK signals. Return True if
+        successful, or False if the network is unchanged because the file
+        has errors.
+        """
+        new_statements = self.scan_statements(path)
+        if self.statements is None or new_statements is None:
+            return False
+        old_symbols = [symbols for symbols, effects in self.statements]
+        new_symbols = [symbols for symbols, text in new_statements]
+        matcher = difflib.SequenceMatcher(None, old_symbols, new_symbols,
+                                          autojunk=False)
+        kept = {}  # {old index: new index}
+        for old_start, new_start, size in matcher.get_matching_blocks():
+            for offset in range(size):
+                kept[old_start + offset] = new_start + offset
+
+        # Statements using devices defined by changed statements are also
+        # re-parsed, since removing the devices removes their connections
+        removed_devices = set()
+        for index, (symbols, effects) in enumerate(self.statements):
+            if index not in kept:
+                for effect in effects:
+                    if effect[0] == 'device':
+                        removed_devices.update(effect[1])
+        for index, (symbols, effects) in enumerate(self.statements):
+            if index in kept and any(
+                    removed_devices.intersection(self.get_used_devices(effect))
+                    for effect in effects):
+                del kept[index]
+        added = sorted(set(range(len(new_statements))) -
+                       set(kept.values()))
+
+        undone = [effect for index, (symbols, effects)
+                  in enumerate(self.statements) if index not in kept
+                  for effect in effects]
+        removed = [self.undo_effect(effect) for effect in reversed(undone)]
+        removed.reverse()
+
+        # Making clocks or D-types does a cold start-up of every device, so
+        # the state of the devices already in the network is restored after
+        device_states = [(device, dict(device.outputs), device.clock_counter,
+                          device.dtype_memory)
+                         for device in self.devices.devices_list]
+        scanner = Scanner(path, self.names, source='\n'.join(
+            new_statements[index][1] for index in added))
+        parser = Parser(self.names, self.devices, self.network,
+                        self.monitors, scanner, test_mode=True,
+                        record_statements=True)
+        if added:
+            success = parser.parse_network()
+        else:
+            success = not self.network.find_unconnected_inputs()
+        for device, outputs, clock_counter, dtype_memory in device_states:
+            device.outputs.update(outputs)
+            device.clock_counter = clock_counter
+            device.dtype_memory = dtype_memory
+
+        statements = [None] * len(new_statements)
+        for old_index, new_index in kept.items():
+            statements[new_index] = self.statements[old_index]
+        if success and len(parser.statements) == len(added):
+            for index, statement in zip(added, parser.statements):
+                statements[index] = statement
+            # Every device must be defined before it is used, as in a full
+            # parse of the file
+            defined = set()
+            for symbols, effects in statements:
+                for effect in effects:
+                    if effect[0] == 'device':
+                        defined.update(effect[1])
+                    elif not defined.issuperset(
+                            self.get_used_devices(effect)):
+                        success = False
+        else:
+            success = False
+
+        if not success:
+            for effect in reversed(parser.effects):
+                self.undo_effect(effect)
+            for effect, effect_removed in zip(undone, removed):
+                self.redo_effect(effect, effect_removed)
+            return False
+
+        # Monitors of devices which were not redefined keep their traces;
+        # the others are aligned with the existing traces by BLANK signals
+        traces = {effect[1:]: effect_removed for effect, effect_removed
+                  in zip(undone, removed) if effect[0] == 'monitor'}
+        for effect in parser.effects:
+            if effect[0] == 'monitor':
+                self.monitors.remove_monitor(*effect[1:])
+                if effect[1:] in traces and \
+                        effect[1] not in removed_devices:
+                    self.monitors.restore_monitor(*effect[1:],
+                                                  traces[effect[1:]])
+                else:
+                    self.monitors.make_monitor(*effect[1:], cycles_completed)
+        self.statements = statements
+        return True
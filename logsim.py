@@ -7,24 +7,247 @@ runs either the command line user interface or the graphical user interface.
 Usage
 -----
 Show help: logsim.py -h
-Command line user interface: logsim.py -c <file path>
+Command line user interface: logsim.py -c <file path> [<file path> ...]
+Batch mode: logsim.py --batch <script path> [-o <output path>]
+                      [--format <format>] [--progress]
+                      [--checkpoint <path>] [--checkpoint-interval <N>]
+                      <file path> [<file path> ...]
+            logsim.py -e "<commands>" [-o <output path>]
+                      [--format <format>] [--progress]
+                      [--checkpoint <path>] [--checkpoint-interval <N>]
+                      <file path> [<file path> ...]
+            logsim.py --resume <checkpoint path> [-o <output path>]
+                      [--format <format>] [--progress]
+                      [--checkpoint <path>] [--checkpoint-interval <N>]
+Switch sweep: logsim.py --sweep <switch>[,<switch> ...] [--cycles <N>]
+                        [--samples <N>] [--seed <N>] [-o <output path>]
+                        <file path> [<file path> ...]
+Cold start-up analysis: logsim.py --cold-start <N> [--cycles <N>]
+                                  [--seed <N>] [-o <output path>]
+                                  <file path> [<file path> ...]
+Server: logsim.py --serve unix:<socket path>
+        logsim.py --serve [<host>:]<port>
 Graphical user interface: logsim.py <file path>
+
+In batch mode the commands of the command line user interface, separated by
+new lines or ';', are run without prompts, and the monitored signal traces
+are written to the output file, or to standard output, as text, csv, jsonl
+or npy (see tracewriter.TraceWriter). With --progress, the progress of long
+runs and a summary line for each run are printed to standard error, as in
+the command line user interface (see progress.ProgressReporter). With
+--checkpoint, the state of the simulation is saved to the checkpoint file
+every N seconds (60 by default) during each run, and --resume finishes the
+interrupted run and the remaining commands from a checkpoint file, which it
+goes on saving to unless another is given. The exit status is
+EXIT_OSCILLATION if the network oscillates, otherwise EXIT_ERROR if the
+circuit or the commands have errors, or else EXIT_SUCCESS.
+
+A switch sweep runs the circuit from a cold start for every setting of the
+given switches, or for a random sample of them, and writes the traces of
+every setting to the output file, or to standard output. The exit status is
+EXIT_OSCILLATION if the network oscillates for any setting.
+
+A cold start-up analysis runs the circuit from a cold start with N seeds,
+starting from the given seed, and reports for each monitored signal which
+cycles are the same for every seed. The exit status is EXIT_OSCILLATION if
+the network oscillates for any seed.
+
+The server keeps circuits loaded between requests and serves JSON requests
+on a Unix socket, or over HTTP on a loopback address (see
+server.SimulationServer).
 """
+import contextlib
 import getopt
 import sys
 import gettext
 import os
 
-import wx
-
 from names import Names
 from devices import Devices
 from network import Network
 from monitors import Monitors
-from scanner import Scanner
-from parse import Parser
+from netcache import NetlistCache
+from shards import ShardParser
 from userint import UserInterface
-from gui import Gui
+from sweep import SweepRunner
+from coldstart import ColdStartAnalyser
+from tracewriter import TraceWriter, FORMATS, BINARY_FORMATS
+from progress import ProgressReporter
+from checkpoint import Checkpoint
+
+# Exit statuses of the batch mode
+EXIT_SUCCESS = 0
+EXIT_ERROR = 1
+EXIT_OSCILLATION = 2
+
+
+def load_network(paths, names, devices, network, monitors):
+    """Parse the definition files into the given instances.
+
+    A circuit split across several files is parsed with a ShardParser, and a
+    single file is loaded from the cache when it has been parsed before.
+    Return True if successful.
+    """
+    if len(paths) > 1:  # a circuit split across several files
+        shard_parser = ShardParser(names, devices, network, monitors, paths)
+        return shard_parser.parse_network()
+    if not os.path.isfile(paths[0]):
+        print(_("***Error: can't find file under this name"))
+        return False
+    cache = NetlistCache()
+    [success, parser] = cache.parse_network(paths[0], names, devices,
+                                            network, monitors)
+    return success
+
+
+def open_output(output_path, binary=False):
+    """Return the output file at output_path, or standard output if None.
+
+    The file is opened for writing bytes if binary is True.
+    """
+    if output_path is None:
+        if binary:
+            sys.stdout.flush()
+            return contextlib.nullcontext(sys.stdout.buffer)
+        return contextlib.nullcontext(sys.stdout)
+    return open(output_path, 'wb' if binary else 'w')
+
+
+def run_batch(commands, paths, output_path, output_format, names, devices,
+              network, monitors, progress=None, checkpoint=None,
+              resume_path=None):
+    """Run the commands on the circuit in the definition files.
+
+    Parser messages and command errors are printed to standard error, and
+    the signal traces are written in output_format to the file at
+    output_path, or to standard output if it is None. progress and
+    checkpoint, if given, report the progress of each run and save
+    checkpoints during it. If resume_path is given, the circuit and the
+    state of the simulation are restored from the checkpoint file there
+    instead of the definition files, and the interrupted run and commands
+    are finished before the commands are run. Return the exit status.
+    """
+    run_state = None
+    if resume_path is not None:
+        if checkpoint is None:
+            checkpoint = Checkpoint(names, devices, network, monitors,
+                                    resume_path)
+        run_state = checkpoint.load(resume_path)
+        if run_state is None:
+            print(_("Error! Could not load the checkpoint file."),
+                  file=sys.stderr)
+            return EXIT_ERROR
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            success = load_network(paths, names, devices, network, monitors)
+        if not success:
+            return EXIT_ERROR
+    userint = UserInterface(names, devices, network, monitors, quiet=True,
+                            progress=progress, checkpoint=checkpoint)
+    trace_writer = TraceWriter(devices, monitors)
+    try:
+        with open_output(output_path,
+                         output_format in BINARY_FORMATS) as output_file:
+            if run_state is not None:
+                userint.resume(run_state)
+            userint.batch_interface(commands)
+            trace_writer.write(output_file, output_format)
+    except OSError:
+        print(_("Error! Could not write the output file."), file=sys.stderr)
+        return EXIT_ERROR
+    if userint.oscillating:
+        return EXIT_OSCILLATION
+    if userint.error_count > 0:
+        return EXIT_ERROR
+    return EXIT_SUCCESS
+
+
+def run_sweep(switch_names, run_options, paths, output_path, names,
+              devices, network, monitors):
+    """Run the circuit in the definition files for settings of switches.
+
+    run_options holds the number of 'cycles' to run, and optionally the
+    number of random 'samples' of the settings and the random 'seed'.
+    Parser messages and errors are printed to standard error, and the
+    signal traces are written to the file at output_path, or to standard
+    output if it is None. Return the exit status.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        success = load_network(paths, names, devices, network, monitors)
+    if not success:
+        return EXIT_ERROR
+    all_switch_ids = devices.find_devices(devices.SWITCH)
+    switch_ids = []
+    for switch_name in switch_names:
+        switch_id = names.query(switch_name)
+        if switch_id is None or switch_id not in all_switch_ids:
+            print(_("Error! '{switch_name}' is not a switch.").format(
+                switch_name=switch_name), file=sys.stderr)
+            return EXIT_ERROR
+        switch_ids.append(switch_id)
+    sweep_runner = SweepRunner(names, devices, network, monitors, switch_ids,
+                               run_options['cycles'])
+    try:
+        with open_output(output_path) as output_file:
+            oscillation_count = sweep_runner.sweep(
+                output_file, run_options.get('samples'),
+                run_options.get('seed'))
+    except OSError:
+        print(_("Error! Could not write the output file."), file=sys.stderr)
+        return EXIT_ERROR
+    if oscillation_count > 0:
+        return EXIT_OSCILLATION
+    return EXIT_SUCCESS
+
+
+def run_cold_start(seed_count, run_options, paths, output_path, names,
+                   devices, network, monitors):
+    """Run the circuit in the definition files with seed_count seeds.
+
+    run_options holds the number of 'cycles' to run, and optionally the
+    first 'seed'. Parser messages and errors are printed to standard error,
+    and the report is written to the file at output_path, or to standard
+    output if it is None. Return the exit status.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        success = load_network(paths, names, devices, network, monitors)
+    if not success:
+        return EXIT_ERROR
+    analyser = ColdStartAnalyser(names, devices, network, monitors,
+                                 run_options['cycles'])
+    try:
+        with open_output(output_path) as output_file:
+            oscillation_count = analyser.analyse(
+                output_file, seed_count, run_options.get('seed', 0))
+    except OSError:
+        print(_("Error! Could not write the output file."), file=sys.stderr)
+        return EXIT_ERROR
+    if oscillation_count > 0:
+        return EXIT_OSCILLATION
+    return EXIT_SUCCESS
+
+
+def run_server(address):
+    """Serve simulation requests at address until interrupted.
+
+    Return the exit status.
+    """
+    # asyncio and the server are only imported here, as in the GUI below
+    import asyncio
+    from server import SimulationServer, parse_address
+
+    if parse_address(address) is None:
+        print(_("Error: the server address must be unix:<socket path> or "
+                "a port on a loopback address\n"), file=sys.stderr)
+        return EXIT_ERROR
+    try:
+        asyncio.run(SimulationServer().serve(address))
+    except OSError:
+        print(_("Error! Could not start the server."), file=sys.stderr)
+        return EXIT_ERROR
+    except KeyboardInterrupt:
+        pass
+    return EXIT_SUCCESS
 
 
 def main(arg_list):
@@ -35,10 +258,43 @@ def main(arg_list):
     """
     usage_message = _("Usage:\n"
                       "Show help: logsim.py -h\n"
-                      "Command line user interface: logsim.py -c <file path>\n"
+                      "Command line user interface: "
+                      "logsim.py -c <file path> [<file path> ...]\n"
+                      "Batch mode: "
+                      "logsim.py --batch <script path> [-o <output path>] "
+                      "[--format text|csv|jsonl|npy] [--progress] "
+                      "[--checkpoint <path>] [--checkpoint-interval <N>] "
+                      "<file path> [<file path> ...]\n"
+                      "            "
+                      "logsim.py -e \"<commands>\" [-o <output path>] "
+                      "[--format text|csv|jsonl|npy] [--progress] "
+                      "[--checkpoint <path>] [--checkpoint-interval <N>] "
+                      "<file path> [<file path> ...]\n"
+                      "            "
+                      "logsim.py --resume <checkpoint path> "
+                      "[-o <output path>] [--format text|csv|jsonl|npy] "
+                      "[--progress] [--checkpoint <path>] "
+                      "[--checkpoint-interval <N>]\n"
+                      "Switch sweep: "
+                      "logsim.py --sweep <switch>[,<switch> ...] "
+                      "[--cycles <N>] [--samples <N>] [--seed <N>] "
+                      "[-o <output path>] <file path> [<file path> ...]\n"
+                      "Cold start-up analysis: "
+                      "logsim.py --cold-start <N> [--cycles <N>] "
+                      "[--seed <N>] [-o <output path>] "
+                      "<file path> [<file path> ...]\n"
+                      "Server: logsim.py --serve unix:<socket path>\n"
+                      "        logsim.py --serve [<host>:]<port>\n"
                       "Graphical user interface: logsim.py")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list, "hc:e:o:",
+                                           ["batch=", "output=", "sweep=",
+                                            "cycles=", "samples=", "seed=",
+                                            "cold-start=", "format=",
+                                            "serve=", "progress",
+                                            "checkpoint=",
+                                            "checkpoint-interval=",
+                                            "resume="])
     except getopt.GetoptError:
         print(_("Error: invalid command line arguments\n"))
         print(usage_message)
@@ -50,19 +306,108 @@ def main(arg_list):
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
 
-    for option, path in options:
+    commands = None  # commands to run in batch mode
+    switch_names = None  # switches to sweep
+    run_options = {'cycles': 10}
+    output_path = None
+    output_format = "text"
+    progress = None  # reports the progress of runs in batch mode
+    checkpoint_path = None  # checkpoint file to save runs to
+    resume_path = None  # checkpoint to resume from
+    for option, value in options:
         if option == "-h":  # print the usage message
             print(usage_message)
             sys.exit()
-        elif option == "-c":  # use the command line user interface
-            scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
-            if parser.parse_network():
+        elif option == "--batch":
+            try:
+                with open(value) as script_file:
+                    commands = script_file.read()
+            except OSError:
+                print(_("Error! Could not read the batch script."),
+                      file=sys.stderr)
+                sys.exit(EXIT_ERROR)
+        elif option == "-e":
+            commands = value
+        elif option in ("-o", "--output"):
+            output_path = value
+        elif option == "--format":
+            if value not in FORMATS:
+                print(_("Error: unknown output format\n"), file=sys.stderr)
+                print(usage_message, file=sys.stderr)
+                sys.exit(EXIT_ERROR)
+            output_format = value
+        elif option == "--progress":
+            progress = ProgressReporter(network)
+        elif option == "--checkpoint":
+            checkpoint_path = value
+        elif option == "--resume":
+            resume_path = value
+        elif option == "--serve":
+            sys.exit(run_server(value))
+        elif option == "--sweep":
+            switch_names = value.split(",")
+        elif option in ("--cycles", "--samples", "--seed", "--cold-start",
+                        "--checkpoint-interval"):
+            if not value.isdigit():
+                print(_("Error: {option} needs a number\n").format(
+                    option=option), file=sys.stderr)
+                print(usage_message, file=sys.stderr)
+                sys.exit(EXIT_ERROR)
+            run_options[option[2:]] = int(value)
+
+    if checkpoint_path is not None and commands is None and \
+            resume_path is None:
+        print(_("Error: --checkpoint is only used in batch mode\n"),
+              file=sys.stderr)
+        print(usage_message, file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    checkpoint = None  # saves checkpoints of runs in batch mode
+    if resume_path is not None and checkpoint_path is None:
+        checkpoint_path = resume_path  # go on saving to the same file
+    if checkpoint_path is not None:
+        checkpoint = Checkpoint(names, devices, network, monitors,
+                                checkpoint_path,
+                                run_options.get("checkpoint-interval", 60))
+    if resume_path is not None:  # finish the run saved in a checkpoint
+        sys.exit(run_batch("" if commands is None else commands, arguments,
+                           output_path, output_format, names, devices,
+                           network, monitors, progress, checkpoint,
+                           resume_path))
+
+    if commands is not None or switch_names is not None or \
+            "cold-start" in run_options:
+        if not arguments:
+            print(_("Error: no definition file given\n"), file=sys.stderr)
+            print(usage_message, file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        if commands is not None:  # run the commands without prompts
+            sys.exit(run_batch(commands, arguments, output_path,
+                               output_format, names, devices, network,
+                               monitors, progress, checkpoint))
+        if switch_names is not None:
+            sys.exit(run_sweep(switch_names, run_options, arguments,
+                               output_path, names, devices, network,
+                               monitors))
+        sys.exit(run_cold_start(run_options["cold-start"], run_options,
+                                arguments, output_path, names, devices,
+                                network, monitors))
+
+    for option, path in options:
+        if option == "-c":  # use the command line user interface
+            success = load_network([path] + arguments, names, devices,
+                                   network, monitors)
+            if success:
                 # Initialise an instance of the userint.UserInterface() class
-                userint = UserInterface(names, devices, network, monitors)
+                userint = UserInterface(names, devices, network, monitors,
+                                        progress=ProgressReporter(network))
                 userint.command_interface()
 
     if not options:  # no option given, use the graphical user interface
+        # wx, OpenGL and PIL are only imported here, so that the command
+        # line user interface starts quickly and runs without them
+        import wx
+        from gui import Gui
 
         app = wx.App()
         gui = Gui(_("Logic Simulator"), names, devices, network,
@@ -8,7 +8,11 @@ Classes
 Monitors - records and displays specified output signals.
 
 """
+import bisect
 import collections
+import sys
+import threading
+from array import array
 
 
 class Monitors:
@@ -32,33 +36,209 @@ class Monitors:
     remove_monitor(self, device_id, output_id): Removes a monitor from the
                                                 specified output.
 
+    restore_monitor(self, device_id, output_id, signal_list): Sets a monitor
+                                   with the signals recorded by a removed
+                                   monitor.
+
+    resolve_monitors(self): Resolves every monitor to its signal slot.
+
     get_monitor_signal(self, device_id, output_id): Returns the signal level of
                                                     the specified monitor.
 
     record_signals(self): Records the current signal level of all monitors.
 
+    store_signals(self, signals): Stores one cycle of monitor signals.
+
+    record_triggered_signals(self): Records the current cycle if it lies in a
+                                    capture window.
+
+    check_trigger(self): Returns True if every trigger condition holds.
+
+    set_trigger(self, conditions, pre_trigger_cycles=0,
+                post_trigger_cycles=0): Only records signals in windows
+                                        around the trigger cycles.
+
+    clear_trigger(self): Removes the trigger conditions.
+
+    flush_signals(self): Moves the buffered signal block into the monitor
+                         traces.
+
+    pad_signals(self, cycle): Fills every trace with BLANK signals up to the
+                              given cycle.
+
+    index_edges(self, index, start): Adds the transitions recorded from cycle
+                                     start onwards to the edge index of the
+                                     monitor at the given index.
+
+    get_edges(self, device_id, output_id, edge_type=None): Returns the sorted
+                                   transition cycles of the specified monitor.
+
+    next_edge(self, device_id, output_id, cycle, edge_type=None): Returns the
+                                   first transition after the given cycle.
+
+    previous_edge(self, device_id, output_id, cycle, edge_type=None): Returns
+                                   the last transition before the given cycle.
+
+    count_edges(self, device_id, output_id, start, end, edge_type=None):
+                                   Returns the number of transitions in the
+                                   cycle range [start, end).
+
+    update_summary(self, index, start): Updates the multi-resolution summary
+                                        of the monitor at the given index from
+                                        cycle start onwards.
+
+    get_signal_summary(self, device_id, output_id, start, end, columns):
+                                   Returns the level (LOW, HIGH, BLANK or
+                                   MIXED) of each of the given number of
+                                   columns spanning cycles [start, end).
+
+    get_rising_edges_in_range(self, device_id, output_id, start, end):
+                                   Returns the rising edges in [start, end).
+
+    get_period(self, device_id, output_id, start=0, end=None): Returns the
+                                   mean number of cycles between rising edges.
+
+    get_duty_cycle(self, device_id, output_id, start=0, end=None): Returns the
+                                   fraction of each period spent HIGH.
+
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
 
     reset_monitors(self): Clears the memory of all monitors.
 
+    restore_signals(self, signal_lists): Replaces the recorded signals of
+                                         all monitors.
+
     get_margin(self): Returns the length of the longest monitor's name.
 
-    display_signals(self): Displays signal trace(s) in the text console.
+    display_signals(self, start=0, end=None, width=None, file=None): Displays
+                                   signal trace(s) in the text console.
     """
 
-    def __init__(self, names, devices, network):
+    def __init__(self, names, devices, network, chunk_size=1024):
         """Initialise the monitors dictionary and monitor errors."""
         self.names = names
         self.network = network
         self.devices = devices
 
-        # monitors_dictionary stores
+        # _monitors_dictionary stores
         # {(device_id, output_id): [signal_list]}
-        self.monitors_dictionary = collections.OrderedDict()
-
-        [self.NO_ERROR, self.NOT_OUTPUT,
-         self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
+        # Use the monitors_dictionary property to read it, so that any
+        # buffered signals are flushed into the lists first.
+        self._monitors_dictionary = collections.OrderedDict()
+
+        # Every monitor is resolved once to a fixed signal slot, which is the
+        # (outputs dictionary, output_id) pair of the monitored device. The
+        # signals of all monitors are gathered from these slots every cycle
+        # into signal_block, a flat (cycles x monitors) block holding up to
+        # chunk_size cycles, which is flushed into the traces when full.
+        self.chunk_size = chunk_size
+        self.monitor_slots = []
+        self.monitor_traces = []
+        self.monitor_edges = []
+        self.monitor_summaries = []
+        self.signal_block = []
+        self.block_cycles = 0  # number of cycles held in signal_block
+        self.lock = threading.RLock()  # the GUI records from a worker thread
+
+        # edges_dictionary stores
+        # {(device_id, output_id): (rising_edges, falling_edges)}
+        # where each entry is a sorted array of the cycles (trace indices) at
+        # which the signal level changed. RISING counts as HIGH and FALLING
+        # as LOW, and no transition is recorded across BLANK signals.
+        self.edges_dictionary = {}
+        self.signal_levels = [None] * len(self.devices.signal_types)
+        for signal, level in [(self.devices.LOW, self.devices.LOW),
+                              (self.devices.HIGH, self.devices.HIGH),
+                              (self.devices.RISING, self.devices.HIGH),
+                              (self.devices.FALLING, self.devices.LOW)]:
+            self.signal_levels[signal] = level
+
+        # summaries_dictionary stores
+        # {(device_id, output_id): [level_0, level_1, ...]}
+        # where entry j of level_k is the level of the block of 2**k cycles
+        # starting at cycle j * 2**k: LOW, HIGH or BLANK if every cycle in the
+        # block has that level, or MIXED otherwise. The last block of each
+        # level may be partial.
+        self.MIXED = len(self.devices.signal_types)
+        self.summaries_dictionary = {}
+        self.summary_table = bytearray(range(256))  # translation table
+        for signal, level in enumerate(self.signal_levels):
+            self.summary_table[signal] = self.devices.BLANK if level is None \
+                else level
+        self.summary_table = bytes(self.summary_table)
+
+        # Translation table from signals to the characters used by
+        # display_signals. Any other value is deleted from the trace.
+        display_characters = [(self.devices.LOW, "_"),
+                              (self.devices.HIGH, "-"),
+                              (self.devices.RISING, "/"),
+                              (self.devices.FALLING, "\\"),
+                              (self.devices.BLANK, " ")]
+        self.display_table = bytearray(range(256))
+        for signal, character in display_characters:
+            self.display_table[signal] = ord(character)
+        self.display_table = bytes(self.display_table)
+        self.display_delete = bytes(
+            signal for signal in range(256)
+            if signal not in self.devices.signal_types)
+
+        [self.NO_ERROR, self.NOT_OUTPUT, self.MONITOR_PRESENT,
+         self.INVALID_TRIGGER] = self.names.unique_error_codes(4)
+
+        # When trigger conditions are set, signals are only gathered for the
+        # capture windows around the cycles in which every condition holds.
+        # Up to pre_trigger_cycles cycles before a trigger are kept in a ring
+        # buffer and post_trigger_cycles cycles after it are stored directly.
+        # capture_windows lists the [start, end) cycles of the windows. The
+        # cycles between windows are stored as BLANK signals when the next
+        # window opens, so that trace indices remain cycle numbers for the
+        # edge indices, summaries and monitors made mid-run.
+        self.trigger_slots = []  # [(outputs, output_id, condition)]
+        self.trigger_levels = []  # previous level of each trigger signal
+        self.pre_trigger_cycles = 0
+        self.post_trigger_cycles = 0
+        self.pre_trigger_buffer = collections.deque(maxlen=0)
+        self.post_trigger_count = 0  # cycles left to store after a trigger
+        self.cycle_number = 0  # number of cycles recorded since the reset
+        self.trigger_cycles = []
+        self.capture_windows = []
+
+    @property
+    def monitors_dictionary(self):
+        """Return the monitors dictionary with all signals flushed."""
+        self.flush_signals()
+        return self._monitors_dictionary
+
+    def resolve_monitors(self):
+        """Resolve every monitor to its signal slot and reallocate the block.
+
+        This must be called whenever monitors are added, removed or reset.
+        Any buffered signals are flushed first.
+        """
+        with self.lock:
+            self.flush_signals()
+            self.monitor_slots = []
+            self.monitor_traces = []
+            self.monitor_edges = []
+            self.monitor_summaries = []
+            for (device_id, output_id), signal_list in \
+                    self._monitors_dictionary.items():
+                device = self.devices.get_device(device_id)
+                self.monitor_slots.append((device.outputs, output_id))
+                self.monitor_traces.append(signal_list)
+                self.monitor_edges.append(
+                    self.edges_dictionary[(device_id, output_id)])
+                self.monitor_summaries.append(
+                    self.summaries_dictionary[(device_id, output_id)])
+            # Summarise any cycles held in the traces but not yet summarised,
+            # such as the BLANK signals of a monitor made mid-run
+            for index, summary in enumerate(self.monitor_summaries):
+                self.update_summary(index, len(summary[0]))
+            self.signal_block = [self.devices.BLANK] * (
+                self.chunk_size * len(self.monitor_slots))
+            # Buffered pre-trigger cycles no longer match the monitors
+            self.pre_trigger_buffer.clear()
 
     def make_monitor(self, device_id, output_id, cycles_completed=0):
         """Add the specified signal to the monitors dictionary.
@@ -70,15 +250,22 @@ class Monitors:
             return self.network.DEVICE_ABSENT
         elif output_id not in monitor_device.outputs:
             return self.NOT_OUTPUT
-        elif (device_id, output_id) in self.monitors_dictionary:
+        elif (device_id, output_id) in self._monitors_dictionary:
             return self.MONITOR_PRESENT
         else:
             # If n simulation cycles have been completed before making this
             # monitor, then initialise the signal trace with an n-length list
             # of BLANK signals. Otherwise, initialise the trace with an empty
             # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            with self.lock:
+                self.flush_signals()
+                self._monitors_dictionary[(device_id, output_id)] = [
+                    self.devices.BLANK] * cycles_completed
+                self.edges_dictionary[(device_id, output_id)] = (array('l'),
+                                                                 array('l'))
+                self.summaries_dictionary[(device_id, output_id)] = [
+                    bytearray()]
+                self.resolve_monitors()
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -86,18 +273,40 @@ class Monitors:
 
         Return True if successful.
         """
-        if (device_id, output_id) not in self.monitors_dictionary:
+        if (device_id, output_id) not in self._monitors_dictionary:
             return False
         else:
-            del self.monitors_dictionary[(device_id, output_id)]
+            with self.lock:
+                self.flush_signals()
+                del self._monitors_dictionary[(device_id, output_id)]
+                del self.edges_dictionary[(device_id, output_id)]
+                del self.summaries_dictionary[(device_id, output_id)]
+                self.resolve_monitors()
             return True
 
+    def restore_monitor(self, device_id, output_id, signal_list):
+        """Add a monitor whose trace holds the given recorded signals.
+
+        Used to put back a monitor removed by remove_monitor() together with
+        its trace. Return NO_ERROR if successful, or the corresponding error
+        if not.
+        """
+        with self.lock:
+            error_type = self.make_monitor(device_id, output_id)
+            if error_type != self.NO_ERROR:
+                return error_type
+            index = len(self.monitor_traces) - 1  # the new monitor is last
+            self.monitor_traces[index].extend(signal_list)
+            self.index_edges(index, 0)
+            self.update_summary(index, 0)
+        return self.NO_ERROR
+
     def get_monitor_signal(self, device_id, output_id):
         """Return the signal level of the specified monitor.
 
         If the monitor does not exist, return None.
         """
-        if (device_id, output_id) in self.monitors_dictionary:
+        if (device_id, output_id) in self._monitors_dictionary:
             return self.network.get_output_signal(device_id, output_id)
         else:
             return None
@@ -105,12 +314,380 @@ class Monitors:
     def record_signals(self):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. The signals of all
+        monitors are gathered from their slots into the next row of the signal
+        block, which is flushed into the traces once it is full. If trigger
+        conditions are set, the signals are only stored around triggers.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            signal_level = self.get_monitor_signal(device_id, output_id)
-            self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+        with self.lock:
+            if self.trigger_slots:
+                self.record_triggered_signals()
+            else:
+                self.store_signals([outputs[port_id] for outputs, port_id
+                                    in self.monitor_slots])
+            self.cycle_number += 1
+
+    def store_signals(self, signals):
+        """Store one cycle of monitor signals in the next signal block row."""
+        monitor_count = len(self.monitor_slots)
+        start = self.block_cycles * monitor_count
+        self.signal_block[start:start + monitor_count] = signals
+        self.block_cycles += 1
+        if self.block_cycles == self.chunk_size:
+            self.flush_signals()
+
+    def record_triggered_signals(self):
+        """Record the current cycle if it lies in a capture window.
+
+        Cycles outside any window are only gathered when they must be kept in
+        the pre-trigger ring buffer.
+        """
+        triggered = self.check_trigger()
+        if triggered:
+            self.trigger_cycles.append(self.cycle_number)
+            if self.post_trigger_count == 0:
+                # Open a new capture window with the pre-trigger cycles
+                window_start = self.cycle_number - len(self.pre_trigger_buffer)
+                if self.capture_windows and \
+                        self.capture_windows[-1][1] == window_start:
+                    window_start = self.capture_windows.pop()[0]
+                self.capture_windows.append([window_start, self.cycle_number])
+                self.pad_signals(window_start)
+                for signals in self.pre_trigger_buffer:
+                    self.store_signals(signals)
+                self.pre_trigger_buffer.clear()
+            self.post_trigger_count = self.post_trigger_cycles + 1
+
+        if self.post_trigger_count > 0:
+            self.store_signals([outputs[port_id] for outputs, port_id
+                                in self.monitor_slots])
+            self.capture_windows[-1][1] = self.cycle_number + 1
+            self.post_trigger_count -= 1
+        elif self.pre_trigger_cycles > 0:
+            self.pre_trigger_buffer.append([outputs[port_id]
+                                            for outputs, port_id
+                                            in self.monitor_slots])
+
+    def check_trigger(self):
+        """Return True if every trigger condition holds in this cycle.
+
+        HIGH and LOW conditions hold while the signal has that level. RISING
+        and FALLING conditions hold in the first cycle of the new level.
+        """
+        triggered = True
+        for index, (outputs, output_id, condition) in \
+                enumerate(self.trigger_slots):
+            level = self.signal_levels[outputs[output_id]]
+            previous_level = self.trigger_levels[index]
+            self.trigger_levels[index] = level
+            if condition == self.devices.RISING:
+                holds = (previous_level == self.devices.LOW and
+                         level == self.devices.HIGH)
+            elif condition == self.devices.FALLING:
+                holds = (previous_level == self.devices.HIGH and
+                         level == self.devices.LOW)
+            else:
+                holds = level == condition
+            triggered = triggered and holds
+        return triggered
+
+    def set_trigger(self, conditions, pre_trigger_cycles=0,
+                    post_trigger_cycles=0):
+        """Only record signals in windows around the trigger cycles.
+
+        conditions is a list of (device_id, output_id, condition) tuples,
+        where condition is HIGH, LOW, RISING or FALLING. The trigger fires in
+        every cycle in which all the conditions hold. The triggering signals
+        need not be monitored. Signals already recorded are kept.
+
+        Return NO_ERROR if successful, or the corresponding error if not.
+        """
+        trigger_slots = []
+        for device_id, output_id, condition in conditions:
+            device = self.devices.get_device(device_id)
+            if device is None:
+                return self.network.DEVICE_ABSENT
+            elif output_id not in device.outputs:
+                return self.NOT_OUTPUT
+            elif condition not in [self.devices.LOW, self.devices.HIGH,
+                                   self.devices.RISING, self.devices.FALLING]:
+                return self.INVALID_TRIGGER
+            trigger_slots.append((device.outputs, output_id, condition))
+        if not trigger_slots or pre_trigger_cycles < 0 or \
+                post_trigger_cycles < 0:
+            return self.INVALID_TRIGGER
+
+        with self.lock:
+            self.trigger_slots = trigger_slots
+            self.trigger_levels = [None] * len(trigger_slots)
+            self.pre_trigger_cycles = pre_trigger_cycles
+            self.post_trigger_cycles = post_trigger_cycles
+            self.pre_trigger_buffer = collections.deque(
+                maxlen=pre_trigger_cycles)
+            self.post_trigger_count = 0
+        return self.NO_ERROR
+
+    def clear_trigger(self):
+        """Remove the trigger conditions and record every cycle again."""
+        with self.lock:
+            self.pad_signals(self.cycle_number)
+            self.trigger_slots = []
+            self.trigger_levels = []
+            self.pre_trigger_buffer = collections.deque(maxlen=0)
+            self.post_trigger_count = 0
+
+    def flush_signals(self):
+        """Move the signals buffered in the signal block into the traces."""
+        with self.lock:
+            if self.block_cycles == 0:
+                return
+            monitor_count = len(self.monitor_slots)
+            end = self.block_cycles * monitor_count
+            for index, signal_list in enumerate(self.monitor_traces):
+                start = len(signal_list)
+                signal_list.extend(self.signal_block[index:end:monitor_count])
+                self.index_edges(index, start)
+                self.update_summary(index, start)
+            self.block_cycles = 0
+
+    def pad_signals(self, cycle):
+        """Fill every trace with BLANK signals up to the given cycle.
+
+        Used for the cycles between capture windows, which are not gathered.
+        No transition is recorded across BLANK signals, so only the summaries
+        need updating.
+        """
+        with self.lock:
+            self.flush_signals()
+            for index, signal_list in enumerate(self.monitor_traces):
+                start = len(signal_list)
+                if start < cycle:
+                    signal_list.extend([self.devices.BLANK] * (cycle - start))
+                    self.update_summary(index, start)
+
+    def index_edges(self, index, start):
+        """Add the transitions from cycle start onwards to the edge index.
+
+        The monitor is given by its index in monitor_traces. Signals that hold
+        one level throughout are skipped without examining every cycle.
+        """
+        signal_list = self.monitor_traces[index]
+        if start >= len(signal_list):
+            return
+        first_signal = signal_list[start]
+        if start > 0:
+            previous_level = self.signal_levels[signal_list[start - 1]]
+            new_signals = signal_list[start:]
+            if signal_list[start - 1] == first_signal and \
+                    new_signals.count(first_signal) == len(new_signals):
+                return  # no transitions
+        else:
+            previous_level = None
+        rising_edges, falling_edges = self.monitor_edges[index]
+        signal_levels = self.signal_levels
+        for cycle in range(start, len(signal_list)):
+            level = signal_levels[signal_list[cycle]]
+            if level != previous_level and level is not None and \
+                    previous_level is not None:
+                if level == self.devices.HIGH:
+                    rising_edges.append(cycle)
+                else:
+                    falling_edges.append(cycle)
+            previous_level = level
+
+    def update_summary(self, index, start):
+        """Update the multi-resolution summary from cycle start onwards.
+
+        The monitor is given by its index in monitor_traces. Only the blocks
+        containing cycles from start onwards are recomputed at each level, so
+        the summary is maintained in time proportional to the new cycles.
+        """
+        signal_list = self.monitor_traces[index]
+        summary = self.monitor_summaries[index]
+        levels = summary[0]
+        del levels[start:]
+        levels.extend(bytes(signal_list[start:]).translate(
+            self.summary_table))
+        position = start
+        level_number = 1
+        while len(summary[level_number - 1]) > 1:
+            if level_number == len(summary):
+                summary.append(bytearray())
+            lower_levels = summary[level_number - 1]
+            upper_levels = summary[level_number]
+            position //= 2
+            first_halves = lower_levels[2 * position::2]
+            second_halves = lower_levels[2 * position + 1::2]
+            if len(second_halves) < len(first_halves):
+                # The last block only has one half so far
+                second_halves.append(first_halves[-1])
+            del upper_levels[position:]
+            if first_halves == second_halves:
+                upper_levels.extend(first_halves)
+            else:
+                upper_levels.extend(
+                    first if first == second else self.MIXED
+                    for first, second in zip(first_halves, second_halves))
+            level_number += 1
+
+    def get_signal_summary(self, device_id, output_id, start, end, columns):
+        """Return the level of each column spanning cycles [start, end).
+
+        The cycle range is divided into the given number of equal columns and
+        each is summarised as LOW, HIGH, BLANK or MIXED using the coarsest
+        summary level whose blocks are no wider than a column, so the cost is
+        proportional to the number of columns rather than cycles. A column
+        may be reported as MIXED when a block it shares with its neighbour
+        contains a transition. Cycles past the end of the trace are BLANK.
+        Return None if the monitor does not exist.
+        """
+        if (device_id, output_id) not in self._monitors_dictionary:
+            return None
+        self.flush_signals()
+        summary = self.summaries_dictionary[(device_id, output_id)]
+        columns = max(columns, 1)
+        cycles_per_column = max((end - start) / columns, 1)
+        level_number = min(int(cycles_per_column).bit_length() - 1,
+                           len(summary) - 1)
+        levels = summary[level_number]
+        block_cycles = 2 ** level_number
+        column_levels = bytearray()
+        for column in range(columns):
+            column_start = start + int(column * cycles_per_column)
+            column_end = max(start + int((column + 1) * cycles_per_column),
+                             column_start + 1)
+            blocks = levels[column_start // block_cycles:
+                            -(-column_end // block_cycles)]
+            if not blocks:
+                column_levels.append(self.devices.BLANK)
+            elif blocks.count(blocks[0]) == len(blocks):
+                column_levels.append(blocks[0])
+            else:
+                column_levels.append(self.MIXED)
+        return column_levels
+
+    def get_edges(self, device_id, output_id, edge_type=None):
+        """Return the sorted transition cycles of the specified monitor.
+
+        edge_type is RISING or FALLING; if it is None, all transitions are
+        returned. Return None if the monitor does not exist.
+        """
+        if (device_id, output_id) not in self._monitors_dictionary:
+            return None
+        self.flush_signals()
+        rising_edges, falling_edges = \
+            self.edges_dictionary[(device_id, output_id)]
+        if edge_type == self.devices.RISING:
+            return rising_edges
+        elif edge_type == self.devices.FALLING:
+            return falling_edges
+        else:
+            return array('l', sorted(rising_edges + falling_edges))
+
+    def next_edge(self, device_id, output_id, cycle, edge_type=None):
+        """Return the first transition cycle after the given cycle.
+
+        Return None if the monitor does not exist or there is no such edge.
+        """
+        if edge_type is None:
+            candidates = [self.next_edge(device_id, output_id, cycle,
+                                         self.devices.RISING),
+                          self.next_edge(device_id, output_id, cycle,
+                                         self.devices.FALLING)]
+            candidates = [edge for edge in candidates if edge is not None]
+            return min(candidates) if candidates else None
+        edges = self.get_edges(device_id, output_id, edge_type)
+        if edges is None:
+            return None
+        position = bisect.bisect_right(edges, cycle)
+        if position < len(edges):
+            return edges[position]
+        return None
+
+    def previous_edge(self, device_id, output_id, cycle, edge_type=None):
+        """Return the last transition cycle before the given cycle.
+
+        Return None if the monitor does not exist or there is no such edge.
+        """
+        if edge_type is None:
+            candidates = [self.previous_edge(device_id, output_id, cycle,
+                                             self.devices.RISING),
+                          self.previous_edge(device_id, output_id, cycle,
+                                             self.devices.FALLING)]
+            candidates = [edge for edge in candidates if edge is not None]
+            return max(candidates) if candidates else None
+        edges = self.get_edges(device_id, output_id, edge_type)
+        if edges is None:
+            return None
+        position = bisect.bisect_left(edges, cycle)
+        if position > 0:
+            return edges[position - 1]
+        return None
+
+    def count_edges(self, device_id, output_id, start, end, edge_type=None):
+        """Return the number of transitions in the cycle range [start, end).
+
+        Return None if the monitor does not exist.
+        """
+        if edge_type is None:
+            rising_count = self.count_edges(device_id, output_id, start, end,
+                                            self.devices.RISING)
+            if rising_count is None:
+                return None
+            return rising_count + self.count_edges(
+                device_id, output_id, start, end, self.devices.FALLING)
+        edges = self.get_edges(device_id, output_id, edge_type)
+        if edges is None:
+            return None
+        return bisect.bisect_left(edges, end) - bisect.bisect_left(edges,
+                                                                   start)
+
+    def get_rising_edges_in_range(self, device_id, output_id, start, end):
+        """Return the rising edges in the cycle range [start, end)."""
+        rising_edges = self.get_edges(device_id, output_id,
+                                      self.devices.RISING)
+        if rising_edges is None:
+            return None
+        if end is None:
+            end = len(self._monitors_dictionary[(device_id, output_id)])
+        return rising_edges[bisect.bisect_left(rising_edges, start):
+                            bisect.bisect_left(rising_edges, end)]
+
+    def get_period(self, device_id, output_id, start=0, end=None):
+        """Return the mean number of cycles between successive rising edges.
+
+        Only rising edges in the cycle range [start, end) are used. Return None
+        if the monitor does not exist or has fewer than two rising edges.
+        """
+        rising_edges = self.get_rising_edges_in_range(device_id, output_id,
+                                                      start, end)
+        if rising_edges is None or len(rising_edges) < 2:
+            return None
+        return (rising_edges[-1] - rising_edges[0]) / (len(rising_edges) - 1)
+
+    def get_duty_cycle(self, device_id, output_id, start=0, end=None):
+        """Return the fraction of each period for which the signal is HIGH.
+
+        The duty cycle is measured over the whole periods between the rising
+        edges in the cycle range [start, end). Return None if the monitor does
+        not exist or has fewer than two rising edges.
+        """
+        rising_edges = self.get_rising_edges_in_range(device_id, output_id,
+                                                      start, end)
+        if rising_edges is None or len(rising_edges) < 2:
+            return None
+        falling_edges = self.get_edges(device_id, output_id,
+                                       self.devices.FALLING)
+        high_cycles = 0
+        for rise, next_rise in zip(rising_edges, rising_edges[1:]):
+            # The first falling edge after each rising edge ends the HIGH part
+            position = bisect.bisect_right(falling_edges, rise)
+            if position < len(falling_edges) and \
+                    falling_edges[position] < next_rise:
+                high_cycles += falling_edges[position] - rise
+            else:
+                high_cycles += next_rise - rise
+        return high_cycles / (rising_edges[-1] - rising_edges[0])
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -135,8 +712,36 @@ class Monitors:
 
         The list of stored signal levels for each monitor is deleted.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+        with self.lock:
+            self.block_cycles = 0  # discard any buffered signals
+            self.cycle_number = 0
+            self.trigger_levels = [None] * len(self.trigger_slots)
+            self.post_trigger_count = 0
+            self.trigger_cycles = []
+            self.capture_windows = []
+            for device_id, output_id in self._monitors_dictionary:
+                self._monitors_dictionary[(device_id, output_id)] = []
+                self.edges_dictionary[(device_id, output_id)] = (array('l'),
+                                                                 array('l'))
+                self.summaries_dictionary[(device_id, output_id)] = [
+                    bytearray()]
+            self.resolve_monitors()
+
+    def restore_signals(self, signal_lists):
+        """Replace the recorded signals of all the monitors.
+
+        signal_lists holds the new signal list of each monitor, in the order
+        of the monitors dictionary, such as one saved from an earlier run.
+        The edge indices and summaries are rebuilt from the new signals.
+        """
+        with self.lock:
+            self.reset_monitors()
+            for index, signal_list in enumerate(signal_lists):
+                self.monitor_traces[index].extend(signal_list)
+                self.index_edges(index, 0)
+                self.update_summary(index, 0)
+            self.cycle_number = max(map(len, self.monitor_traces),
+                                    default=0)
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -155,23 +760,39 @@ class Monitors:
         else:
             return None
 
-    def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+    def display_signals(self, start=0, end=None, width=None, file=None):
+        """Display the signal trace(s) in the text console.
+
+        Only cycles in the window [start, end) are shown. If width is given,
+        the traces are wrapped into blocks of at most width cycles, separated
+        by empty lines. Each trace line is translated from the compact trace
+        in one step and written with a single call to file, which defaults to
+        standard output.
+        """
+        if file is None:
+            file = sys.stdout
         margin = self.get_margin()
-        for device_id, output_id in self.monitors_dictionary:
+        if margin is None:
+            return
+        monitors_dictionary = self.monitors_dictionary
+        prefixes = []
+        for device_id, output_id in monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
-            signal_list = self.monitors_dictionary[(device_id, output_id)]
-            print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            prefixes.append(monitor_name + (margin - name_length) * " " + ": ")
+
+        if end is None:
+            end = max(len(signal_list)
+                      for signal_list in monitors_dictionary.values())
+        if width is None or width <= 0:
+            width = max(end - start, 0)
+        block_starts = range(start, end, width) if width else [start]
+        for block_number, block_start in enumerate(block_starts):
+            block_end = min(block_start + width, end)
+            if block_number > 0:
+                file.write("\n")
+            for prefix, signal_list in zip(prefixes,
+                                           monitors_dictionary.values()):
+                trace = bytes(signal_list[block_start:block_end]).translate(
+                    self.display_table, self.display_delete)
+                file.write(prefix + trace.decode("ascii") + "\n")
@@ -44,6 +44,7 @@ class Names:
         """Initialise names list."""
         self.error_code_count = 0  # how many error codes have been declared
         self.name_list = []
+        self.name_dict = {}  # {name_string: name_id}, for constant time query
 
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
@@ -60,10 +61,7 @@ class Names:
 
         If the name string is not present in the names list, return None.
         """
-        if name_string in self.name_list:
-            return self.name_list.index(name_string)
-        else:
-            return None
+        return self.name_dict.get(name_string)
 
     def lookup(self, name_string_list):
         """Return a list of name IDs for each name string in name_string_list.
@@ -71,15 +69,13 @@ class Names:
         If the name string is not present in the names list, add it.
         """
         if isinstance(name_string_list, list):
-            name_id_list = []
-            for name_string in name_string_list:
-                if name_string not in self.name_list:
-                    self.name_list.append(name_string)
-                name_id_list.append(self.query(name_string))
-            return name_id_list
-        elif name_string_list not in self.name_list:
+            return [self.lookup(name_string)
+                    for name_string in name_string_list]
+        name_id = self.name_dict.get(name_string_list)
+        if name_id is None:
+            name_id = self.name_dict[name_string_list] = len(self.name_list)
             self.name_list.append(name_string_list)
-        return self.query(name_string_list)
+        return name_id
 
     def get_name_string(self, name_id):
         """Return the corresponding name string for name_id.
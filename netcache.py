@@ -0,0 +1,146 @@
+"""Cache parsed circuit definitions keyed by the contents of the file.
+
+Used in the Logic Simulator project to skip the scanner and parser when a
+definition file that has already been parsed successfully is loaded again.
+
+Classes
+-------
+NetlistCache - stores and restores parsed networks in a cache directory.
+"""
+import hashlib
+import os
+import tempfile
+
+from scanner import Scanner
+from parse import Parser
+from netfile import NetlistFile
+
+
+class NetlistCache:
+
+    """Store and restore parsed networks in a cache directory.
+
+    The names table, devices, connections and monitors of a successfully
+    parsed network are written in the binary netlist format to a cache file
+    named after the SHA-256 digest of the definition file. Loading a file
+    with the same contents restores them without running the scanner and
+    parser, and any change to the file gives a new digest, so stale entries
+    are never used.
+
+    Parameters
+    ----------
+    cache_dir: directory holding the cache files. Defaults to the
+               LOGSIM_CACHE_DIR environment variable, or ~/.cache/logsim.
+
+    Public methods
+    --------------
+    file_digest(self, path): Returns the SHA-256 digest of the file, or None
+                             if the file cannot be read.
+
+    cache_path(self, digest): Returns the path of the cache file for digest.
+
+    save(self, digest, names, devices, network, monitors): Writes the
+                       parsed network to the cache.
+
+    load(self, digest, names, devices, network, monitors): Restores a cached
+                       network into the given instances, returns True if
+                       successful.
+
+    parse_network(self, path, names, devices, network, monitors,
+                  record_statements=False, test_mode=False): Loads a binary
+                       netlist file, or loads the network from the cache or
+                       parses the definition file, returns whether it
+                       succeeded and the parser used.
+    """
+
+    def __init__(self, cache_dir=None):
+        """Set the cache directory."""
+        if cache_dir is None:
+            cache_dir = os.environ.get('LOGSIM_CACHE_DIR')
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.cache',
+                                     'logsim')
+        self.cache_dir = cache_dir
+
+    def file_digest(self, path):
+        """Return the SHA-256 digest of the file, or None if unreadable."""
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as definition_file:
+                for block in iter(lambda: definition_file.read(1 << 20), b''):
+                    digest.update(block)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def cache_path(self, digest):
+        """Return the path of the cache file for digest."""
+        return os.path.join(self.cache_dir, digest + '.netlist')
+
+    def save(self, digest, names, devices, network, monitors):
+        """Write the parsed network to the cache file for digest.
+
+        The network is written in the binary netlist format under a
+        temporary name and then renamed, so a partly written cache file is
+        never read. Return True if successful.
+        """
+        netlist_file = NetlistFile(names, devices, network, monitors)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            file_descriptor, temporary_path = tempfile.mkstemp(
+                dir=self.cache_dir, suffix='.tmp')
+            os.close(file_descriptor)
+            netlist_file.save(temporary_path)
+            os.replace(temporary_path, self.cache_path(digest))
+        except OSError:
+            return False
+        return True
+
+    def load(self, digest, names, devices, network, monitors):
+        """Restore the cached network for digest into the given instances.
+
+        The instances must be newly made, with no devices. Return True if
+        successful, or False if there is no usable cache file, in which case
+        no device, connection or monitor is left in the instances and the
+        definition file can be parsed into them.
+        """
+        netlist_file = NetlistFile(names, devices, network, monitors)
+        try:
+            error_type = netlist_file.load(self.cache_path(digest))
+        except OSError:
+            return False
+        return error_type == netlist_file.NO_ERROR
+
+    def parse_network(self, path, names, devices, network, monitors,
+                      record_statements=False, test_mode=False):
+        """Load the network from the cache, or parse the definition file.
+
+        Binary netlist files are loaded directly. A successfully parsed
+        network is saved to the cache. If record_statements is True the
+        cache is not used, so that the parser records the statements of the
+        file. If test_mode is True no error messages are displayed in
+        terminal. Return [True, None] if the network was loaded from a
+        netlist or cache file, [False, None] if a netlist file could not be
+        loaded, otherwise whether parsing succeeded and the parser used.
+        """
+        netlist_file = NetlistFile(names, devices, network, monitors)
+        if netlist_file.is_netlist_file(path):
+            error_type = netlist_file.load(path)
+            if error_type != netlist_file.NO_ERROR:
+                if not test_mode:
+                    print(_("Error! Could not load netlist file."))
+                return [False, None]
+            return [True, None]
+
+        digest = self.file_digest(path)
+        if digest is not None and not record_statements and \
+                self.load(digest, names, devices, network, monitors):
+            return [True, None]
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner,
+                        test_mode=test_mode,
+                        record_statements=record_statements)
+        success = parser.parse_network()
+        if success and digest is not None:
+            self.save(digest, names, devices, network, monitors)
+        return [success, parser]
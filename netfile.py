@@ -0,0 +1,306 @@
+"""Save and load circuits in the binary netlist format.
+
+Used in the Logic Simulator project to store parsed circuits in a compact
+binary file which can be loaded without the scanner and parser.
+
+Classes
+-------
+NetlistFile - writes and reads binary netlist files.
+"""
+import itertools
+import operator
+import struct
+import sys
+from array import array
+
+MAGIC = b'LOGSIMNL'
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, number of names, devices, connections
+# and monitors
+HEADER = struct.Struct('<8sHHIIII')
+ID_TYPE = 'q'  # every ID is stored as a little-endian 64-bit integer
+NO_ID = -1  # stored for absent port IDs and device qualifiers
+
+
+class NetlistFile:
+
+    """Write and read binary netlist files.
+
+    A binary netlist file holds a header followed by arrays of integers:
+
+    header: magic bytes, format version, and the number of names, devices,
+            connections and monitors.
+    names table: the length of each encoded name, then the UTF-8 names.
+    devices: the name IDs, device kinds and qualifiers of the devices.
+    connections: the input device and port IDs, then the output device and
+                 port IDs, of every connection.
+    monitors: the device and port IDs of the monitored signals.
+
+    All IDs are indices into the names table of the file. On loading, the
+    names are added to the names instance and the IDs are mapped to the IDs
+    they have there.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    is_netlist_file(self, path): Returns True if the file starts with the
+                                 binary netlist magic bytes.
+
+    get_qualifier(self, device): Returns the qualifier the device was made
+                                 with, or None.
+
+    save(self, path): Writes the circuit to a binary netlist file.
+
+    get_bytes(self): Returns the circuit in the binary netlist format.
+
+    read_arrays(self, data, offset, count, length): Returns arrays of IDs
+                                                    read from the file data.
+
+    make_network(self, name_ids, device_ids, device_kinds, qualifiers,
+                 connection_arrays, monitor_arrays, effects): Makes the
+                       devices, connections and monitors read from a file,
+                       returns NO_ERROR or the corresponding error.
+
+    undo_effects(self, effects): Removes the devices, connections and
+                                 monitors made.
+
+    load(self, path): Adds the circuit in a binary netlist file to the
+                      network, returns NO_ERROR or the corresponding error.
+
+    load_bytes(self, data): Adds a circuit in the binary netlist format to
+                            the network, returns NO_ERROR or the
+                            corresponding error.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the instances and error codes."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        [self.NO_ERROR, self.BAD_FORMAT,
+         self.BAD_VERSION] = self.names.unique_error_codes(3)
+
+    def is_netlist_file(self, path):
+        """Return True if the file starts with the netlist magic bytes."""
+        try:
+            with open(path, 'rb') as netlist_file:
+                return netlist_file.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return False
+
+    def get_qualifier(self, device):
+        """Return the qualifier the device was made with, or None."""
+        if device.device_kind == self.devices.SWITCH:
+            return device.switch_state
+        elif device.device_kind == self.devices.CLOCK:
+            return device.clock_half_period
+        elif device.device_kind == self.devices.RC:
+            return device.RC_settling_time
+        elif device.device_kind in (self.devices.AND, self.devices.OR,
+                                    self.devices.NAND, self.devices.NOR):
+            return len(device.inputs)
+        else:
+            return None
+
+    def save(self, path):
+        """Write the circuit to a binary netlist file."""
+        with open(path, 'wb') as netlist_file:
+            netlist_file.write(self.get_bytes())
+
+    def get_bytes(self):
+        """Return the circuit in the binary netlist format."""
+        encoded_names = [name.encode('utf-8')
+                         for name in self.names.name_list]
+
+        device_arrays = [array(ID_TYPE) for i in range(3)]
+        connection_arrays = [array(ID_TYPE) for i in range(4)]
+        for device in self.devices.devices_list:
+            qualifier = self.get_qualifier(device)
+            device_arrays[0].append(device.device_id)
+            device_arrays[1].append(device.device_kind)
+            device_arrays[2].append(NO_ID if qualifier is None
+                                    else qualifier)
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    continue
+                output_device_id, output_id = connected_output
+                connection_arrays[0].append(device.device_id)
+                connection_arrays[1].append(input_id)
+                connection_arrays[2].append(output_device_id)
+                connection_arrays[3].append(NO_ID if output_id is None
+                                            else output_id)
+
+        monitor_arrays = [array(ID_TYPE) for i in range(2)]
+        for device_id, output_id in self.monitors.monitors_dictionary:
+            monitor_arrays[0].append(device_id)
+            monitor_arrays[1].append(NO_ID if output_id is None
+                                     else output_id)
+
+        arrays = ([array(ID_TYPE, map(len, encoded_names))] + device_arrays +
+                  connection_arrays + monitor_arrays)
+        if sys.byteorder != 'little':
+            for id_array in arrays:
+                id_array.byteswap()
+
+        header = HEADER.pack(
+            MAGIC, FORMAT_VERSION, 0, len(encoded_names),
+            len(device_arrays[0]), len(connection_arrays[0]),
+            len(monitor_arrays[0]))
+        return b''.join([header, arrays[0].tobytes()] + encoded_names +
+                        [id_array.tobytes() for id_array in arrays[1:]])
+
+    def read_arrays(self, data, offset, count, length):
+        """Return count arrays of length IDs read from data at offset."""
+        size = length * array(ID_TYPE).itemsize
+        arrays = []
+        for i in range(count):
+            id_array = array(ID_TYPE)
+            id_array.frombytes(data[offset:offset + size])
+            if sys.byteorder != 'little':
+                id_array.byteswap()
+            arrays.append(id_array)
+            offset += size
+        return arrays
+
+    def make_network(self, name_ids, device_ids, device_kinds, qualifiers,
+                     connection_arrays, monitor_arrays, effects):
+        """Make the devices, connections and monitors read from a file.
+
+        name_ids maps the IDs in the file to the IDs here. Each device,
+        connection and monitor made is appended to effects, in the form of
+        Parser.effects. Return NO_ERROR if successful, or the error of the
+        first one which cannot be made.
+        """
+        # Runs of devices with the same kind and qualifier are made together
+        device_runs = itertools.groupby(
+            zip(device_kinds, qualifiers, device_ids),
+            key=operator.itemgetter(0, 1))
+        for (device_kind, qualifier), device_run in device_runs:
+            device = ([name_ids[device[2]] for device in device_run],
+                      name_ids[device_kind],
+                      None if qualifier == NO_ID else qualifier)
+            error_type = self.devices.make_devices(*device)
+            if error_type != self.devices.NO_ERROR:
+                return error_type
+            effects.append(('device',) + device)
+
+        for (input_device_id, input_id, output_device_id,
+             output_id) in zip(*connection_arrays):
+            connection = (name_ids[input_device_id], name_ids[input_id],
+                          name_ids[output_device_id], name_ids[output_id])
+            error_type = self.network.make_connection(*connection)
+            if error_type != self.network.NO_ERROR:
+                return error_type
+            effects.append(('connection',) + connection)
+
+        for device_id, output_id in zip(*monitor_arrays):
+            monitor = (name_ids[device_id], name_ids[output_id])
+            error_type = self.monitors.make_monitor(*monitor)
+            if error_type != self.monitors.NO_ERROR:
+                return error_type
+            effects.append(('monitor',) + monitor)
+
+        return self.NO_ERROR
+
+    def undo_effects(self, effects):
+        """Remove the devices, connections and monitors made, in reverse."""
+        for effect in reversed(effects):
+            if effect[0] == 'device':
+                self.devices.remove_devices(effect[1])
+            elif effect[0] == 'connection':
+                self.network.remove_connection(*effect[1:])
+            else:
+                self.monitors.remove_monitor(*effect[1:])
+
+    def load(self, path):
+        """Add the circuit in a binary netlist file to the network.
+
+        Return NO_ERROR if successful, or the corresponding error if not.
+        """
+        with open(path, 'rb') as netlist_file:
+            return self.load_bytes(netlist_file.read())
+
+    def load_bytes(self, data):
+        """Add a circuit in the binary netlist format to the network.
+
+        The layout of the file and the range of every ID are checked before
+        anything is added, and if a device, connection or monitor cannot be
+        made, those already made are removed again, so that only the names
+        of a file with errors are added. Return NO_ERROR if successful, or
+        the corresponding error if not.
+        """
+        data = memoryview(data)
+
+        if len(data) < HEADER.size:
+            return self.BAD_FORMAT
+        [magic, version, reserved, name_count, device_count,
+         connection_count, monitor_count] = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            return self.BAD_FORMAT
+        if version != FORMAT_VERSION:
+            return self.BAD_VERSION
+
+        item_size = array(ID_TYPE).itemsize
+        offset = HEADER.size
+        if len(data) < offset + name_count * item_size:
+            return self.BAD_FORMAT
+        [name_lengths] = self.read_arrays(data, offset, 1, name_count)
+        offset += name_count * item_size
+        names_size = sum(name_lengths)
+        id_count = 3 * device_count + 4 * connection_count + 2 * monitor_count
+        if (min(name_lengths, default=0) < 0 or
+                len(data) != offset + names_size + id_count * item_size):
+            return self.BAD_FORMAT
+
+        try:
+            name_strings = []
+            for length in name_lengths:
+                name_strings.append(
+                    str(data[offset:offset + length], 'utf-8'))
+                offset += length
+        except UnicodeDecodeError:
+            return self.BAD_FORMAT
+
+        device_ids, device_kinds, qualifiers = self.read_arrays(
+            data, offset, 3, device_count)
+        offset += 3 * device_count * item_size
+        connection_arrays = self.read_arrays(data, offset, 4,
+                                             connection_count)
+        offset += 4 * connection_count * item_size
+        monitor_arrays = self.read_arrays(data, offset, 2, monitor_count)
+
+        # Every ID must index the names table; only ports may be absent
+        for id_array in [device_ids, device_kinds] + connection_arrays[:3] + \
+                monitor_arrays[:1]:
+            if id_array and not 0 <= min(id_array) <= max(id_array) < \
+                    name_count:
+                return self.BAD_FORMAT
+        for id_array in [connection_arrays[3], monitor_arrays[1]]:
+            if id_array and not NO_ID <= min(id_array) <= max(id_array) < \
+                    name_count:
+                return self.BAD_FORMAT
+
+        # Map the IDs in the file to the IDs of the same names here, with
+        # NO_ID, the last index, mapped to None
+        name_ids = self.names.lookup(name_strings) + [None]
+
+        # Everything made is recorded, so that it can be removed again if a
+        # later device, connection or monitor cannot be made
+        effects = []
+        error_type = self.make_network(name_ids, device_ids, device_kinds,
+                                       qualifiers, connection_arrays,
+                                       monitor_arrays, effects)
+        if error_type != self.NO_ERROR:
+            self.undo_effects(effects)
+            return error_type
+
+        return self.NO_ERROR
@@ -35,6 +35,10 @@ class Network:
                     second_port_id): Connects the first device to the second
                                      device.
 
+    remove_connection(self, first_device_id, first_port_id, second_device_id,
+                      second_port_id): Removes the connection between the
+                                       first and second devices.
+
     check_network(self): Checks if all inputs in the network are connected.
 
     [new] find_unconnected_inputs(self): Return the list of the unconnected
@@ -77,6 +81,7 @@ class Network:
         self.steady_state = True  # for checking if signals have settled
         self.device_no_input = -1
         self.cycle_count = 0
+        self.evaluation_count = 0  # number of device executions
 
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
@@ -162,6 +167,23 @@ class Network:
 
         return error_type
 
+    def remove_connection(self, first_device_id, first_port_id,
+                          second_device_id, second_port_id):
+        """Remove the connection between the first and second devices.
+
+        Return True if successful.
+        """
+        for input_device_id, input_id, output in [
+                (first_device_id, first_port_id,
+                 (second_device_id, second_port_id)),
+                (second_device_id, second_port_id,
+                 (first_device_id, first_port_id))]:
+            if self.get_connected_output(input_device_id, input_id) == output:
+                device = self.devices.get_device(input_device_id)
+                device.inputs[input_id] = None
+                return True
+        return False  # no such connection
+
     def check_network(self):
         """Return True if all inputs in the network are connected."""
         for device_id in self.devices.find_devices():
@@ -412,9 +434,11 @@ class Network:
         # declaring the network unstable
         iteration_limit = 20
 
+        device_count = len(self.devices.devices_list)
         iterations = 0
         while iterations < iteration_limit:
             iterations += 1
+            self.evaluation_count += device_count
             self.steady_state = True
 
             for device_id in switch_devices:  # execute switch devices
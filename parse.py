@@ -34,7 +34,22 @@ class Parser:
     Optional Parameters
     -------------------
     test_mode (=False): if True, parser will operate in test mode and no
-                        error messages will be displayed in terminal.
+                        error messages will be displayed in terminal; they
+                        are still collected in message.
+    defer_undefined (=False): if True, connections and monitors of devices
+                        not defined in the file are recorded in
+                        deferred_connections and deferred_monitors instead of
+                        being errors, and unconnected inputs are not checked.
+                        Used to parse one file of a circuit split across
+                        several files.
+    record_statements (=False): if True, the symbols of every statement
+                        parsed without errors and the changes it made to the
+                        network are recorded in statements, and every change
+                        made to the network is recorded in effects. Used to
+                        re-parse only the changed statements of an edited
+                        file.
+    max_errors (=100): the number of errors after which parsing stops, or
+                       None to report every error.
 
     Public methods
     --------------
@@ -42,6 +57,8 @@ class Parser:
 
     parse_network(self): Parses the circuit definition file.
 
+    message(self): Returns the error messages displayed so far.
+
     is_target_name(self, target_name): Check if the name string corresponding
                                        to self.symbol_id is the same as the
                                        target_name.
@@ -54,6 +71,8 @@ class Parser:
     statement(self): Parse a statement, which starts with '('
                      and ends with ')'.
 
+    record_effect(self, effect): Record a change made to the network.
+
     device(self): Parse a device definition.
 
     add_device_location(self): Add current (linum, pos) to the dict of device
@@ -76,8 +95,14 @@ class Parser:
     device_terminal(self, monitor_mode = False): Parse a device terminal and
                                                  return (devicd_id, port_id).
 
+    deferred_terminal(self, device_id): Parse the port of a terminal whose
+                                        device is not defined in the file.
+
     connect(self): Parse a connection.
 
+    add_monitor(self, device_id, port_id): Make a monitor, or defer it if the
+                                           device is not defined in the file.
+
     monitor(self): Parse a series of monitors.
 
     error_display(self, *args): Display error messages on terminal.
@@ -87,7 +112,8 @@ class Parser:
     """
 
     def __init__(self, names, devices, network, monitors, scanner,
-                 test_mode=False):
+                 test_mode=False, defer_undefined=False,
+                 record_statements=False, max_errors=100):
         """Initialise constants."""
         self.names = names
         self.devices = devices
@@ -96,6 +122,9 @@ class Parser:
         self.scanner = scanner
 
         self.symbol_type, self.symbol_id = None, None
+        # Position just after the current symbol, as given by the scanner
+        self.symbol_line = scanner.line_number
+        self.symbol_column = len(scanner.current_line)
 
         [self.NO_ERROR,
          self.BAD_CHARACTER,
@@ -233,10 +262,11 @@ class Parser:
                                      "two outputs")
         }
         self.errormsg_format_dict = {}  # used for str.format(**dict)
-        self.message = ''
+        self.message_list = []  # joined into message when read
 
         self.error_code = self.NO_ERROR
         self.error_count = 0
+        self.max_errors = max_errors
 
         # For errormsg display
         self.Location = namedtuple('Location', 'linum, pos')
@@ -251,6 +281,24 @@ class Parser:
 
         # For testing purpose
         self.test_mode = test_mode
+
+        # For circuits split across several files
+        self.defer_undefined = defer_undefined
+        self.terminal_deferred = False  # last terminal's device undefined
+        # [(first_device_id, first_port_id, second_device_id, second_port_id,
+        #   (linum, pos))] and [(device_id, port_id, (linum, pos))]
+        self.deferred_connections = []
+        self.deferred_monitors = []
+
+        # For re-parsing edited files. Effects are ('device', device_ids,
+        # device_kind, qualifier), ('connection', first_device_id,
+        # first_port_id, second_device_id, second_port_id) and ('monitor',
+        # device_id, port_id); statements are [(symbols, effects)]
+        self.record_statements = record_statements
+        self.statements = []
+        self.effects = []
+        self.statement_symbols = []
+        self.statement_effects = []
         self.ErrorTuple = namedtuple('ErrorTuple', 'error, linum, pos')
         self.error_tuple_list = []
 
@@ -271,9 +319,12 @@ class Parser:
 
     def move_to_next_symbol(self):
         """Get next symbol from scanner."""
-        self.last_error_pos = len(self.scanner.current_line)
-        self.last_error_linum = self.scanner.line_number
-        self.symbol_type, self.symbol_id = self.scanner.get_symbol()
+        self.last_error_pos = self.symbol_column
+        self.last_error_linum = self.symbol_line
+        (self.symbol_type, self.symbol_id, self.symbol_line,
+         self.symbol_column) = next(self.scanner.symbol_stream)
+        if self.record_statements:
+            self.statement_symbols.append((self.symbol_type, self.symbol_id))
         self.errormsg_format_dict['symbol_name'] = self.get_name_string()
 
     def parse_network(self):
@@ -299,34 +350,60 @@ class Parser:
                         self.error_code = self.BAD_COMMENT
                 self.error_display()
                 self.error_code = self.NO_ERROR  # restore to normal state
-                # move to next '(' to resume parsing
+                if self.max_errors is not None and \
+                        self.error_count >= self.max_errors:
+                    if not self.test_mode:
+                        print(_('\nToo many errors, parsing stopped.'))
+                    self.message_list.append(_('\nToo many errors, parsing '
+                                               'stopped.') + '\n')
+                    break
+                # move to next '(' to resume parsing, skipping the
+                # characters in between without reading symbols
+                if not (self.is_left_paren() or self.is_EOF()):
+                    self.scanner.skip_to_left_paren()
+                    self.move_to_next_symbol()
                 while (not self.is_left_paren()) and (not self.is_EOF()):
                     self.move_to_next_symbol()
-        if self.error_count == 0:  # only check network when no other errors
+        # only check network when no other errors, and when the other files
+        # of the circuit cannot connect the inputs
+        if self.error_count == 0 and not self.defer_undefined:
             unconnected_inputs = self.network.find_unconnected_inputs()
             if len(unconnected_inputs) > 0:
-                print(_('The following inputs are not connected to any '
-                        'outputs:\n'))
-                self.message += _('The following inputs are not connected '
-                                  'to any outputs:\n') + '\n'
+                if not self.test_mode:
+                    print(_('The following inputs are not connected to any '
+                            'outputs:\n'))
+                self.message_list.append(_('The following inputs are not '
+                                           'connected to any outputs:\n') +
+                                         '\n')
                 for i, (device_id, input_id) in enumerate(unconnected_inputs):
                     terminal_name = self.get_terminal_name(device_id, input_id)
-                    print('  [%d] %s' % (i + 1, terminal_name))
-                    self.message += '  [%d] %s' % (i + 1, terminal_name) + '\n'
-                print(_('\nPlease check your circuit connection before '
-                        'running the parser again.'))
-                self.message += _('\nPlease check your circuit connection '
-                                  'before running the parser again.') + '\n'
+                    if not self.test_mode:
+                        print('  [%d] %s' % (i + 1, terminal_name))
+                    self.message_list.append('  [%d] %s' % (i + 1,
+                                                            terminal_name) +
+                                             '\n')
+                if not self.test_mode:
+                    print(_('\nPlease check your circuit connection before '
+                            'running the parser again.'))
+                self.message_list.append(_('\nPlease check your circuit '
+                                           'connection before running the '
+                                           'parser again.') + '\n')
                 self.error_count = 1
         if self.error_count > 0:
-            print()
-            if self.error_count == 1:
-                print('Parser: 1 error generated.')
-            else:
-                print('Parser: %d errors generated.' % (self.error_count))
+            if not self.test_mode:
+                print()
+                if self.error_count == 1:
+                    print('Parser: 1 error generated.')
+                else:
+                    print('Parser: %d errors generated.' % (self.error_count))
             return False
         return True
 
+    @property
+    def message(self):
+        """Return the error messages displayed so far."""
+        return ''.join(self.message_list)
+
     def is_left_paren(self):
         """Check whether current symbol is '('."""
         return self.symbol_type == self.scanner.PUNCTUATION and \
@@ -388,6 +465,8 @@ class Parser:
         if not self.is_left_paren():
             self.error_code = self.EXPECT_LEFT_PAREN
             return False
+        self.statement_symbols = [(self.symbol_type, self.symbol_id)]
+        self.statement_effects = []
         self.move_to_next_symbol()
         # Check inside the statement
         if not (self.device() or self.connect() or self.monitor()):
@@ -403,9 +482,18 @@ class Parser:
             self.last_error_pos_overwrite = True
             self.last_error_pos += 1
             return False
+        if self.record_statements:
+            self.statements.append((tuple(self.statement_symbols),
+                                    self.statement_effects))
         self.move_to_next_symbol()
         return True
 
+    def record_effect(self, effect):
+        """Record a change made to the network by the current statement."""
+        if self.record_statements:
+            self.statement_effects.append(effect)
+            self.effects.append(effect)
+
     def device(self):
         """Parse a device definition."""
         if self.error_code != self.NO_ERROR:  # make sure no error has occured
@@ -434,20 +522,22 @@ class Parser:
         device_kind, qualifier = self.get_device_type()
         if device_kind is None:  # error occured
             return False
-        for device_id in new_device_ids:
-            error_code = self.devices.make_device(device_id, device_kind,
-                                                  qualifier)
-            if error_code == self.devices.INVALID_QUALIFIER:
-                self.error_code = self.INVALID_QUALIFIER
-                self.last_error_pos_overwrite = True
-                return False
+        new_device_ids = list(new_device_ids)
+        error_code = self.devices.make_devices(new_device_ids, device_kind,
+                                               qualifier)
+        if error_code == self.devices.INVALID_QUALIFIER:
+            self.error_code = self.INVALID_QUALIFIER
+            self.last_error_pos_overwrite = True
+            return False
+        if error_code == self.devices.NO_ERROR:
+            self.record_effect(('device', tuple(new_device_ids), device_kind,
+                                qualifier))
         return True
 
     def add_device_location(self):
         """Add current (linum, pos) to the dict of device locations."""
         self.device_locations[self.symbol_id] = \
-            self.Location(self.scanner.line_number,
-                          len(self.scanner.current_line))
+            self.Location(self.symbol_line, self.symbol_column)
 
     def get_first_device_id(self, new_device_ids):
         """Parse the first device name by force.
@@ -565,6 +655,7 @@ class Parser:
     def device_terminal(self, monitor_mode=False):
         """Parse a device terminal and return (devicd_id, port_id).
         Return (None, None) if error occurs."""
+        self.terminal_deferred = False
         if not self.is_name():
             return None, None   # no error code at this point
         device_id = self.device_id = self.symbol_id
@@ -573,6 +664,8 @@ class Parser:
         self.errormsg_format_dict['device_type_full'] = \
             self.get_device_type_string(device)
         if device is None:
+            if self.defer_undefined:
+                return self.deferred_terminal(device_id)
             self.error_code = self.DEVICE_UNDEFINED
             return None, None
         self.move_to_next_symbol()
@@ -599,8 +692,7 @@ class Parser:
                     return None, None
                 else:
                     self.monitor_locations[(device_id, port_id)] = \
-                        self.Location(self.scanner.line_number,
-                                      len(self.scanner.current_line))
+                        self.Location(self.symbol_line, self.symbol_column)
             self.move_to_next_symbol()
         else:
             port_id = self.port_id = None
@@ -622,6 +714,23 @@ class Parser:
                                       self.last_error_pos)
         return device_id, port_id
 
+    def deferred_terminal(self, device_id):
+        """Parse the port of a terminal whose device is not defined in the
+        file, and return (device_id, port_id).
+        Return (None, None) if error occurs."""
+        self.terminal_deferred = True
+        self.move_to_next_symbol()
+        if not self.is_dot():
+            return device_id, None
+        self.move_to_next_symbol()
+        if not self.is_name():
+            self.error_code = self.EXPECT_PORT_NAME
+            self.last_error_pos_overwrite = True
+            return None, None
+        port_id = self.port_id = self.symbol_id
+        self.move_to_next_symbol()
+        return device_id, port_id
+
     def connect(self):
         """Parse a connection."""
         if self.error_code != self.NO_ERROR:  # make sure no error has occured
@@ -635,6 +744,7 @@ class Parser:
             if self.error_code == self.NO_ERROR:
                 self.error_code = self.EXPECT_DEVICE_TERMINAL_NAME
             return False
+        first_deferred = self.terminal_deferred
         first_location = self.Location(self.last_error_linum,
                                        self.last_error_pos)
         # Check keyword 'to'
@@ -650,6 +760,12 @@ class Parser:
             return False
         second_location = self.Location(self.last_error_linum,
                                         self.last_error_pos)
+        if first_deferred or self.terminal_deferred:
+            # Connected when the other files have been parsed
+            self.deferred_connections.append(
+                (first_device_id, first_port_id, second_device_id,
+                 second_port_id, tuple(first_location)))
+            return True
         # Make connection now (use network module)
         error_code = self.network.make_connection(first_device_id,
                                                   first_port_id,
@@ -685,12 +801,27 @@ class Parser:
                 raise ValueError('zao yu feng')
             self.last_error_pos_overwrite = True
             return False
+        self.record_effect(('connection', first_device_id, first_port_id,
+                            second_device_id, second_port_id))
         self.connect_locations[(first_device_id,
                                 first_port_id)] = first_location
         self.connect_locations[(second_device_id,
                                 second_port_id)] = second_location
         return True
 
+    def add_monitor(self, device_id, port_id):
+        """Make a monitor, or defer it if the device is not defined in the
+        file."""
+        if self.terminal_deferred:
+            self.deferred_monitors.append(
+                (device_id, port_id,
+                 (self.last_error_linum, self.last_error_pos)))
+            return
+        error_code = self.monitors.make_monitor(device_id, port_id)
+        if error_code != self.monitors.NO_ERROR:
+            raise ValueError('zao yii feng tai tm shuai le')
+        self.record_effect(('monitor', device_id, port_id))
+
     def monitor(self):
         """Parse a series of monitors."""
         if self.error_code != self.NO_ERROR:  # make sure no error has occured
@@ -707,9 +838,7 @@ class Parser:
                 else:
                     self.error_code = self.INVALID_DEVICE_NAME
             return False
-        error_code = self.monitors.make_monitor(device_id, port_id)
-        if error_code != self.monitors.NO_ERROR:
-            raise ValueError('zao yii feng tai tm shuai le')
+        self.add_monitor(device_id, port_id)
         # Check all the other device ports
         while True:
             device_id, port_id = self.device_terminal(monitor_mode=True)
@@ -717,9 +846,7 @@ class Parser:
                 if self.error_code == self.NO_ERROR:
                     return True
                 return False
-            error_code = self.monitors.make_monitor(device_id, port_id)
-            if error_code != self.monitors.NO_ERROR:
-                raise ValueError('zao yii feng tai tm shuai le')
+            self.add_monitor(device_id, port_id)
 
     def get_recommend_final(self, target_string):
         """Return the final valid recommendation names for the given target
@@ -754,16 +881,18 @@ class Parser:
             error_tuple = self.ErrorTuple(self.error_names[self.error_code],
                                           line_number, error_position)
             self.error_tuple_list.append(error_tuple)
-            return True
         # TEST END #
         indent = ' '*2
-        print(_('\n[ERROR #%d]') % (self.error_count))
-        print(_('In File "')+self.scanner.input_file.name+_('", line ') +
-              str(line_number))
-        print(indent + current_line)
-        print(indent + ' '*(error_position-1) + '^')
-        print(self.errormsg[self.error_code].
-              format(**self.errormsg_format_dict))
+        additional_info = self.error_additional_info()
+        if not self.test_mode:
+            print(_('\n[ERROR #%d]') % (self.error_count))
+            print(_('In File "')+self.scanner.input_file.name+_('", line ') +
+                  str(line_number))
+            print(indent + current_line)
+            print(indent + ' '*(error_position-1) + '^')
+            print(self.errormsg[self.error_code].
+                  format(**self.errormsg_format_dict))
+            print(additional_info, end='')
         message = _('\n[ERROR #%d]') % (self.error_count) + '\n'
         message = message + _('In File "') + self.scanner.input_file.name \
             + _('", line ') + str(line_number) + '\n'
@@ -771,13 +900,12 @@ class Parser:
         message = message + indent + ' '*(error_position-1) + '^' + '\n'
         message = message + self.errormsg[self.error_code].\
             format(**self.errormsg_format_dict) + '\n'
-        additional_info = self.error_additional_info()
         message = message + additional_info + '\n'
-        self.message += message
+        self.message_list.append(message)
         return True
 
     def error_additional_info(self):
-        """Add additional information to the error display."""
+        """Return additional information for the error display."""
         additional_info = ''
         indent = ' '*2
         if self.error_code in (self.DEVICE_REDEFINED, self.MONITOR_PRESENT):
@@ -786,46 +914,30 @@ class Parser:
             else:
                 location = self.monitor_locations[(self.device_id,
                                                    self.port_id)]
-            print('-----------------------------------------')
             additional_info += '-----------------------------------------\n'
-            print(_('Previous definition here, in line'), location.linum)
             additional_info = additional_info + \
-                _('Previous definition here, in line') + \
+                _('Previous definition here, in line') + ' ' + \
                 str(location.linum) + '\n'
-            if location.linum < self.scanner.line_number:
-                line = self.scanner.previous_lines[location.linum]
-            else:
-                line, pos = self.scanner.complete_current_line()
-            print(indent + line)
+            line = self.scanner.get_line(location.linum)
             additional_info = additional_info + indent + line + '\n'
-            print(indent + ' '*(location.pos-1) + '^')
             additional_info = additional_info + indent + \
                 ' '*(location.pos-1) + '^' + '\n'
         elif self.error_code == self.INPUT_CONNECTED:
             location = self.connect_locations[(self.device_id, self.port_id)]
-            print('-----------------------------------------')
             additional_info += '-----------------------------------------\n'
-            print(_('Previous connection here, in line'), location.linum)
             additional_info = additional_info + \
-                _('Previous connection here, in line') + \
+                _('Previous connection here, in line') + ' ' + \
                 str(location.linum) + '\n'
-            if location.linum < self.scanner.line_number:
-                line = self.scanner.previous_lines[location.linum]
-            else:
-                line, pos = self.scanner.complete_current_line()
-            print(indent + line)
+            line = self.scanner.get_line(location.linum)
             additional_info = additional_info + indent + line + '\n'
-            print(indent + ' '*(location.pos-1) + '^')
             additional_info = additional_info + indent + \
                 ' '*(location.pos-1) + '^' + '\n'
         elif self.error_code == self.DEVICE_UNDEFINED:
-            print('-----------------------------------------')
             additional_info += '-----------------------------------------\n'
             recommend_list_str = \
                 ' '.join(self.get_recommend_final(self.get_name_string()))
             if recommend_list_str == '':
                 recommend_list_str = _('None')
-            print(_('Possible suggestions: ') + recommend_list_str)
             additional_info += _('Possible suggestions: ') + \
                 recommend_list_str + '\n'
         return additional_info
@@ -0,0 +1,166 @@
+"""Report the progress and throughput of long simulation runs.
+
+Used in the Logic Simulator project to print how far a run has got, how
+fast it is going and how much memory it uses, and a summary line at the end
+of each run.
+
+Classes
+-------
+ProgressReporter - prints progress lines and a summary of a run.
+
+Functions
+---------
+get_rss - returns the resident set size of this process.
+get_max_rss - returns the peak resident set size of this process.
+"""
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SAMPLE_CYCLES = 64  # cycles run between readings of the clock
+
+
+def get_rss():
+    """Return the resident set size of this process in bytes, or None.
+
+    The current size is read from /proc where available, otherwise the peak
+    size is returned.
+    """
+    try:
+        with open('/proc/self/statm') as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return get_max_rss()
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def get_max_rss():
+    """Return the peak resident set size of this process in bytes, or None."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # in bytes, elsewhere in kilobytes
+        return max_rss
+    return max_rss * 1024
+
+
+class ProgressReporter:
+
+    """Print the progress and throughput of simulation runs.
+
+    The run calls update() with the number of cycles done whenever it
+    reaches next_update, which is every SAMPLE_CYCLES cycles, so the clock
+    is only read occasionally. A progress line, giving the cycles done,
+    cycles per second, device evaluations per second, estimated time left
+    and resident set size, is printed every interval seconds, so runs
+    shorter than interval print none. finish() prints a summary line of
+    key=value fields, meant to be read by other programs.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    interval: number of seconds between progress lines.
+    file: file the lines are printed to, defaults to standard error.
+    summary: if False, no summary line is printed.
+
+    Public methods
+    --------------
+    start(self, cycles): Starts timing a run of cycles cycles.
+
+    update(self, done): Prints a progress line if one is due.
+
+    get_rates(self, done): Returns the cycles and device evaluations per
+                           second so far.
+
+    format_duration(self, seconds): Returns a duration as hours, minutes and
+                                    seconds.
+
+    finish(self, done): Prints the summary line of the run.
+    """
+
+    def __init__(self, network, interval=5.0, file=None, summary=True):
+        """Initialise the reporting options and the run state."""
+        self.network = network
+        self.interval = interval
+        self.file = file
+        self.summary = summary
+        self.clock = time.perf_counter
+
+        self.cycles = 0  # number of cycles requested
+        self.next_update = 0  # number of cycles done at the next update
+        self.start_time = 0
+        self.start_evaluations = 0
+        self.last_report_time = 0
+
+    def print_line(self, line):
+        """Print a line to the file, or to standard error if None."""
+        print(line, file=sys.stderr if self.file is None else self.file,
+              flush=True)
+
+    def start(self, cycles):
+        """Start timing a run of cycles cycles."""
+        self.cycles = cycles
+        self.next_update = SAMPLE_CYCLES
+        self.start_time = self.clock()
+        self.last_report_time = self.start_time
+        self.start_evaluations = self.network.evaluation_count
+
+    def get_rates(self, done):
+        """Return [cycles per second, evaluations per second] so far."""
+        elapsed = self.clock() - self.start_time
+        if elapsed <= 0:
+            return [0.0, 0.0]
+        evaluations = self.network.evaluation_count - self.start_evaluations
+        return [done / elapsed, evaluations / elapsed]
+
+    def format_duration(self, seconds):
+        """Return seconds as H:MM:SS."""
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+    def update(self, done):
+        """Print a progress line if interval seconds have passed since the
+        last one.
+        """
+        self.next_update = done + SAMPLE_CYCLES
+        now = self.clock()
+        if now - self.last_report_time < self.interval:
+            return
+        self.last_report_time = now
+        [cycle_rate, evaluation_rate] = self.get_rates(done)
+        if cycle_rate > 0:
+            eta = self.format_duration((self.cycles - done) / cycle_rate)
+        else:
+            eta = '-'
+        rss = get_rss()
+        rss = '-' if rss is None else '%.1f MB' % (rss / 1e6)
+        self.print_line(_(
+            'Progress: {done}/{cycles} cycles ({percent:.1f}%), '
+            '{cycle_rate:.1f} cycles/s, {evaluation_rate:.0f} evaluations/s, '
+            'ETA {eta}, RSS {rss}').format(
+                done=done, cycles=self.cycles,
+                percent=100 * done / max(self.cycles, 1),
+                cycle_rate=cycle_rate, evaluation_rate=evaluation_rate,
+                eta=eta, rss=rss))
+
+    def finish(self, done):
+        """Print the summary line of a run which completed done cycles."""
+        if not self.summary:
+            return
+        elapsed = self.clock() - self.start_time
+        [cycle_rate, evaluation_rate] = self.get_rates(done)
+        max_rss = get_max_rss()
+        self.print_line(
+            'summary cycles=%d requested=%d seconds=%.3f '
+            'cycles_per_second=%.1f evaluations=%d '
+            'evaluations_per_second=%.0f max_rss_bytes=%s oscillating=%d' % (
+                done, self.cycles, elapsed, cycle_rate,
+                self.network.evaluation_count - self.start_evaluations,
+                evaluation_rate, '-' if max_rss is None else max_rss,
+                done < self.cycles))
@@ -7,6 +7,62 @@ Classes
 -------
 Scanner - reads definition file and translates characters into symbols.
 """
+import io
+import mmap
+import re
+from array import array
+
+
+def compile_pattern(pattern, flags=0):
+    """Return the pattern compiled for text and for memory-mapped sources."""
+    return (re.compile(pattern, flags),
+            re.compile(pattern.encode('ascii'), flags))
+
+
+# Patterns used to consume runs of characters in one step
+SPACE_PATTERN = compile_pattern(r'\s+')
+NAME_PATTERN = compile_pattern(r'[^\W_]+')  # alphanumeric characters
+NUMBER_PATTERN = compile_pattern(r'\d+')
+
+# Master pattern matching any whitespace and comments before one symbol.
+# A '/*' comment ends at the first '*/' after the opening '/', so '/*/' is a
+# complete comment. The named group that matched gives the kind of symbol,
+# and no group matches at the end of the file.
+SYMBOL_PATTERN = compile_pattern(r'''
+    (?:\s+ | //[^\n]* | /\*(?:/|.*?\*/))*    # whitespace and comments
+    (?:
+        (?P<name>[^\W\d_][^\W_]*)           # starts with a letter
+      | (?P<zero_number>0\d+)               # number starting with 0
+      | (?P<number>\d+)
+      | (?P<punctuation>[().])
+      | (?P<unterminated_comment>/\*)
+      | (?P<slash>/)                       # '/' not starting a comment
+      | (?P<invalid>.)
+    )?
+    ''', re.VERBOSE | re.DOTALL)
+
+# Pattern matching everything up to the next '(' which is not in a comment,
+# used to recover from errors. It stops before an unterminated comment, which
+# is left for the symbol pattern to report.
+RECOVERY_PATTERN = compile_pattern(r'''
+    (?:[^(/]+ | //[^\n]* | /\*(?:/|.*?\*/) | /(?!\*))*
+    ''', re.VERBOSE | re.DOTALL)
+
+# Files are scanned as bytes as they would be scanned as text unless they
+# hold any of these bytes. A '\r' must then be part of a '\r\n' line
+# ending, since the text layer makes any other '\r' a line break, and the
+# others must be in comments: the str patterns also match non-ASCII letters,
+# digits and whitespace, and treat '\x1c' to '\x1f' as whitespace.
+SPECIAL_BYTE_PATTERN = re.compile(rb'[\r\x1c-\x1f\x80-\xff]')
+LONE_CR_PATTERN = re.compile(rb'\r(?!\n)')
+NON_ASCII_PATTERN = re.compile(rb'[\x80-\xff]')
+
+# Pattern matching a file up to the first special byte outside comments, or
+# up to an unterminated comment, which runs to the end of the file
+MAPPABLE_PATTERN = re.compile(rb'''
+    (?:[^/\r\x1c-\x1f\x80-\xff]+ | \r\n | //[^\n]*
+     | /\*(?:/|[^*]*\*+(?:[^*/][^*]*\*+)*/) | /(?!\*))*
+    ''', re.VERBOSE)
 
 
 class Scanner:
@@ -23,9 +79,33 @@ class Scanner:
     ----------
     path: path to the circuit definition file.
     names: instance of the names.Names() class.
+    source: optional definition text to scan instead of the file at path,
+            which is then only used as the file name in error messages.
+
+    The file is memory-mapped when the scanner is created, or read into a
+    string if it cannot be mapped, and symbols are read by moving an index
+    through the source. Whitespace and comments in a mapped file are skipped
+    without being copied, and only names and displayed lines are decoded
+    into strings. Files may have '\r\n' line endings and UTF-8 comments;
+    files with non-ASCII characters outside comments, or with '\r' line
+    breaks not followed by '\n', are read into a string instead.
 
     Public methods
     -------------
+    map_file(self): Return the memory-mapped input file, or its text if the
+                    file cannot be mapped
+
+    to_text(self, chars): Return characters read from the source as a string
+
+    get_column(self): Return the number of characters in the current line
+                      before the current index
+
+    get_line_end(self, line_start): Return the index where a line ends,
+                                    before any '\r\n' line ending
+
+    move_to(self, index): Move forward to the character at index, counting
+                          the lines passed
+
     advance(self): Read the next character and set self.current_character
                    to the new value, also updates current_line
 
@@ -41,16 +121,29 @@ class Scanner:
     complete_current_line(self): Return the completed line and a
                                  position indicating where error occurs
 
+    get_line(self, line_number): Return the text of the given line
+
+    skip_to_left_paren(self): Move to the next '(' outside comments, without
+                              reading the symbols before it
+
+    symbols(self): Generator which tokenises the input with one pattern
+                   match per symbol and yields the symbol type, ID, line
+                   number and column of every symbol.
+
     get_symbol(self): Translates the next sequence of characters and
                       returns the symbol type and ID.
     """
 
-    def __init__(self, path, names):
+    def __init__(self, path, names, source=None):
         """Open specified file and initialise reserved words and IDs."""
-        try:
-            self.input_file = open(path)
-        except FileNotFoundError:
-            print("can't find file under this name")
+        if source is not None:
+            self.input_file = io.StringIO(source)
+            self.input_file.name = path
+        else:
+            try:
+                self.input_file = open(path)
+            except FileNotFoundError:
+                print("can't find file under this name")
 
         self.names = names
 
@@ -87,55 +180,136 @@ class Scanner:
             'Unterminated comment']
         dummy = names.lookup(self.error_list)
 
-        self.previous_lines = []        # for errormsg display
-        self.line_number = 0            # also for errormsg display
-        self.current_line = ''
-        self.current_character = ''
-        self.advance()
+        with self.input_file:
+            self.source = self.map_file()
+        self.mapped = isinstance(self.source, mmap.mmap)
+        pattern_index = 1 if self.mapped else 0
+        self.space_pattern = SPACE_PATTERN[pattern_index]
+        self.name_pattern = NAME_PATTERN[pattern_index]
+        self.number_pattern = NUMBER_PATTERN[pattern_index]
+        self.symbol_pattern = SYMBOL_PATTERN[pattern_index]
+        self.recovery_pattern = RECOVERY_PATTERN[pattern_index]
+        self.newline = b'\n' if self.mapped else '\n'
+        self.comment_end = b'*/' if self.mapped else '*/'
+
+        # line_offsets[n] is the index in source where line n starts, for
+        # every line scanned so far (line 0 is a placeholder)
+        self.line_offsets = array('l', [0, 0])  # for errormsg display
+        self.line_number = 1            # also for errormsg display
+        self.line_start = 0             # index where current_line starts
+        self.index = 0                  # index of current_character
+
+        self.symbol_stream = self.symbols()
+
+    def map_file(self):
+        """Return the memory-mapped input file, or else its text.
+
+        The text is read instead if the file is empty, cannot be mapped or
+        would not be scanned as its text is, as SPECIAL_BYTE_PATTERN
+        describes. Sets byte_columns to whether byte offsets in the source
+        are character columns, which is not so for UTF-8 comments holding
+        multibyte characters.
+        """
+        self.byte_columns = True
+        try:
+            mapped = mmap.mmap(self.input_file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return self.input_file.read()
+        special = SPECIAL_BYTE_PATTERN.search(mapped)
+        if special is None:
+            return mapped
+        end = MAPPABLE_PATTERN.match(mapped).end()
+        if LONE_CR_PATTERN.search(mapped, special.start()) or \
+                (end != len(mapped) and mapped[end:end + 2] != b'/*'):
+            mapped.close()
+            return self.input_file.read()
+        self.byte_columns = not NON_ASCII_PATTERN.search(mapped,
+                                                         special.start())
+        return mapped
+
+    def to_text(self, chars):
+        """Return characters sliced from the source as a string."""
+        return chars.decode('utf-8', 'replace') if self.mapped else chars
+
+    def get_column(self):
+        """Return the number of characters before the current index."""
+        if self.byte_columns:
+            return self.index - self.line_start
+        return len(self.current_line)
+
+    def get_line_end(self, line_start):
+        """Return the index where the line starting at line_start ends."""
+        line_end = self.source.find(self.newline, line_start)
+        if line_end == -1:
+            line_end = len(self.source)
+        if self.mapped and self.source[line_end - 1:line_end] == b'\r':
+            line_end -= 1  # the '\r' of a '\r\n' line ending
+        return line_end
+
+    @property
+    def current_character(self):
+        """Return the character at the current index, or '' at the end."""
+        return self.to_text(self.source[self.index:self.index + 1])
+
+    @property
+    def current_line(self):
+        """Return the current line up to the current character."""
+        return self.to_text(self.source[self.line_start:self.index])
+
+    def move_to(self, index):
+        """Move forward to the character at index, counting the lines."""
+        newline = self.source.find(self.newline, self.index, index)
+        while newline != -1:
+            self.line_offsets.append(newline + 1)
+            self.line_number += 1
+            newline = self.source.find(self.newline, newline + 1, index)
+        self.line_start = self.line_offsets[-1]
+        self.index = index
 
     def advance(self):
-        if self.current_character not in ('\n', ''):
-            self.current_line += self.current_character
-        else:
-            self.previous_lines.append(self.current_line)
-            self.current_line = ''
+        if self.current_character == '':
+            # reading past the end of the file starts a new, empty line
+            self.line_offsets.append(self.index)
+            self.line_start = self.index
             self.line_number += 1
-
-        self.current_character = self.input_file.read(1)
+        elif self.current_character == '\n':
+            self.move_to(self.index + 1)
+        else:
+            self.index += 1
 
     def skip_spaces(self):
         '''move to the next non-whitespace character'''
-        while self.current_character.isspace():
-            self.advance()
+        match = self.space_pattern.match(self.source, self.index)
+        if match:
+            self.move_to(match.end())
 
     def complete_current_line(self):
-        # record cursor position
-        current_cursor_position = self.input_file.tell()
-        current_line = self.current_line
-        error_position = len(current_line)
-        current_character = self.current_character
-        # complete reading current_line
-        while current_character not in('\n', ''):
-            current_line += current_character
-            current_character = self.input_file.read(1)
-        # move back to scan location
-        self.input_file.seek(current_cursor_position)
-        return [current_line, error_position]
+        '''return the whole current line and the error position in it'''
+        line_end = self.get_line_end(self.index)
+        return [self.to_text(self.source[self.line_start:line_end]),
+                self.get_column()]
+
+    def get_line(self, line_number):
+        '''return the text of a line scanned so far, without the newline'''
+        if not 0 < line_number < len(self.line_offsets):
+            return ''
+        line_start = self.line_offsets[line_number]
+        line_end = self.get_line_end(line_start)
+        return self.to_text(self.source[line_start:line_end])
 
     def get_name(self):
-        name = ''
-        while (self.current_character.isalnum() and
-               self.current_character != ''):
-            name = name + self.current_character
-            self.advance()
-        return name
+        match = self.name_pattern.match(self.source, self.index)
+        if match is None:
+            return ''
+        # names never span lines, so there are no lines to count
+        self.index = match.end()
+        return self.to_text(match.group())
 
     def get_number(self):
-        number = ''
-        while (self.current_character.isdigit() and
-               self.current_character != ''):
-            number = number + self.current_character
-            self.advance()
+        match = self.number_pattern.match(self.source, self.index)
+        number = self.to_text(match.group()) if match else ''
+        self.index += len(number)
 
         if number[0] == '0' and len(number) != 1:
             return -1
@@ -152,63 +326,96 @@ class Scanner:
         if self.current_character not in ('/', '*'):
             return 3
         elif self.current_character == '/':
-            while self.current_character not in ('\n', ''):
-                self.advance()
+            line_end = self.source.find(self.newline, self.index)
+            if line_end == -1:
+                line_end = len(self.source)
+            self.move_to(line_end)
             return 1
         elif self.current_character == '*':
-            previous_character = self.current_character
-            self.advance()
-            while not (previous_character == '*' and
-                       self.current_character == '/'):
-                previous_character = self.current_character
-                self.advance()
-                if self.current_character == '':
-                    return 2
-            self.advance()
+            # the opening '*' may also be the '*' of the closing '*/'
+            comment_end = self.source.find(self.comment_end, self.index)
+            if comment_end == -1:
+                at_end = self.index + 1 == len(self.source)
+                self.move_to(len(self.source))
+                if at_end:
+                    self.advance()
+                return 2
+            self.move_to(comment_end + 2)
             return 1
 
-    def get_symbol(self):
-        """Return the symbol type and ID of the next sequence of characters.
+    def skip_to_left_paren(self):
+        """Move to the next '(' which is not in a comment.
 
-        Note: this function is called again (recursively) if it encounters
-        a comment or end of line.
+        The characters before it are skipped without being made into
+        symbols, so no names are added to the names table. The scanner stops
+        at the end of the file, or before an unterminated comment, and the
+        next symbol from the symbol stream is the '(' or the symbol there.
         """
+        self.move_to(self.recovery_pattern.match(self.source,
+                                                 self.index).end())
+
+    def symbols(self):
+        """Yield (symbol_type, symbol_id, line, column) for every symbol.
 
-        self.skip_spaces()  # current character now not whitespace
-        if self.current_character.isalpha():
-            name_string = self.get_name()
-            if name_string in self.keywords_list:
-                symbol_type = self.KEYWORD
-                symbol_id = self.names.query(name_string)
-            else:
-                symbol_type = self.NAME
-                symbol_id = self.names.lookup(name_string)
-        elif self.current_character.isdigit():  # a number cannot start with 0
-            symbol_type = self.NUMBER
-            symbol_id = self.get_number()
-            if symbol_id == -1:
+        The whitespace and comments before each symbol and the symbol itself
+        are matched by a single regular expression. The scanner position is
+        updated before each symbol is yielded, so line is the line number and
+        column the length of current_line just after the symbol. EOF is
+        yielded forever once the end of the file is reached.
+        """
+        source = self.source
+        match_symbol = self.symbol_pattern.match
+        newline = self.newline
+        to_text = self.to_text
+        byte_columns = self.byte_columns
+        keywords = set(self.keywords_list)
+        while True:
+            match = match_symbol(source, self.index)
+            kind = match.lastgroup
+            symbol_start = match.start(kind) if kind else match.end()
+            if source.find(newline, self.index, symbol_start) != -1:
+                self.move_to(symbol_start)
+            self.index = match.end()
+
+            if kind == 'name':
+                name_string = to_text(match.group(kind))
+                if name_string in keywords:
+                    symbol_type = self.KEYWORD
+                    symbol_id = self.names.query(name_string)
+                else:
+                    symbol_type = self.NAME
+                    symbol_id = self.names.lookup(name_string)
+            elif kind == 'punctuation':
+                symbol_type = self.PUNCTUATION
+                symbol_id = self.names.query(to_text(match.group(kind)))
+            elif kind == 'number':
+                symbol_type = self.NUMBER
+                symbol_id = int(match.group(kind))
+            elif kind == 'zero_number':
                 symbol_type = self.SYNTAX_ERROR
                 symbol_id = self.names.query('Number starting with 0')
-        elif self.current_character in ('(', ')', '.'):
-            symbol_type = self.PUNCTUATION
-            symbol_id = self.names.query(self.current_character)
-            self.advance()
-        elif self.current_character == '':
-            symbol_type = self.EOF
-            symbol_id = 1  # only symbol_type is checked in parser
-        elif self.current_character == '/':
-            skip_successful = self.skip_comment()
-            if skip_successful == 1:
-                [symbol_type, symbol_id] = self.get_symbol()
-            elif skip_successful == 2:
+            elif kind is None:
+                symbol_type = self.EOF
+                symbol_id = 1  # only symbol_type is checked in parser
+            elif kind == 'unterminated_comment':
+                at_end = self.index == len(source)
+                self.move_to(len(source))
+                if at_end:
+                    self.advance()
                 symbol_type = self.SYNTAX_ERROR
                 symbol_id = self.names.query('Unterminated comment')
-            elif skip_successful == 3:
+            else:  # a '/' not starting a comment, or not a valid character
                 symbol_type = self.SYNTAX_ERROR
                 symbol_id = self.names.query('Unrecogonized character')
-        else:  # not a valid character
-            symbol_type = self.SYNTAX_ERROR
-            symbol_id = self.names.query('Unrecogonized character')
-            self.advance()
 
+            yield (symbol_type, symbol_id, self.line_number,
+                   self.index - self.line_start if byte_columns
+                   else self.get_column())
+
+    def get_symbol(self):
+        """Return the symbol type and ID of the next sequence of characters.
+
+        The symbol is taken from the symbol stream of the scanner.
+        """
+        symbol_type, symbol_id, line, column = next(self.symbol_stream)
         return [symbol_type, symbol_id]
@@ -0,0 +1,478 @@
+"""Serve simulations of circuits that stay loaded between requests.
+
+Used in the Logic Simulator project to load circuits once and run them for
+many clients, over a Unix socket or HTTP on a loopback address, so that test
+harnesses do not start the simulator and parse the same files for every
+run.
+
+Classes
+-------
+SimulationSession - a loaded circuit and the state of its simulation.
+SimulationServer - serves requests on the loaded circuits.
+
+Functions
+---------
+parse_address - splits a server address into its kind and location.
+"""
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import ipaddress
+import json
+
+from asyncsim import AsyncSimulator
+from signalindex import SignalIndex
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from netcache import NetlistCache
+from netfile import NetlistFile
+from shards import ShardParser
+from tracewriter import TraceWriter, NO_LEVEL
+
+MAX_REQUEST_SIZE = 1 << 20  # bytes, for a request line or body
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 405: 'Method Not Allowed',
+                413: 'Payload Too Large'}
+
+
+def parse_address(address):
+    """Split a server address into [kind, location].
+
+    'unix:<path>' gives ['unix', path], and '[<host>:]<port>' gives
+    ['http', (host, port)], with host defaulting to 127.0.0.1. Return None
+    if the address is invalid or the host is not a loopback address.
+    """
+    if address.startswith('unix:'):
+        if len(address) == len('unix:'):
+            return None
+        return ['unix', address[len('unix:'):]]
+    host, separator, port = address.rpartition(':')
+    if not separator:
+        host = '127.0.0.1'
+    host = host.strip('[]')
+    if not port.isdigit() or int(port) > 65535:
+        return None
+    if host != 'localhost':
+        try:
+            if not ipaddress.ip_address(host).is_loopback:
+                return None
+        except ValueError:
+            return None
+    return ['http', (host, int(port))]
+
+
+class SimulationSession(AsyncSimulator):
+
+    """Hold a loaded circuit and the state of its simulation.
+
+    The simulation is run as in asyncsim.AsyncSimulator, so that other
+    requests are served between its chunks of cycles.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_signal(self, signal_name): Returns the device and port IDs of a
+                                   signal name.
+
+    set_switch(self, switch_name, level): Sets a switch, returns True if
+                                          successful.
+
+    make_monitor(self, signal_name): Sets a monitor, returns True if
+                                     successful.
+
+    remove_monitor(self, signal_name): Zaps a monitor, returns True if
+                                       successful.
+
+    get_switch_names(self): Returns the names of the switches.
+
+    get_traces(self, encoding): Returns the monitored signal traces.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the instances and the simulation state."""
+        super().__init__(names, devices, network, monitors)
+        self.trace_writer = TraceWriter(devices, monitors)
+        self.signal_index = SignalIndex(names, devices)
+        # requests on this session are handled one at a time
+        self.lock = asyncio.Lock()
+
+    def get_signal(self, signal_name):
+        """Return [device ID, port ID] of a signal name, or None if unknown.
+
+        Names are resolved through the signal index, so unknown names are
+        never added to the names table.
+        """
+        return self.signal_index.get_signal_ids(signal_name)
+
+    def set_switch(self, switch_name, level):
+        """Set the named switch to level, 0 or 1. Return True if successful."""
+        switch_id = self.signal_index.get_device_id(switch_name)
+        if switch_id is None or isinstance(level, bool) or \
+                level not in (0, 1):
+            return False
+        return self.devices.set_switch(switch_id, level)
+
+    def make_monitor(self, signal_name):
+        """Set a monitor on the named signal. Return True if successful."""
+        signal = self.get_signal(signal_name)
+        if signal is None:
+            return False
+        return self.monitors.make_monitor(
+            signal[0], signal[1],
+            self.cycles_completed) == self.monitors.NO_ERROR
+
+    def remove_monitor(self, signal_name):
+        """Zap the monitor on the named signal. Return True if successful."""
+        signal = self.get_signal(signal_name)
+        if signal is None:
+            return False
+        return self.monitors.remove_monitor(signal[0], signal[1])
+
+    def get_switch_names(self):
+        """Return the names of the switches."""
+        return [self.names.get_name_string(switch_id) for switch_id
+                in self.devices.find_devices(self.devices.SWITCH)]
+
+    def get_traces(self, encoding):
+        """Return {signal name: trace} for the monitored signals.
+
+        With the 'json' encoding each trace is a list of levels, 0 or 1, with
+        BLANK signals as None. With the 'base64' encoding each trace is one
+        byte for each cycle, 0, 1 or 255 for BLANK, encoded in base64.
+        """
+        signal_names = self.trace_writer.get_signal_names()
+        traces = self.trace_writer.get_levels()
+        if encoding == 'base64':
+            return {signal_name: base64.b64encode(levels).decode('ascii')
+                    for signal_name, levels in zip(signal_names, traces)}
+        return {signal_name: [None if level == NO_LEVEL else level
+                              for level in levels]
+                for signal_name, levels in zip(signal_names, traces)}
+
+
+class SimulationServer:
+
+    """Serve requests to load and simulate circuits.
+
+    Each request is a JSON object with a "command", and each response is a
+    JSON object with "ok" true, or false and an "error" message. On a Unix
+    socket, requests and responses are single lines; over HTTP, each
+    request is the body of a POST and connections are kept alive.
+
+    The commands are:
+    load - loads the definition files in "paths" into a new session and
+           returns its "session" number, "switches" and "monitors".
+    run, continue - runs the "session" for "cycles" cycles, from a cold
+           start seeded with the optional "seed" for run, and returns the
+           "cycles_completed" and whether it is "oscillating". If
+           "encoding" is given the "traces" are returned as well.
+    switch - sets the "switch" of the "session" to "level".
+    monitor, zap - sets or zaps the monitor on the "signal" of the
+           "session".
+    traces - returns the "traces" of the "session" in the "encoding",
+           "json" (the default) or "base64" (see
+           SimulationSession.get_traces).
+    close - removes the "session".
+
+    Circuits are parsed once and kept as binary netlists, keyed by the
+    digests of their files, so loading an unchanged circuit again only
+    restores the netlist. Parsing runs in a worker thread, and simulations
+    yield to the event loop between chunks of cycles, so that other clients
+    are served meanwhile.
+
+    Parameters
+    ----------
+    cache: instance of the netcache.NetlistCache() class, used to parse
+           single definition files.
+
+    Public methods
+    --------------
+    load_circuit(self, paths): Returns a new session for the circuit in the
+                               definition files, and any parser messages.
+
+    handle_request(self, request): Returns the response to a request.
+
+    handle_line_client(self, reader, writer): Serves the requests of a Unix
+                                              socket client.
+
+    handle_http_client(self, reader, writer): Serves the requests of an
+                                              HTTP client.
+
+    start(self, address): Starts serving at an address.
+
+    serve(self, address): Serves at an address until cancelled.
+    """
+
+    def __init__(self, cache=None):
+        """Initialise the loaded circuits and sessions."""
+        if cache is None:
+            cache = NetlistCache()
+        self.cache = cache
+        # {tuple of paths: [digest of the files, binary netlist]}
+        self.netlists = {}
+        self.sessions = {}  # {session number: SimulationSession}
+        self.session_count = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+
+    def file_digest(self, paths):
+        """Return a digest of the definition files, or None if unreadable."""
+        digest = hashlib.sha256()
+        for path in paths:
+            file_digest = self.cache.file_digest(path)
+            if file_digest is None:
+                return None
+            digest.update(file_digest.encode('ascii'))
+        return digest.hexdigest()
+
+    def load_circuit(self, paths):
+        """Load the circuit in the definition files into a new session.
+
+        Return [session or None if loading failed, parser messages].
+        """
+        paths = tuple(paths)
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        digest = self.file_digest(paths)
+        if digest is None:
+            return [None, _("***Error: can't find file under this name")]
+
+        # the parsers run in test mode, collecting their messages, since
+        # redirecting the output would change it for every thread
+        message = ''
+        if paths in self.netlists and self.netlists[paths][0] == digest:
+            NetlistFile(names, devices, network,
+                        monitors).load_bytes(self.netlists[paths][1])
+        else:
+            if len(paths) > 1:
+                shard_parser = ShardParser(names, devices, network, monitors,
+                                           list(paths), test_mode=True)
+                success = shard_parser.parse_network()
+                message = shard_parser.message
+            else:
+                [success, parser] = self.cache.parse_network(
+                    paths[0], names, devices, network, monitors,
+                    test_mode=True)
+                if parser is not None:
+                    message = parser.message
+                elif not success:
+                    message = _("Error! Could not load netlist file.")
+            if not success:
+                return [None, message]
+            self.netlists[paths] = [digest, NetlistFile(
+                names, devices, network, monitors).get_bytes()]
+        return [SimulationSession(names, devices, network, monitors),
+                message]
+
+    async def run_in_worker(self, function, *args):
+        """Run function in the worker thread and return its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    def is_integer(self, value):
+        """Return True if value is a JSON integer, which is not a boolean."""
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def error_response(self, message):
+        """Return the response to a failed request."""
+        return {'ok': False, 'error': message}
+
+    async def handle_request(self, request):
+        """Return the response to a request, as a dictionary."""
+        if not isinstance(request, dict):
+            return self.error_response(_("Error! Expected a JSON object."))
+        command = request.get('command')
+        if command == 'load':
+            paths = request.get('paths')
+            if not isinstance(paths, list) or not paths or \
+                    not all(isinstance(path, str) for path in paths):
+                return self.error_response(_("Error! Expected the paths."))
+            [session, messages] = await self.run_in_worker(
+                self.load_circuit, paths)
+            if session is None:
+                return self.error_response(messages)
+            self.session_count += 1
+            self.sessions[self.session_count] = session
+            return {'ok': True, 'session': self.session_count,
+                    'switches': session.get_switch_names(),
+                    'monitors': session.trace_writer.get_signal_names()}
+
+        session_number = request.get('session')
+        if not self.is_integer(session_number):
+            return self.error_response(_("Error! Expected a session."))
+        session = self.sessions.get(session_number)
+        if session is None:
+            return self.error_response(_("Error! Unknown session."))
+        async with session.lock:
+            return await self.handle_session_request(session, request)
+
+    async def handle_session_request(self, session, request):
+        """Return the response to a request on a session."""
+        command = request.get('command')
+        response = {'ok': True}
+        if command in ('run', 'continue'):
+            cycles = request.get('cycles')
+            seed = request.get('seed')
+            if not self.is_integer(cycles) or cycles < 0:
+                return self.error_response(_("Error! Expected a number."))
+            if seed is not None and not self.is_integer(seed):
+                return self.error_response(_("Error! Expected a number."))
+            if command == 'run':
+                await session.run(cycles, seed=seed)
+            elif session.cycles_completed == 0:
+                return self.error_response(
+                    _("Error! Nothing to continue. Run first."))
+            else:
+                await session.continue_run(cycles)
+            response['cycles_completed'] = session.cycles_completed
+            response['oscillating'] = session.oscillating
+            if 'encoding' not in request:
+                return response
+        elif command == 'switch':
+            if not session.set_switch(str(request.get('switch')),
+                                      request.get('level')):
+                return self.error_response(_("Error! Invalid switch."))
+            return response
+        elif command == 'monitor':
+            if not session.make_monitor(str(request.get('signal'))):
+                return self.error_response(
+                    _("Error! Could not make monitor."))
+            return response
+        elif command == 'zap':
+            if not session.remove_monitor(str(request.get('signal'))):
+                return self.error_response(_("Error! Could not zap monitor."))
+            return response
+        elif command == 'close':
+            del self.sessions[request['session']]
+            return response
+        elif command != 'traces':
+            return self.error_response(_("Error! Invalid command."))
+
+        encoding = request.get('encoding', 'json')
+        if encoding not in ('json', 'base64'):
+            return self.error_response(_("Error! Unknown encoding."))
+        response['traces'] = session.get_traces(encoding)
+        return response
+
+    async def handle_body(self, body):
+        """Return the response to a JSON request body, encoded as bytes."""
+        try:
+            request = json.loads(body)
+        except ValueError:
+            response = self.error_response(_("Error! Invalid JSON."))
+        else:
+            response = await self.handle_request(request)
+        return json.dumps(response, separators=(',', ':')).encode('utf-8')
+
+    async def handle_line_client(self, reader, writer):
+        """Serve the requests of a client, one JSON object on each line."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than the limit
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(await self.handle_body(line) + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def write_http_response(self, writer, status, body, keep_alive):
+        """Write an HTTP response with a JSON body."""
+        header = ('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+                  'Content-Length: %d\r\nConnection: %s\r\n\r\n' % (
+                      status, HTTP_REASONS[status], len(body),
+                      'keep-alive' if keep_alive else 'close'))
+        writer.write(header.encode('ascii') + body)
+        await writer.drain()
+
+    async def handle_http_client(self, reader, writer):
+        """Serve the HTTP requests of a client, each a POST of JSON."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line.strip():
+                        break
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if not line.strip():
+                            break
+                        key, separator, value = line.decode(
+                            'latin1').partition(':')
+                        headers[key.strip().lower()] = value.strip()
+                except ValueError:  # a line is longer than the limit
+                    break
+                method, *rest = request_line.decode('latin1').split()
+                version = rest[-1] if rest else 'HTTP/1.0'
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (
+                    version == 'HTTP/1.1' or connection == 'keep-alive')
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    await self.write_http_response(
+                        writer, 400, b'{"ok":false}', False)
+                    break
+                if int(length) > MAX_REQUEST_SIZE:
+                    await self.write_http_response(
+                        writer, 413, b'{"ok":false}', False)
+                    break
+                body = await reader.readexactly(int(length))
+                if method != 'POST':
+                    await self.write_http_response(
+                        writer, 405, b'{"ok":false}', keep_alive)
+                else:
+                    await self.write_http_response(
+                        writer, 200, await self.handle_body(body),
+                        keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address):
+        """Start serving at an address, given as for parse_address.
+
+        Return the asyncio server, or None if the address is invalid.
+        """
+        server_address = parse_address(address)
+        if server_address is None:
+            return None
+        kind, location = server_address
+        if kind == 'unix':
+            return await asyncio.start_unix_server(
+                self.handle_line_client, location, limit=MAX_REQUEST_SIZE)
+        host, port = location
+        return await asyncio.start_server(self.handle_http_client, host,
+                                          port, limit=MAX_REQUEST_SIZE)
+
+    async def serve(self, address):
+        """Serve at an address until cancelled.
+
+        Return False if the address is invalid.
+        """
+        server = await self.start(address)
+        if server is None:
+            return False
+        async with server:
+            await server.serve_forever()
+        return True
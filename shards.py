@@ -0,0 +1,288 @@
+"""Parse a circuit split across several definition files in parallel.
+
+Used in the Logic Simulator project to parse the files of a large circuit in
+a pool of worker processes and merge the results into one network.
+
+Classes
+-------
+ShardParser - parses the files of a circuit and merges them.
+
+Functions
+---------
+parse_shard - parses one file of a circuit in a worker process.
+"""
+import builtins
+import gettext
+import os
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from netfile import NetlistFile
+
+
+def parse_shard(path):
+    """Parse one file of a circuit split across several files.
+
+    Connections and monitors of devices defined in other files are deferred,
+    and IDs are replaced by name strings so that the result can be sent
+    between processes. Nothing is printed, so that files parsed in this
+    process do not write to its output. Return [error message, error count,
+    binary netlist, defined device names, deferred connections, deferred
+    monitors].
+    """
+    if not hasattr(builtins, '_'):  # worker processes may be started afresh
+        gettext.NullTranslations().install()
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner,
+                    test_mode=True, defer_undefined=True)
+    parser.parse_network()
+
+    get_name_string = names.get_name_string
+    device_names = [get_name_string(device_id)
+                    for device_id in devices.find_devices()]
+    connections = [
+        (get_name_string(first_device_id),
+         None if first_port_id is None else get_name_string(first_port_id),
+         get_name_string(second_device_id),
+         None if second_port_id is None else get_name_string(second_port_id),
+         location)
+        for (first_device_id, first_port_id, second_device_id,
+             second_port_id, location) in parser.deferred_connections]
+    monitor_list = [
+        (get_name_string(device_id),
+         None if port_id is None else get_name_string(port_id), location)
+        for device_id, port_id, location in parser.deferred_monitors]
+    netlist = NetlistFile(names, devices, network, monitors).get_bytes()
+    return [parser.message, parser.error_count, netlist, device_names,
+            connections, monitor_list]
+
+
+class ShardParser:
+
+    """Parse the files of a circuit and merge them into one network.
+
+    Each file is scanned and parsed in a pool of worker processes, with the
+    connections and monitors of devices defined in other files deferred.
+    The devices, connections and monitors of every file are then added to
+    the network, with the IDs of each file mapped to the shared names
+    instance, before the deferred connections and monitors are made and
+    unconnected inputs are checked.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    paths: list of paths to the definition files of the circuit.
+    max_workers: number of worker processes, defaults to the number of
+                 processors. With one worker, or one file, the files are
+                 parsed in this process.
+    test_mode: if True, no error messages are displayed in terminal; they
+               are still collected in message.
+
+    Public methods
+    --------------
+    parse_network(self): Parses and merges the files, returns True if
+                         successful.
+
+    parse_shards(self): Returns the parsed result of every file.
+
+    report_error(self, path, location, error_message): Displays an error
+                                                       found when merging.
+
+    get_signal_ids(self, device_name, port_name): Returns the device and port
+                          IDs of a signal named in another file, or None.
+
+    merge_shard(self, path, shard): Adds the devices, and the connections
+                                    and monitors within one file, to the
+                                    network.
+
+    connect_deferred(self, path, connection): Makes a connection between
+                                              devices in different files.
+
+    monitor_deferred(self, path, monitor): Makes a monitor on a device in
+                                           another file.
+    """
+
+    def __init__(self, names, devices, network, monitors, paths,
+                 max_workers=None, test_mode=False):
+        """Initialise the instances and error count."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.paths = list(paths)
+        self.max_workers = max_workers
+        self.test_mode = test_mode
+
+        self.message = ''
+        self.error_count = 0
+
+    def parse_network(self):
+        """Parse the files of the circuit and merge them into the network.
+
+        Return True if there were no errors.
+        """
+        for path in self.paths:
+            if not os.path.isfile(path):
+                self.report_error(path, None, _("***Error: can't find file "
+                                                "under this name"))
+        if self.error_count == 0:
+            shards = self.parse_shards()
+            for shard in shards:
+                if not self.test_mode:
+                    print(shard[0], end='')
+                self.message += shard[0]
+                self.error_count += shard[1]
+            # merge only when every file is free of errors, and make the
+            # connections between files once every device has been added
+            if self.error_count == 0:
+                for path, shard in zip(self.paths, shards):
+                    self.merge_shard(path, shard)
+            if self.error_count == 0:
+                for path, shard in zip(self.paths, shards):
+                    for connection in shard[4]:
+                        self.connect_deferred(path, connection)
+                    for monitor in shard[5]:
+                        self.monitor_deferred(path, monitor)
+
+        if self.error_count == 0:
+            unconnected_inputs = self.network.find_unconnected_inputs()
+            if unconnected_inputs:
+                message = _('The following inputs are not connected to any '
+                            'outputs:\n') + '\n'
+                for i, (device_id, input_id) in enumerate(unconnected_inputs):
+                    message += '  [%d] %s\n' % (
+                        i + 1, self.devices.get_signal_name(device_id,
+                                                            input_id))
+                message += _('\nPlease check your circuit connection '
+                             'before running the parser again.') + '\n'
+                if not self.test_mode:
+                    print(message, end='')
+                self.message += message
+                self.error_count = 1
+        if self.error_count > 0:
+            if not self.test_mode:
+                print()
+                if self.error_count == 1:
+                    print('Parser: 1 error generated.')
+                else:
+                    print('Parser: %d errors generated.' % (self.error_count))
+            return False
+        return True
+
+    def parse_shards(self):
+        """Return the result of parse_shard for every file, in order."""
+        if self.max_workers == 1 or len(self.paths) == 1:
+            return [parse_shard(path) for path in self.paths]
+        # only imported when needed, since it takes a noticeable part of the
+        # start-up time of the command line user interface
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(self.max_workers) as pool:
+            return list(pool.map(parse_shard, self.paths))
+
+    def report_error(self, path, location, error_message):
+        """Display an error found when merging the files."""
+        self.error_count += 1
+        message = _('\n[ERROR #%d]') % (self.error_count) + '\n'
+        message += _('In File "') + path + '"'
+        if location is not None:
+            message += _(', line ') + str(location[0])
+        message += '\n' + error_message + '\n'
+        if not self.test_mode:
+            print(message, end='')
+        self.message += message
+
+    def get_signal_ids(self, device_name, port_name):
+        """Return [device_id, port_id] of a signal named in another file.
+
+        Return None if the device or port does not exist.
+        """
+        device_id = self.names.query(device_name)
+        device = self.devices.get_device(device_id)
+        if device is None:
+            return None
+        if port_name is None:
+            return [device_id, None]
+        port_id = self.names.query(port_name)
+        if port_id not in device.inputs and port_id not in device.outputs:
+            return None
+        return [device_id, port_id]
+
+    def merge_shard(self, path, shard):
+        """Add the devices, and the connections and monitors within one
+        file, to the network."""
+        [message, error_count, netlist, device_names, connections,
+         monitor_list] = shard
+        for device_name in device_names:
+            if self.devices.get_device(self.names.query(device_name)):
+                self.report_error(path, None, _(
+                    "***Semantic Error: Device '{device_name}' is defined "
+                    "in more than one file").format(device_name=device_name))
+        if self.error_count > 0:
+            return
+
+        netlist_file = NetlistFile(self.names, self.devices, self.network,
+                                   self.monitors)
+        error_type = netlist_file.load_bytes(netlist)
+        if error_type != netlist_file.NO_ERROR:
+            self.report_error(path, None, _("***Error: Could not merge the "
+                                            "file"))
+
+    def connect_deferred(self, path, connection):
+        """Make a connection between devices in different files."""
+        [first_device_name, first_port_name, second_device_name,
+         second_port_name, location] = connection
+        first_signal = self.get_signal_ids(first_device_name, first_port_name)
+        second_signal = self.get_signal_ids(second_device_name,
+                                            second_port_name)
+        if first_signal is None or second_signal is None:
+            self.report_error(path, location, _(
+                "***Semantic Error: Undefined device or port in the "
+                "connection"))
+            return
+        error_type = self.network.make_connection(*first_signal,
+                                                  *second_signal)
+        if error_type == self.network.INPUT_CONNECTED:
+            self.report_error(path, location, _(
+                "***Semantic Error: Attempt to connect an input which is "
+                "already connected"))
+        elif error_type == self.network.INPUT_TO_INPUT:
+            self.report_error(path, location, _(
+                "***Semantic Error: Attempt to connect two inputs"))
+        elif error_type == self.network.OUTPUT_TO_OUTPUT:
+            self.report_error(path, location, _(
+                "***Semantic Error: Attempt to connect two outputs"))
+        elif error_type != self.network.NO_ERROR:
+            self.report_error(path, location, _(
+                "***Semantic Error: Undefined device or port in the "
+                "connection"))
+
+    def monitor_deferred(self, path, monitor):
+        """Make a monitor on a device defined in another file."""
+        device_name, port_name, location = monitor
+        signal = self.get_signal_ids(device_name, port_name)
+        if signal is None:
+            self.report_error(path, location, _(
+                "***Semantic Error: Undefined device or port in the "
+                "monitor"))
+            return
+        error_type = self.monitors.make_monitor(*signal)
+        if error_type == self.monitors.NOT_OUTPUT:
+            self.report_error(path, location, _(
+                "***Semantic Error: Attempt to monitor an input"))
+        elif error_type == self.monitors.MONITOR_PRESENT:
+            self.report_error(path, location, _(
+                "***Semantic Error: Monitor already exists for the "
+                "signal '{terminal_name}'").format(
+                    terminal_name=self.devices.get_signal_name(*signal)))
@@ -0,0 +1,78 @@
+"""Resolve signal names without changing the names table.
+
+Used in the Logic Simulator project to find the device and port IDs of the
+signal names given in user commands, batch scripts and the GUI with one
+dictionary lookup, without adding unknown names to the names table.
+
+Classes
+-------
+SignalIndex - maps signal names to device and port IDs.
+"""
+
+
+class SignalIndex:
+
+    """Map the signal names of a network to their device and port IDs.
+
+    The index holds every device name, mapped to [device ID, None], and
+    every 'device.port' name of the inputs and outputs of the devices,
+    mapped to [device ID, port ID]. It is built from the devices when made,
+    using only name strings already in the names table, so resolving a name
+    never adds to the table. It must be rebuilt with build() whenever
+    devices are added or removed.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    build(self): Builds the index from the devices of the network.
+
+    get_signal_ids(self, signal_name): Returns the device and port IDs of a
+                                       signal name, or None if unknown.
+
+    get_device_id(self, device_name): Returns the device ID of a device
+                                      name, or None if unknown.
+    """
+
+    def __init__(self, names, devices):
+        """Initialise the instances and build the index."""
+        self.names = names
+        self.devices = devices
+        self.signal_dict = {}  # {signal name: (device ID, port ID)}
+        self.build()
+
+    def build(self):
+        """Build the index from the devices of the network."""
+        get_name_string = self.names.get_name_string
+        signal_dict = {}
+        for device in self.devices.devices_list:
+            device_id = device.device_id
+            device_name = get_name_string(device_id)
+            signal_dict[device_name] = (device_id, None)
+            for port_id in list(device.inputs) + list(device.outputs):
+                if port_id is not None:
+                    signal_dict[device_name + '.' +
+                                get_name_string(port_id)] = (device_id,
+                                                             port_id)
+        self.signal_dict = signal_dict
+
+    def get_signal_ids(self, signal_name):
+        """Return [device ID, port ID] of a signal name.
+
+        The port ID is None for a signal name without a port. Return None if
+        the name is not a device or port of the network.
+        """
+        signal = self.signal_dict.get(signal_name)
+        if signal is None:
+            return None
+        return list(signal)
+
+    def get_device_id(self, device_name):
+        """Return the device ID of a device name, or None if unknown."""
+        signal = self.signal_dict.get(device_name)
+        if signal is None or signal[1] is not None:
+            return None
+        return signal[0]
@@ -0,0 +1,213 @@
+"""Run a circuit for every combination of settings of a set of switches.
+
+Used in the Logic Simulator project to collect the monitored signal traces
+of a circuit for many switch settings, running the simulations in a pool of
+worker processes.
+
+Classes
+-------
+SweepRunner - runs a circuit for many switch settings.
+
+Functions
+---------
+load_worker - loads the circuit into a worker process.
+simulate - runs the circuit of a worker process from a cold start.
+run_assignment - runs the circuit in a worker process for one setting.
+"""
+import builtins
+import gettext
+import io
+import itertools
+import random
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from netfile import NetlistFile
+
+# The circuit of this worker process, as [names, devices, network, monitors,
+# signal levels of the device outputs when loaded]
+worker_circuit = None
+
+
+def load_worker(netlist):
+    """Load the circuit in the binary netlist into this worker process."""
+    global worker_circuit
+    if not hasattr(builtins, '_'):  # worker processes may be started afresh
+        gettext.NullTranslations().install()
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    NetlistFile(names, devices, network, monitors).load_bytes(netlist)
+    initial_outputs = [(device, dict(device.outputs))
+                       for device in devices.devices_list]
+    worker_circuit = [names, devices, network, monitors, initial_outputs]
+
+
+def simulate(switch_states, seed, cycles):
+    """Run the circuit of this worker process from a cold start.
+
+    switch_states is a list of (switch name, signal level) and seed, if not
+    None, seeds the random cold start-up of clocks and D-types. The device
+    outputs are restored to their levels when the circuit was loaded, so
+    that the result does not depend on the runs before it, and the circuit
+    is run for cycles simulation cycles. Return the number of cycles
+    completed, which is fewer than cycles if the network oscillates.
+    """
+    names, devices, network, monitors, initial_outputs = worker_circuit
+    for device, outputs in initial_outputs:
+        device.outputs.update(outputs)
+    network.cycle_count = 0
+    for switch_name, switch_state in switch_states:
+        devices.set_switch(names.query(switch_name), switch_state)
+    if seed is not None:
+        random.seed(seed)
+    monitors.reset_monitors()
+    devices.cold_startup()
+    cycles_completed = 0
+    while cycles_completed < cycles and network.execute_network():
+        monitors.record_signals()
+        cycles_completed += 1
+    return cycles_completed
+
+
+def run_assignment(assignment):
+    """Run the circuit of this worker process for one switch setting.
+
+    assignment is [switch_states, seed, cycles], as taken by simulate().
+    Return [number of cycles completed, signal traces as displayed by
+    Monitors.display_signals()].
+    """
+    monitors = worker_circuit[3]
+    cycles_completed = simulate(*assignment)
+    traces = io.StringIO()
+    monitors.display_signals(file=traces)
+    return [cycles_completed, traces.getvalue()]
+
+
+class SweepRunner:
+
+    """Run a circuit for many settings of a set of switches.
+
+    The parsed circuit is sent to each worker process once, as a binary
+    netlist, and each setting of the switches is then run from a cold start
+    in one of the workers. The monitored signal traces of every setting are
+    written to one result file, in the order of the settings.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    switch_ids: list of the IDs of the switches to set.
+    cycles: number of simulation cycles to run for each setting.
+    max_workers: number of worker processes, defaults to the number of
+                 processors. With one worker the settings are run in this
+                 process.
+
+    Public methods
+    --------------
+    get_assignments(self, samples=None, seed=None): Returns every setting of
+                             the switches, or a random sample of them.
+
+    run_assignments(self, assignments, seed=None): Yields the result of
+                                                   running every setting.
+
+    write_results(self, assignments, results, file): Writes the signal
+                             traces of every setting, returns the number of
+                             settings that oscillated.
+
+    sweep(self, file, samples=None, seed=None): Runs the circuit for the
+                             settings and writes the results, returns the
+                             number of settings that oscillated.
+    """
+
+    def __init__(self, names, devices, network, monitors, switch_ids, cycles,
+                 max_workers=None):
+        """Initialise the instances and the sweep parameters."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.switch_ids = list(switch_ids)
+        self.cycles = cycles
+        self.max_workers = max_workers
+
+    def get_assignments(self, samples=None, seed=None):
+        """Return a list of settings of the switches.
+
+        Each setting is a tuple of signal levels, one for each switch. Every
+        setting is returned in binary counting order if samples is None,
+        otherwise samples distinct settings are chosen at random.
+        """
+        switch_count = len(self.switch_ids)
+        if samples is None:
+            return list(itertools.product([self.devices.LOW,
+                                           self.devices.HIGH],
+                                          repeat=switch_count))
+        numbers = random.Random(seed).sample(range(2 ** switch_count),
+                                             min(samples, 2 ** switch_count))
+        return [tuple(self.devices.HIGH if number >> bit & 1
+                      else self.devices.LOW
+                      for bit in reversed(range(switch_count)))
+                for number in numbers]
+
+    def run_assignments(self, assignments, seed=None):
+        """Yield the result of run_assignment for every setting, in order.
+
+        Results are yielded as soon as they are available, so that they can
+        be written while later settings are still running. If seed is given,
+        the cold start-up of setting i is seeded with seed + i, so that the
+        results can be reproduced.
+        """
+        switch_names = [self.names.get_name_string(switch_id)
+                        for switch_id in self.switch_ids]
+        tasks = [[list(zip(switch_names, assignment)),
+                  None if seed is None else seed + i, self.cycles]
+                 for i, assignment in enumerate(assignments)]
+        netlist = NetlistFile(self.names, self.devices, self.network,
+                              self.monitors).get_bytes()
+        if self.max_workers == 1:
+            load_worker(netlist)
+            yield from map(run_assignment, tasks)
+            return
+        # only imported when needed, as in shards.py
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(
+                self.max_workers, initializer=load_worker,
+                initargs=(netlist,)) as pool:
+            yield from pool.map(run_assignment, tasks, chunksize=16)
+
+    def write_results(self, assignments, results, file):
+        """Write the signal traces of every setting to file.
+
+        Each setting starts with a line giving the switch levels, followed
+        by the signal traces, and ends with an empty line. Return the number
+        of settings for which the network oscillated.
+        """
+        oscillation_count = 0
+        switch_names = [self.names.get_name_string(switch_id)
+                        for switch_id in self.switch_ids]
+        for assignment, (cycles_completed, traces) in zip(assignments,
+                                                          results):
+            header = ' '.join('%s=%d' % (switch_name, switch_state)
+                              for switch_name, switch_state
+                              in zip(switch_names, assignment))
+            if cycles_completed < self.cycles:
+                oscillation_count += 1
+                header += ' ' + _('(oscillating after {cycles} cycles)') \
+                    .format(cycles=cycles_completed)
+            file.write('# ' + header + '\n' + traces + '\n')
+        return oscillation_count
+
+    def sweep(self, file, samples=None, seed=None):
+        """Run the circuit for the settings and write the results to file.
+
+        Return the number of settings for which the network oscillated.
+        """
+        assignments = self.get_assignments(samples, seed)
+        results = self.run_assignments(assignments, seed)
+        return self.write_results(assignments, results, file)
@@ -0,0 +1,69 @@
+"""Test the asyncsim module."""
+import asyncio
+
+import pytest
+
+from asyncsim import AsyncSimulator
+
+
+def test_run_yields_between_chunks(parse_file):
+    """Test that other tasks run between chunks, and progress is reported."""
+    simulator = AsyncSimulator(*parse_file('test_files/sr_bistable.txt'),
+                               chunk=4)
+    events = []
+
+    async def count_ticks():
+        while True:
+            events.append('tick')
+            await asyncio.sleep(0)
+
+    async def run_simulation():
+        ticker = asyncio.create_task(count_ticks())
+        await asyncio.sleep(0)
+        completed = await simulator.run(
+            10, progress=lambda done, cycles: events.append(done))
+        await simulator.continue_run(3, chunk=2)
+        ticker.cancel()
+        return completed
+
+    assert asyncio.run(run_simulation()) == 10
+    assert [event for event in events if event != 'tick'] == [4, 8, 10]
+    assert events.index(8) - events.index(4) == 2  # a tick between chunks
+    assert simulator.cycles_completed == 13
+    assert not simulator.oscillating
+    assert [len(signal_list) for signal_list
+            in simulator.monitors.monitors_dictionary.values()] == [13, 13]
+
+
+def test_run_cancelled(parse_file):
+    """Test that a cancelled run keeps the cycles of the finished chunks."""
+    simulator = AsyncSimulator(*parse_file('test_files/sr_bistable.txt'),
+                               chunk=4)
+
+    async def cancel_run():
+        task = asyncio.create_task(simulator.run(1000))
+        for i in range(3):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_run())
+    assert 0 < simulator.cycles_completed < 1000
+    assert simulator.cycles_completed % 4 == 0
+    for signal_list in simulator.monitors.monitors_dictionary.values():
+        assert len(signal_list) == simulator.cycles_completed
+
+
+def test_run_oscillating(tmp_path, parse_file):
+    """Test that a run stops when the network oscillates."""
+    path = tmp_path / 'oscillator.txt'
+    path.write_text('(DEVICE SW is SWITCH 1)\n(DEVICE A is NAND 2)\n'
+                    '(CONNECT SW to A.I1)\n(CONNECT A to A.I2)\n'
+                    '(MONITOR A)\n')
+    simulator = AsyncSimulator(*parse_file(path), chunk=4)
+    progress = []
+    assert asyncio.run(simulator.run(
+        10, progress=lambda done, cycles: progress.append(done))) == 0
+    assert simulator.oscillating
+    assert progress == [0]
@@ -0,0 +1,104 @@
+"""Test the checkpoint module."""
+import random
+
+import pytest
+
+from userint import UserInterface
+from checkpoint import Checkpoint
+
+COUNTER_PATH = 'test_files/4_ripple_counter.txt'
+
+
+@pytest.fixture
+def make_user_interface(make_instances, parse_file):
+    """Return a function making quiet UserInterface instances.
+
+    The function takes checkpoint_path and an optional path. The circuit in
+    the file at path is parsed, if given. Checkpoints are saved to
+    checkpoint_path at every update.
+    """
+    def make(checkpoint_path, path=None):
+        instances = make_instances() if path is None else parse_file(path)
+        checkpoint = Checkpoint(*instances, str(checkpoint_path),
+                                interval=0)
+        return UserInterface(*instances, quiet=True, checkpoint=checkpoint)
+    return make
+
+
+def get_traces(userint):
+    """Return {signal name: signal list} of the monitors."""
+    return {userint.devices.get_signal_name(device_id, output_id):
+            signal_list for (device_id, output_id), signal_list
+            in userint.monitors.monitors_dictionary.items()}
+
+
+def test_resume_matches_uninterrupted_run(tmp_path, make_user_interface):
+    """Test that a resumed run gives the traces of an uninterrupted run."""
+    checkpoint_path = tmp_path / 'run.checkpoint'
+    random.seed(1)
+    userint = make_user_interface(checkpoint_path, COUNTER_PATH)
+    userint.batch_interface('r 150; m Clk; s Set 1; c 100; s Set 0; c 50')
+    assert userint.error_count == 0
+
+    # the last checkpoint was saved 64 cycles into 'c 100'
+    random.seed(2)  # the random state is restored from the checkpoint
+    resumed = make_user_interface(checkpoint_path)
+    run_state = resumed.checkpoint.load()
+    assert run_state == {'cycles_completed': 214, 'cycles_left': 36,
+                         'commands': [' s Set 0', ' c 50'],
+                         'error_count': 0}
+    resumed.resume(run_state)
+    assert resumed.cycles_completed == userint.cycles_completed == 300
+    assert get_traces(resumed) == get_traces(userint)
+    assert resumed.monitors.get_edges(*resumed.names.lookup(['D0', 'Q'])) \
+        == userint.monitors.get_edges(*userint.names.lookup(['D0', 'Q']))
+
+
+def test_resume_interrupted_run(tmp_path, make_user_interface):
+    """Test that an interrupted run is resumed from its last checkpoint."""
+    checkpoint_path = tmp_path / 'run.checkpoint'
+    random.seed(1)
+    userint = make_user_interface(checkpoint_path, COUNTER_PATH)
+    userint.batch_interface('r 100; z D0.Q; c 20')
+
+    random.seed(1)
+    interrupted = make_user_interface(checkpoint_path, COUNTER_PATH)
+    update = interrupted.checkpoint.update
+
+    def interrupt(done, run_state):
+        """Stop the run once the first checkpoint is saved."""
+        update(done, run_state)
+        raise KeyboardInterrupt
+
+    interrupted.checkpoint.update = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.batch_interface('r 100; z D0.Q; c 20')
+
+    resumed = make_user_interface(checkpoint_path)
+    resumed.resume(resumed.checkpoint.load())
+    assert resumed.cycles_completed == 120
+    assert get_traces(resumed) == get_traces(userint)
+
+
+def test_load_invalid_checkpoint(tmp_path, make_user_interface):
+    """Test that damaged or missing checkpoint files are not loaded."""
+    checkpoint_path = tmp_path / 'run.checkpoint'
+    userint = make_user_interface(checkpoint_path, COUNTER_PATH)
+    userint.batch_interface('r 100')
+    data = checkpoint_path.read_bytes()
+    for damaged in [data[:-1], data + b'\x00', b'LOGSIMNL' + data[8:],
+                    data[:30]]:
+        checkpoint_path.write_bytes(damaged)
+        assert make_user_interface(
+            tmp_path / 'new').checkpoint.load(str(checkpoint_path)) is None
+    assert make_user_interface(checkpoint_path).checkpoint.load(
+        str(tmp_path / 'missing')) is None
+
+
+def test_save_failure(tmp_path, make_user_interface):
+    """Test that a checkpoint which cannot be written is an error."""
+    userint = make_user_interface(tmp_path / 'missing' / 'run.checkpoint',
+                                  COUNTER_PATH)
+    userint.batch_interface('r 100')
+    assert userint.error_count == 1
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,55 @@
+"""Test the coldstart module."""
+import io
+
+import pytest
+
+from coldstart import ColdStartAnalyser, get_high_table
+
+
+@pytest.fixture
+def definition_path(tmp_path):
+    """Return the path of a circuit with a clock and a fixed signal."""
+    path = tmp_path / 'circuit.txt'
+    path.write_text('(DEVICE SW is SWITCH 1)\n(DEVICE CLK is CLOCK 2)\n'
+                    '(DEVICE G is AND 2)\n(DEVICE N is NOT)\n'
+                    '(CONNECT SW to G.I1)\n(CONNECT CLK to G.I2)\n'
+                    '(CONNECT SW to N.I1)\n(MONITOR G N)\n')
+    return str(path)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_analyse(definition_path, max_workers, parse_file):
+    """Test that seed-dependent cycles are found."""
+    analyser = ColdStartAnalyser(*parse_file(definition_path), 6,
+                                 max_workers)
+    output = io.StringIO()
+    assert analyser.analyse(output, 40) == 0
+    assert analyser.seed_count == 40
+    assert analyser.run_counts == [40] * 6
+
+    # a clock with half period 2 starts at one of four points in its cycle
+    assert analyser.get_profile('G') == '??????'
+    assert analyser.get_signal_statistics('G') == [0, 6, 0, 6, 4]
+    assert analyser.get_profile('N') == '______'
+    assert analyser.get_signal_statistics('N') == [6, 0, None, 0, 1]
+    assert 'Cold start-up analysis: 40 seeds, 6 cycles' in output.getvalue()
+    assert 'N     : ______\n' in output.getvalue()
+
+
+def test_analyse_oscillating(tmp_path, parse_file):
+    """Test that cycles not reached by any run are shown as blank."""
+    path = tmp_path / 'oscillator.txt'
+    path.write_text('(DEVICE A is NOT)\n(CONNECT A to A.I1)\n(MONITOR A)\n')
+    analyser = ColdStartAnalyser(*parse_file(path), 3, 1)
+    assert analyser.analyse(io.StringIO(), 5) == 5
+    assert analyser.oscillating_seeds == [0, 1, 2, 3, 4]
+    assert analyser.get_profile('A') == '   '
+
+
+def test_get_high_table(make_instances):
+    """Test that only HIGH signals are counted."""
+    devices = make_instances()[1]
+    high_table = get_high_table(devices)
+    assert bytes([devices.HIGH, devices.LOW, devices.BLANK, devices.RISING,
+                  devices.FALLING]).translate(high_table) == b'\x01' + \
+        bytes(4)
@@ -115,6 +115,37 @@ def test_make_device_gives_errors(new_devices, function_args, error):
     assert left_expression == right_expression
 
 
+def test_make_devices(new_devices):
+    """Test if make_devices makes devices like make_device."""
+    names = new_devices.names
+    [N1, N2, N3, D1, D2, SW1, I1, I2,
+     I3] = names.lookup(["N1", "N2", "N3", "D1", "D2", "Sw1", "I1", "I2",
+                         "I3"])
+
+    assert new_devices.make_devices([N1, N2, N3], new_devices.NAND, 3) == \
+        new_devices.NO_ERROR
+    assert new_devices.make_devices([D1, D2], new_devices.D_TYPE) == \
+        new_devices.NO_ERROR
+    assert new_devices.find_devices() == [N1, N2, N3, D1, D2]
+    for device_id in [N1, N2, N3]:
+        device = new_devices.get_device(device_id)
+        assert device.inputs == {I1: None, I2: None, I3: None}
+        assert device.outputs == {None: new_devices.LOW}
+    assert new_devices.get_device(N1).inputs is not \
+        new_devices.get_device(N2).inputs
+    assert new_devices.get_device(D2).dtype_memory in [new_devices.LOW,
+                                                       new_devices.HIGH]
+
+    # No devices are made if any of them cannot be
+    assert new_devices.make_devices([SW1, N1], new_devices.SWITCH, 0) == \
+        new_devices.DEVICE_PRESENT
+    assert new_devices.make_devices([SW1, SW1], new_devices.SWITCH, 0) == \
+        new_devices.DEVICE_PRESENT
+    assert new_devices.make_devices([SW1], new_devices.SWITCH, 2) == \
+        new_devices.INVALID_QUALIFIER
+    assert new_devices.get_device(SW1) is None
+
+
 def test_get_signal_name(devices_with_items):
     """Test if get_signal_name returns the correct signal name."""
     devices = devices_with_items
@@ -134,6 +165,11 @@ def test_get_signal_ids(devices_with_items):
     assert devices.get_signal_ids("And1.I1") == [AND1, I1]
     assert devices.get_signal_ids("And1") == [AND1, None]
 
+    # unknown names are not added to the names table
+    name_count = len(names.name_list)
+    assert devices.get_signal_ids("And2.Out9") == [None, None]
+    assert len(names.name_list) == name_count
+
 
 def test_set_switch(new_devices):
     """Test if set_switch changes the switch state correctly."""
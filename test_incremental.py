@@ -0,0 +1,168 @@
+"""Test the incremental module."""
+import pytest
+
+from scanner import Scanner
+from parse import Parser
+from netcache import NetlistCache
+from incremental import IncrementalParser
+
+DEFINITION = ('(DEVICE sw1 sw2 are SWITCH 0)\n'
+              '(DEVICE g1 is NAND 2)\n'
+              '(CONNECT sw1 to g1.I1)\n'
+              '(CONNECT sw2 to g1.I2)\n'
+              '(MONITOR g1 sw1)\n')
+
+
+@pytest.fixture
+def parsed_network(tmp_path, make_instances):
+    """Return the path, instances and statements of a parsed network."""
+    path = tmp_path / 'circuit.txt'
+    path.write_text(DEFINITION)
+    [names, devices, network, monitors] = make_instances()
+    scanner = Scanner(str(path), names)
+    parser = Parser(names, devices, network, monitors, scanner,
+                    record_statements=True)
+    assert parser.parse_network()
+    assert len(parser.statements) == 5
+    for _ in range(3):
+        assert network.execute_network()
+        monitors.record_signals()
+    return [path, names, devices, network, monitors, parser.statements]
+
+
+def test_changed_connection_reparsed(parsed_network):
+    """Test that an edited connection is applied to the network."""
+    [path, names, devices, network, monitors, statements] = parsed_network
+    path.write_text(DEFINITION.replace('(CONNECT sw2 to g1.I2)',
+                                       '(CONNECT sw1 to g1.I2)'))
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors, statements)
+    assert incremental_parser.reparse(str(path), 3)
+
+    [SW1, G1, I2] = names.lookup(['sw1', 'g1', 'I2'])
+    assert network.get_connected_output(G1, I2) == (SW1, None)
+    assert len(monitors.monitors_dictionary[(G1, None)]) == 3
+    assert len(incremental_parser.statements) == 5
+
+
+def test_changed_device_reconnected(parsed_network):
+    """Test that the connections of a redefined device are made again."""
+    [path, names, devices, network, monitors, statements] = parsed_network
+    path.write_text(DEFINITION.replace('SWITCH 0', 'SWITCH 1') +
+                    '(MONITOR sw2)\n')
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors, statements)
+    assert incremental_parser.reparse(str(path), 3)
+
+    [SW1, SW2, G1, I1] = names.lookup(['sw1', 'sw2', 'g1', 'I1'])
+    assert devices.get_device(SW1).switch_state == devices.HIGH
+    assert network.get_connected_output(G1, I1) == (SW1, None)
+    assert network.check_network()
+    assert len(monitors.monitors_dictionary[(SW2, None)]) == 3
+
+
+def test_invalid_edit_restores_network(parsed_network):
+    """Test that the network is unchanged when the edited file has errors."""
+    [path, names, devices, network, monitors, statements] = parsed_network
+    [SW1, SW2, G1, I2] = names.lookup(['sw1', 'sw2', 'g1', 'I2'])
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors, statements)
+
+    for definition in [DEFINITION.replace('sw2 to g1.I2', 'sw2 to g2.I2'),
+                       DEFINITION.replace('(CONNECT sw2 to g1.I2)\n', ''),
+                       DEFINITION.replace('(MONITOR g1 sw1)', '(MONITOR g1')]:
+        path.write_text(definition)
+        assert not incremental_parser.reparse(str(path), 3)
+        assert network.get_connected_output(G1, I2) == (SW2, None)
+        assert len(devices.devices_list) == 3
+        assert sorted(monitors.monitors_dictionary) == \
+            sorted([(G1, None), (SW1, None)])
+        assert incremental_parser.statements == statements
+
+
+CLOCK_DEFINITION = ('(DEVICE clk is CLOCK 3)\n'
+                    '(DEVICE d is DTYPE)\n'
+                    '(DEVICE sw is SWITCH 0)\n'
+                    '(CONNECT clk to d.CLK)\n'
+                    '(CONNECT sw to d.SET)\n'
+                    '(CONNECT sw to d.CLEAR)\n'
+                    '(CONNECT sw to d.DATA)\n'
+                    '(MONITOR clk d.Q)\n')
+
+
+def get_state(devices, monitors):
+    """Return the state of every device and the trace of every monitor."""
+    return [sorted((device.device_id, dict(device.outputs),
+                    device.clock_counter, device.dtype_memory)
+                   for device in devices.devices_list),
+            dict(monitors.monitors_dictionary)]
+
+
+def test_first_reload_incremental(tmp_path, make_instances):
+    """Test that a file opened as in the GUI is reparsed incrementally."""
+    path = tmp_path / 'circuit.txt'
+    path.write_text(CLOCK_DEFINITION)
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    assert cache.parse_network(str(path), *make_instances())[0]
+
+    # the GUI loads the file from the cache, keeping its text, and records
+    # the statements from the text when the file is first reloaded
+    names, devices, network, monitors = make_instances()
+    assert cache.parse_network(str(path), names, devices, network,
+                               monitors) == [True, None]
+    for _ in range(5):
+        assert network.execute_network()
+        monitors.record_signals()
+    [device_states, traces] = get_state(devices, monitors)
+
+    # a new clock does a cold start-up, which must not change the others
+    path.write_text(CLOCK_DEFINITION + '(DEVICE clk2 is CLOCK 2)\n')
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors)
+    assert not incremental_parser.reparse(str(path), 5)
+    assert incremental_parser.record_statements(str(path), CLOCK_DEFINITION)
+    assert len(incremental_parser.statements) == 8
+    assert get_state(devices, monitors) == [device_states, traces]
+    assert incremental_parser.reparse(str(path), 5)
+    assert len(incremental_parser.statements) == 9
+    [new_device_states, new_traces] = get_state(devices, monitors)
+    assert [device_state for device_state in new_device_states
+            if device_state[0] != names.query('clk2')] == device_states
+    assert new_traces == traces
+
+
+def test_invalid_edit_restores_state(tmp_path, make_instances):
+    """Test that undone devices and monitors keep their state and traces."""
+    path = tmp_path / 'circuit.txt'
+    path.write_text(CLOCK_DEFINITION)
+    names, devices, network, monitors = make_instances()
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(str(path), names), record_statements=True)
+    assert parser.parse_network()
+    for _ in range(5):
+        assert network.execute_network()
+        monitors.record_signals()
+    state = get_state(devices, monitors)
+
+    # the clock, its connection and its monitor are undone, then restored
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors, parser.statements)
+    path.write_text(CLOCK_DEFINITION.replace('CLOCK 3', 'CLOCK 4') +
+                    '(CONNECT sw to e.I1)\n')
+    for _ in range(5):
+        assert not incremental_parser.reparse(str(path), 5)
+        assert get_state(devices, monitors) == state
+
+
+def test_unchanged_monitor_keeps_trace(parsed_network):
+    """Test that re-parsed monitors of unchanged devices keep their traces."""
+    [path, names, devices, network, monitors, statements] = parsed_network
+    [SW1, G1] = names.lookup(['sw1', 'g1'])
+
+    # the monitor statement is re-parsed because g1 is redefined
+    path.write_text(DEFINITION.replace('NAND 2', 'AND 2'))
+    incremental_parser = IncrementalParser(names, devices, network,
+                                           monitors, statements)
+    assert incremental_parser.reparse(str(path), 3)
+    assert monitors.monitors_dictionary[(SW1, None)] == [devices.LOW] * 3
+    assert monitors.monitors_dictionary[(G1, None)] == [devices.BLANK] * 3
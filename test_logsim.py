@@ -0,0 +1,162 @@
+"""Test the command line user interface and batch mode of logsim."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Time allowed for importing logsim, which is most of the start-up time of
+# the command line user interface
+IMPORT_TIME_BUDGET = 0.5  # seconds
+GUI_MODULES = ['wx', 'OpenGL', 'PIL', 'gui']
+
+
+def run_python(code, tmp_path, stdin=''):
+    """Run code in a new interpreter and return its standard output."""
+    env = dict(os.environ, LOGSIM_CACHE_DIR=str(tmp_path / 'cache'))
+    result = subprocess.run([sys.executable, '-c', code], input=stdin,
+                            capture_output=True, text=True, env=env,
+                            check=True)
+    return result.stdout
+
+
+def test_import_skips_gui_modules(tmp_path):
+    """Test that logsim is imported quickly, without the GUI modules."""
+    output = run_python(
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import logsim\n'
+        'print(time.perf_counter() - start)\n'
+        'print(sorted(set(%r).intersection(sys.modules)))\n' % GUI_MODULES,
+        tmp_path)
+    import_time, gui_modules = output.splitlines()
+    assert float(import_time) < IMPORT_TIME_BUDGET
+    assert gui_modules == '[]'
+
+
+def test_command_line_runs_without_gui_modules(tmp_path):
+    """Test that a circuit is run without importing the GUI modules."""
+    output = run_python(
+        'import gettext, sys\n'
+        'gettext.NullTranslations().install()\n'
+        'import logsim\n'
+        'logsim.main(["-c", "test_files/sr_bistable.txt"])\n'
+        'print(sorted(set(%r).intersection(sys.modules)))\n' % GUI_MODULES,
+        tmp_path, stdin='r 10\nq\n')
+    assert 'Logic Simulator' in output
+    assert output.endswith(' []\n')  # after the prompt for the next command
+
+
+def run_main(arg_list):
+    """Run logsim.main and return its exit status."""
+    import logsim
+    with pytest.raises(SystemExit) as exit_info:
+        logsim.main(arg_list)
+    return exit_info.value.code
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the network cache of the tests in a temporary directory."""
+    monkeypatch.setenv('LOGSIM_CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def test_batch_commands(tmp_path, capsys, cache_dir):
+    """Test that commands run without prompts and write the traces."""
+    output_path = tmp_path / 'traces.txt'
+    assert run_main(['-e', 'r 3; m SW1; s SW1 1; c 2',
+                     '-o', str(output_path),
+                     'test_files/sr_bistable.txt']) == 0
+    assert output_path.read_text() == ('G1 : ---__\n'
+                                       'G2 : -----\n'
+                                       'SW1:    --\n')
+    assert capsys.readouterr().out == ''
+
+    script_path = tmp_path / 'script.txt'
+    script_path.write_text('# start\nr 2\n\nz G2\nq\nr 1\n')
+    assert run_main(['--batch', str(script_path),
+                     'test_files/sr_bistable.txt']) == 0
+    assert capsys.readouterr().out == 'G1: --\n'
+
+    # help does not mix with the traces on standard output
+    assert run_main(['-e', 'h; r 1', 'test_files/sr_bistable.txt']) == 0
+    output = capsys.readouterr()
+    assert output.out == 'G1: -\nG2: -\n'
+    assert output.err.startswith('User commands:')
+
+
+def test_batch_exit_status(tmp_path, capsys, cache_dir):
+    """Test the exit status for errors and oscillating networks."""
+    assert run_main(['-e', 'r 2; s X 1', 'test_files/sr_bistable.txt']) == 1
+    assert 's X 1: Error! Unknown name.' in capsys.readouterr().err
+    assert run_main(['-e', 'r 2', str(tmp_path / 'missing.txt')]) == 1
+
+    definition_path = tmp_path / 'oscillator.txt'
+    definition_path.write_text('(DEVICE A is NOT)\n(CONNECT A to A.I1)\n'
+                               '(MONITOR A)\n')
+    assert run_main(['-e', 'r 2', str(definition_path)]) == 2
+    assert 'Network oscillating' in capsys.readouterr().err
+
+
+def test_sweep(tmp_path, capsys, cache_dir):
+    """Test that a switch sweep writes the traces of every setting."""
+    assert run_main(['--sweep', 'SW2', '--cycles', '2',
+                     'test_files/sr_bistable.txt']) == 0
+    assert capsys.readouterr().out == ('# SW2=0\nG1: --\nG2: --\n\n'
+                                       '# SW2=1\nG1: --\nG2: __\n\n')
+    assert run_main(['--sweep', 'G1', 'test_files/sr_bistable.txt']) == 1
+    assert "'G1' is not a switch" in capsys.readouterr().err
+
+
+def test_cold_start(capsys, cache_dir):
+    """Test that the cold start-up analysis reports every monitor."""
+    assert run_main(['--cold-start', '3', '--cycles', '2',
+                     'test_files/sr_bistable.txt']) == 0
+    output = capsys.readouterr().out
+    assert 'Cold start-up analysis: 3 seeds, 2 cycles' in output
+    assert output.endswith('G1    : --\nG2    : --\n')
+
+
+def test_batch_output_formats(tmp_path, capsys, cache_dir):
+    """Test that the traces are written in the chosen format."""
+    assert run_main(['-e', 'r 2', '--format', 'csv',
+                     'test_files/sr_bistable.txt']) == 0
+    assert capsys.readouterr().out == 'G1,G2\n1,1\n1,1\n'
+
+    output_path = tmp_path / 'traces.npy'
+    assert run_main(['-e', 'r 2', '--format', 'npy', '-o', str(output_path),
+                     'test_files/sr_bistable.txt']) == 0
+    assert output_path.read_bytes().endswith(bytes([1, 1, 1, 1]))
+    assert run_main(['-e', 'r 2', '--format', 'xml',
+                     'test_files/sr_bistable.txt']) == 1
+
+
+def test_batch_progress(capsys, cache_dir):
+    """Test that a summary line is printed for each run with --progress."""
+    assert run_main(['-e', 'r 2; c 3', '--progress',
+                     'test_files/sr_bistable.txt']) == 0
+    summaries = [line for line in capsys.readouterr().err.splitlines()
+                 if line.startswith('summary ')]
+    assert [summary.split()[1] for summary in summaries] == ['cycles=2',
+                                                             'cycles=3']
+
+
+def test_batch_resume(tmp_path, capsys, cache_dir):
+    """Test that a batch run resumed from a checkpoint gives its traces."""
+    checkpoint_path = str(tmp_path / 'run.checkpoint')
+    assert run_main(['-e', 'r 100; c 100', '--format', 'csv',
+                     '--checkpoint', checkpoint_path,
+                     '--checkpoint-interval', '0',
+                     'test_files/4_ripple_counter.txt']) == 0
+    traces = capsys.readouterr().out
+    assert run_main(['--resume', checkpoint_path, '--format', 'csv']) == 0
+    assert capsys.readouterr().out == traces
+    assert run_main(['--resume', str(tmp_path / 'missing')]) == 1
+    assert 'Could not load the checkpoint' in capsys.readouterr().err
+
+    # checkpoints are only saved in batch mode
+    for options in [['-c', 'test_files/4_ripple_counter.txt'],
+                    ['--sweep', 'Set', 'test_files/4_ripple_counter.txt']]:
+        assert run_main(['--checkpoint', checkpoint_path] + options) == 1
+        assert '--checkpoint is only used in batch mode' in \
+            capsys.readouterr().err
@@ -1,4 +1,6 @@
 """Test the monitors module."""
+from array import array
+
 import pytest
 
 from names import Names
@@ -197,3 +199,283 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_record_signals_flushes_in_chunks():
+    """Test if signals recorded in chunks match the per-cycle signal levels."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network, chunk_size=3)
+
+    [SW1_ID, SW2_ID] = names.lookup(["Sw1", "Sw2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    monitors.make_monitor(SW1_ID, None)
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+    BLANK = devices.BLANK
+
+    for cycle in range(10):
+        devices.set_switch(SW1_ID, cycle % 2)
+        network.execute_network()
+        monitors.record_signals()
+        if cycle == 5:
+            # A monitor made mid-run is padded with BLANK signals
+            monitors.make_monitor(SW2_ID, None, cycles_completed=6)
+
+    # The last cycle is still held in the signal block
+    assert monitors.block_cycles == 1
+    assert monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, HIGH] * 5,
+        (SW2_ID, None): [BLANK] * 6 + [HIGH] * 4}
+    assert monitors.block_cycles == 0
+
+
+@pytest.fixture
+def clocked_monitors():
+    """Return a Monitors instance recording a switch with a known pattern."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network, chunk_size=5)
+
+    [SW1_ID] = names.lookup(["Sw1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    monitors.make_monitor(SW1_ID, None)
+
+    # HIGH for 3 cycles, LOW for 5 cycles, repeated 4 times
+    pattern = ([1] * 3 + [0] * 5) * 4
+    for level in pattern:
+        devices.set_switch(SW1_ID, level)
+        network.execute_network()
+        monitors.record_signals()
+    return monitors
+
+
+def test_get_edges(clocked_monitors):
+    """Test if the edge index holds every transition of the trace."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    [SW1_ID] = monitors.names.lookup(["Sw1"])
+
+    assert list(monitors.get_edges(SW1_ID, None, devices.RISING)) == [8, 16,
+                                                                      24]
+    assert list(monitors.get_edges(SW1_ID, None, devices.FALLING)) == [3, 11,
+                                                                       19, 27]
+    assert list(monitors.get_edges(SW1_ID, None)) == [3, 8, 11, 16, 19, 24,
+                                                      27]
+    assert monitors.get_edges(SW1_ID, devices.Q_ID) is None
+
+
+def test_next_and_previous_edge(clocked_monitors):
+    """Test if the next and previous edges are found around a cycle."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    [SW1_ID] = monitors.names.lookup(["Sw1"])
+
+    assert monitors.next_edge(SW1_ID, None, 8) == 11
+    assert monitors.next_edge(SW1_ID, None, 8, devices.RISING) == 16
+    assert monitors.next_edge(SW1_ID, None, 27) is None
+    assert monitors.previous_edge(SW1_ID, None, 8) == 3
+    assert monitors.previous_edge(SW1_ID, None, 20, devices.FALLING) == 19
+    assert monitors.previous_edge(SW1_ID, None, 3) is None
+
+
+def test_count_edges(clocked_monitors):
+    """Test if edges are counted within a cycle range."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    [SW1_ID] = monitors.names.lookup(["Sw1"])
+
+    assert monitors.count_edges(SW1_ID, None, 0, 32) == 7
+    assert monitors.count_edges(SW1_ID, None, 8, 16) == 2
+    assert monitors.count_edges(SW1_ID, None, 8, 17, devices.RISING) == 2
+
+
+def test_period_and_duty_cycle(clocked_monitors):
+    """Test if the period and duty cycle are estimated from the edges."""
+    monitors = clocked_monitors
+    [SW1_ID] = monitors.names.lookup(["Sw1"])
+
+    assert monitors.get_period(SW1_ID, None) == 8
+    assert monitors.get_duty_cycle(SW1_ID, None) == 3 / 8
+    assert monitors.get_period(SW1_ID, None, 10, 20) is None
+
+    monitors.reset_monitors()
+    assert list(monitors.get_edges(SW1_ID, None)) == []
+
+
+def test_get_signal_summary(clocked_monitors):
+    """Test if zoomed-out columns summarise the levels of their cycles."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    [SW1_ID] = monitors.names.lookup(["Sw1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+    MIXED = monitors.MIXED
+
+    # One column per cycle reproduces the trace
+    assert list(monitors.get_signal_summary(SW1_ID, None, 0, 32, 32)) == \
+        monitors.monitors_dictionary[(SW1_ID, None)]
+    # Each column covers a whole number of aligned blocks
+    assert list(monitors.get_signal_summary(SW1_ID, None, 0, 32, 8)) == \
+        [MIXED, LOW] * 4
+    assert list(monitors.get_signal_summary(SW1_ID, None, 0, 32, 1)) == \
+        [MIXED]
+    assert list(monitors.get_signal_summary(SW1_ID, None, 4, 8, 1)) == [LOW]
+    # Cycles beyond the trace are blank
+    assert list(monitors.get_signal_summary(SW1_ID, None, 30, 34, 4)) == \
+        [LOW, LOW, devices.BLANK, devices.BLANK]
+    assert monitors.get_signal_summary(SW1_ID, devices.Q_ID, 0, 8, 8) is None
+
+
+def test_signal_summary_levels(clocked_monitors):
+    """Test if every summary level agrees with the recorded trace."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    [SW1_ID, SW2_ID] = monitors.names.lookup(["Sw1", "Sw2"])
+
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    monitors.make_monitor(SW2_ID, None, cycles_completed=32)
+    for _ in range(13):
+        monitors.network.execute_network()
+        monitors.record_signals()
+
+    for monitor in [(SW1_ID, None), (SW2_ID, None)]:
+        signal_list = monitors.monitors_dictionary[monitor]
+        summary = monitors.summaries_dictionary[monitor]
+        for level_number, levels in enumerate(summary):
+            block_cycles = 2 ** level_number
+            expected = []
+            for block_start in range(0, len(signal_list), block_cycles):
+                block = set(signal_list[block_start:
+                                        block_start + block_cycles])
+                expected.append(block.pop() if len(block) == 1
+                                else monitors.MIXED)
+            assert list(levels) == expected
+        assert len(summary[-1]) == 1
+
+
+def test_display_signals_window_and_width(capsys, clocked_monitors):
+    """Test if a window of the traces is displayed and wrapped to a width."""
+    monitors = clocked_monitors
+    devices = monitors.devices
+    network = monitors.network
+    [SW2_ID] = monitors.names.lookup(["Sw2"])
+
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    monitors.make_monitor(SW2_ID, None, cycles_completed=32)
+    for _ in range(2):
+        network.execute_network()
+        monitors.record_signals()
+
+    monitors.display_signals(start=6, end=13)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: __---__\n"
+                   "Sw2:        \n")
+
+    monitors.display_signals(start=28, width=3)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: ___\n"
+                   "Sw2:    \n"
+                   "\n"
+                   "Sw1: ___\n"
+                   "Sw2:  --\n")
+
+
+def test_set_trigger(new_monitors):
+    """Test if only the windows around trigger cycles are recorded."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    assert new_monitors.set_trigger(
+        [(SW1_ID, None, devices.RISING), (SW2_ID, None, HIGH)],
+        pre_trigger_cycles=2,
+        post_trigger_cycles=1) == new_monitors.NO_ERROR
+
+    sw1_pattern = [0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 1, 1]
+    sw2_pattern = [0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+    for sw1_level, sw2_level in zip(sw1_pattern, sw2_pattern):
+        devices.set_switch(SW1_ID, sw1_level)
+        devices.set_switch(SW2_ID, sw2_level)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    # Sw1 rises while Sw2 is high at cycles 5 and 10 only
+    assert new_monitors.trigger_cycles == [5, 10]
+    assert new_monitors.capture_windows == [[3, 7], [8, 12]]
+    # the cycles outside the windows are BLANK
+    BLANK = devices.BLANK
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == \
+        [BLANK] * 3 + [LOW, LOW, HIGH, LOW] + [BLANK] + [LOW, LOW, HIGH, HIGH]
+    assert new_monitors.monitors_dictionary[(SW2_ID, None)] == \
+        [BLANK] * 3 + [HIGH] * 4 + [BLANK] + [HIGH] * 4
+
+    new_monitors.clear_trigger()
+    network.execute_network()
+    new_monitors.record_signals()
+    assert len(new_monitors.monitors_dictionary[(OR1_ID, None)]) == 13
+
+
+def test_trigger_edges_and_summaries(new_monitors):
+    """Test if edges and summaries of triggered traces are in cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID] = names.lookup(["Sw1", "Sw2"])
+    BLANK = devices.BLANK
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    assert new_monitors.set_trigger([(SW2_ID, None, devices.RISING)],
+                                    post_trigger_cycles=3) == \
+        new_monitors.NO_ERROR
+    devices.set_switch(SW1_ID, 0)
+    for cycle in range(40):
+        devices.set_switch(SW2_ID, int(cycle % 20 == 10))
+        if cycle == 12:
+            devices.set_switch(SW1_ID, 1)
+        if cycle == 25:
+            # a monitor made between windows starts at the current cycle
+            assert new_monitors.remove_monitor(SW2_ID, None)
+            assert new_monitors.make_monitor(SW2_ID, None, cycle) == \
+                new_monitors.NO_ERROR
+        network.execute_network()
+        new_monitors.record_signals()
+    new_monitors.clear_trigger()
+
+    # the windows are cycles 10 to 13 and 30 to 33
+    assert new_monitors.capture_windows == [[10, 14], [30, 34]]
+    assert new_monitors.get_edges(SW1_ID, None) == array('l', [12])
+    assert new_monitors.next_edge(SW2_ID, None, 0) == 31
+    assert len(new_monitors.monitors_dictionary[(SW2_ID, None)]) == 40
+    assert new_monitors.get_signal_summary(SW1_ID, None, 8, 16, 4) == \
+        bytearray([BLANK, LOW, HIGH, BLANK])
+    assert new_monitors.get_signal_summary(SW1_ID, None, 0, 40, 5) == \
+        bytearray([BLANK, new_monitors.MIXED, BLANK, new_monitors.MIXED,
+                   new_monitors.MIXED])
+    assert new_monitors.get_signal_summary(SW2_ID, None, 28, 36, 8) == \
+        bytearray([BLANK, BLANK, HIGH, LOW, LOW, LOW, BLANK, BLANK])
+
+
+def test_set_trigger_gives_errors(new_monitors):
+    """Test if set_trigger returns the correct errors."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    [SW1_ID, OR1_ID, I1] = names.lookup(["Sw1", "Or1", "I1"])
+
+    assert new_monitors.set_trigger([(OR1_ID, I1, devices.HIGH)]) == \
+        new_monitors.NOT_OUTPUT
+    assert new_monitors.set_trigger([(I1, None, devices.HIGH)]) == \
+        new_monitors.network.DEVICE_ABSENT
+    assert new_monitors.set_trigger([(SW1_ID, None, devices.BLANK)]) == \
+        new_monitors.INVALID_TRIGGER
+    assert new_monitors.set_trigger([]) == new_monitors.INVALID_TRIGGER
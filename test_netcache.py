@@ -0,0 +1,103 @@
+"""Test the netcache module."""
+import struct
+
+import pytest
+
+from netcache import NetlistCache
+from netfile import NetlistFile
+
+
+def device_state(devices):
+    """Return the properties of every device which survive a cold start."""
+    return [(device.device_id, device.device_kind, device.inputs,
+             sorted(device.outputs), device.clock_half_period,
+             device.switch_state, device.RC_settling_time)
+            for device in devices.devices_list]
+
+
+@pytest.fixture
+def definition_path(tmp_path):
+    """Return the path of a copy of a valid definition file."""
+    path = tmp_path / 'counter.txt'
+    with open('test_files/4_ripple_counter.txt') as definition_file:
+        path.write_text(definition_file.read())
+    return str(path)
+
+
+def test_cache_reuses_parsed_network(tmp_path, definition_path,
+                                     make_instances):
+    """Test that a parsed network is restored from the cache."""
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    names, devices, network, monitors = make_instances()
+    [success, parser] = cache.parse_network(definition_path, names, devices,
+                                            network, monitors)
+    assert success and parser is not None
+    digest = cache.file_digest(definition_path)
+
+    [new_names, new_devices, new_network, new_monitors] = make_instances()
+    [success, parser] = cache.parse_network(
+        definition_path, new_names, new_devices, new_network, new_monitors)
+    assert success and parser is None
+    assert new_names.name_list == names.name_list
+    assert new_names.query('CLK') == names.query('CLK')
+    assert device_state(new_devices) == device_state(devices)
+    assert new_monitors.monitors_dictionary == monitors.monitors_dictionary
+    assert new_network.check_network()
+    assert cache.file_digest(definition_path) == digest
+
+
+def test_cache_invalidated_by_changes(tmp_path, definition_path,
+                                      make_instances):
+    """Test that a changed or corrupt cache entry is not used."""
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    cache.parse_network(definition_path, *make_instances())
+    old_digest = cache.file_digest(definition_path)
+
+    with open(definition_path, 'a') as definition_file:
+        definition_file.write('\n// changed\n')
+    assert cache.file_digest(definition_path) != old_digest
+    [success, parser] = cache.parse_network(definition_path, *make_instances())
+    assert success and parser is not None
+
+    with open(cache.cache_path(old_digest), 'wb') as cache_file:
+        cache_file.write(b'not a cache file')
+    names, devices, network, monitors = make_instances()
+    assert not cache.load(old_digest, names, devices, network, monitors)
+    assert devices.devices_list == []
+    assert cache.file_digest(str(tmp_path / 'missing.txt')) is None
+
+
+def test_netlist_files_loaded_directly(tmp_path, definition_path,
+                                       make_instances):
+    """Test that binary netlist files are loaded without parsing."""
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    names, devices, network, monitors = make_instances()
+    cache.parse_network(definition_path, names, devices, network, monitors)
+    netlist_path = str(tmp_path / 'counter.netlist')
+    NetlistFile(names, devices, network, monitors).save(netlist_path)
+
+    [new_names, new_devices, new_network, new_monitors] = make_instances()
+    assert cache.parse_network(netlist_path, new_names, new_devices,
+                               new_network, new_monitors) == [True, None]
+    assert device_state(new_devices) == device_state(devices)
+
+
+def test_failed_cache_load_parses_file(tmp_path, definition_path,
+                                       make_instances):
+    """Test that a cache file failing part way is replaced by a parse."""
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    names, devices, network, monitors = make_instances()
+    cache.parse_network(definition_path, names, devices, network, monitors)
+    digest = cache.file_digest(definition_path)
+    data = open(cache.cache_path(digest), 'rb').read()
+    # the last monitor is on an input, so loading fails at the monitors
+    with open(cache.cache_path(digest), 'wb') as cache_file:
+        cache_file.write(data[:-8] + struct.pack('<q', names.query('SET')))
+
+    [new_names, new_devices, new_network, new_monitors] = make_instances()
+    [success, parser] = cache.parse_network(
+        definition_path, new_names, new_devices, new_network, new_monitors)
+    assert success and parser is not None
+    assert device_state(new_devices) == device_state(devices)
+    assert new_monitors.monitors_dictionary == monitors.monitors_dictionary
+    assert open(cache.cache_path(digest), 'rb').read() == data
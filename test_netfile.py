@@ -0,0 +1,87 @@
+"""Test the netfile module."""
+import struct
+
+import pytest
+
+from netfile import NetlistFile, HEADER, MAGIC
+
+
+def signal_names(netlist_file):
+    """Return the devices, connections and monitors of the network by name."""
+    names = netlist_file.names
+    devices = netlist_file.devices
+    device_list = []
+    for device in devices.devices_list:
+        connections = sorted(
+            (devices.get_signal_name(device.device_id, input_id),
+             devices.get_signal_name(*connected_output))
+            for input_id, connected_output in device.inputs.items())
+        device_list.append((names.get_name_string(device.device_id),
+                            names.get_name_string(device.device_kind),
+                            netlist_file.get_qualifier(device), connections))
+    monitor_list = [devices.get_signal_name(device_id, output_id)
+                    for device_id, output_id
+                    in netlist_file.monitors.monitors_dictionary]
+    return [sorted(device_list), monitor_list]
+
+
+@pytest.fixture
+def parsed_netlist_file(parse_file):
+    """Return a NetlistFile instance for a parsed network."""
+    return NetlistFile(*parse_file('test_files/test_other_devices.txt'))
+
+
+def test_save_and_load(tmp_path, parsed_netlist_file, make_instances):
+    """Test that a saved network loads with the names mapped to new IDs."""
+    path = str(tmp_path / 'circuit.netlist')
+    parsed_netlist_file.save(path)
+    assert parsed_netlist_file.is_netlist_file(path)
+
+    netlist_file = NetlistFile(*make_instances())
+    netlist_file.names.lookup(['unrelated', 'names'])  # shift the IDs
+    assert netlist_file.load(path) == netlist_file.NO_ERROR
+    assert signal_names(netlist_file) == signal_names(parsed_netlist_file)
+    assert netlist_file.network.check_network()
+
+
+def test_load_gives_errors(tmp_path, parsed_netlist_file, make_instances):
+    """Test that malformed netlist files are rejected."""
+    path = tmp_path / 'circuit.netlist'
+    parsed_netlist_file.save(str(path))
+    data = path.read_bytes()
+
+    netlist_file = NetlistFile(*make_instances())
+    assert not netlist_file.is_netlist_file('test_files/sr_bistable.txt')
+    assert netlist_file.load('test_files/sr_bistable.txt') == \
+        netlist_file.BAD_FORMAT
+
+    path.write_bytes(data[:-1])
+    assert netlist_file.load(str(path)) == netlist_file.BAD_FORMAT
+
+    header = list(HEADER.unpack_from(data))
+    header[1] += 1  # format version
+    path.write_bytes(HEADER.pack(*header) + data[HEADER.size:])
+    assert netlist_file.load(str(path)) == netlist_file.BAD_VERSION
+
+    # a device ID outside the names table
+    name_count = header[3]
+    path.write_bytes(HEADER.pack(MAGIC, 1, 0, 0, 1, 0, 0) +
+                     struct.pack('<qqq', name_count, 0, -1))
+    assert netlist_file.load(str(path)) == netlist_file.BAD_FORMAT
+    assert netlist_file.devices.devices_list == []
+
+
+def test_failed_load_leaves_network_unchanged(tmp_path, parsed_netlist_file,
+                                              make_instances):
+    """Test that a file failing part way through adds no devices."""
+    path = tmp_path / 'circuit.netlist'
+    data = parsed_netlist_file.get_bytes()
+    # monitor an input port, which fails after everything else is made
+    input_id = parsed_netlist_file.names.query('I1')
+    path.write_bytes(data[:-8] + struct.pack('<q', input_id))
+
+    netlist_file = NetlistFile(*make_instances())
+    assert netlist_file.load(str(path)) == netlist_file.monitors.NOT_OUTPUT
+    assert signal_names(netlist_file) == [[], []]
+    assert netlist_file.load_bytes(data) == netlist_file.NO_ERROR
+    assert signal_names(netlist_file) == signal_names(parsed_netlist_file)
@@ -411,6 +411,42 @@ def test_error_output_to_output(testcase):
     assert testcase.passed()
 
 
+def test_error_recovery_skips_to_left_paren(testcase):
+    """Names after an error are skipped without being added to names"""
+    testcase.add_input_line('(DEVICE A is FOO skipped /* ( */ words // (')
+    testcase.add_input_line('more words)(DEVICE B is NOT')
+    testcase.add_input_line('(DEVICE C is XOR)')
+    testcase.add_expected_error('INVALID_DEVICE_TYPE', 1, 16)
+    testcase.add_expected_error('EXPECT_RIGHT_PAREN', 2, 28)
+    testcase.execute()
+    assert testcase.passed()
+    names = testcase.parser.names
+    assert names.query('skipped') is None
+    assert names.query('words') is None
+    assert names.query('C') is not None
+
+
+def test_error_count_capped(testcase, capsys):
+    """Parsing stops once max_errors errors are found"""
+    for i in range(5):
+        testcase.add_input_line('(DEVICE)')
+    testcase.make_testfile()
+    names = Names()
+    scanner = Scanner(testcase.testfile_name, names)
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    testcase.parser = Parser(names, devices, network, monitors, scanner,
+                             test_mode=True, max_errors=3)
+    assert not testcase.parser.parse_network()
+    os.remove(testcase.testfile_name)
+    assert testcase.parser.error_count == 3
+    assert 'Too many errors' in testcase.parser.message
+    # the error messages are collected but not printed in test mode
+    assert '[ERROR #3]' in testcase.parser.message
+    assert capsys.readouterr().out == ''
+
+
 ''' The following tests are intended to test each function in parser.py,
 and assert all the possible returns of the functions. It omits testing
 error display as this has been thoroughly tested above'''
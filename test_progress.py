@@ -0,0 +1,63 @@
+"""Test the progress module."""
+import io
+
+import pytest
+
+from userint import UserInterface
+from progress import ProgressReporter, SAMPLE_CYCLES, get_rss, get_max_rss
+
+
+@pytest.fixture
+def user_interface(parse_file):
+    """Return a quiet UserInterface instance for an SR bistable."""
+    return UserInterface(*parse_file('test_files/sr_bistable.txt'), quiet=True)
+
+
+def test_get_rss():
+    """Test that the memory use of the process is found."""
+    assert get_rss() > 0
+    assert get_max_rss() >= get_rss() // 2
+
+
+def test_progress_lines(user_interface):
+    """Test that progress lines are printed when due, and a summary."""
+    output = io.StringIO()
+    progress = ProgressReporter(user_interface.network, interval=1.0,
+                                file=output)
+    time = [0.0]
+    progress.clock = lambda: time[0]
+    updates = []
+
+    def update(done):
+        """Advance the fake clock by a second at every update."""
+        updates.append(done)
+        time[0] += 1.0
+        ProgressReporter.update(progress, done)
+
+    progress.update = update
+    user_interface.progress = progress
+    user_interface.run_network(3 * SAMPLE_CYCLES)
+
+    assert updates == [SAMPLE_CYCLES, 2 * SAMPLE_CYCLES]
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 3
+    assert lines[0].startswith('Progress: %d/%d cycles (33.3%%), '
+                               '%d.0 cycles/s, ' % (SAMPLE_CYCLES,
+                                                    3 * SAMPLE_CYCLES,
+                                                    SAMPLE_CYCLES))
+    assert 'ETA 0:00:02, RSS ' in lines[0]
+    fields = dict(field.split('=') for field in lines[2].split()[1:])
+    assert lines[2].startswith('summary ')
+    assert fields['cycles'] == fields['requested'] == str(3 * SAMPLE_CYCLES)
+    assert fields['seconds'] == '2.000'
+    assert int(fields['evaluations']) >= 4 * 3 * SAMPLE_CYCLES
+    assert fields['oscillating'] == '0'
+
+
+def test_progress_without_summary(user_interface):
+    """Test that short runs print nothing without the summary."""
+    output = io.StringIO()
+    user_interface.progress = ProgressReporter(user_interface.network,
+                                               file=output, summary=False)
+    user_interface.run_network(10)
+    assert output.getvalue() == ''
@@ -1,3 +1,5 @@
+import itertools
+
 from scanner import Scanner
 from names import Names
 import pytest
@@ -121,3 +123,79 @@ def test_complete_current_line(new_names, new_scanner):
         assert new_scanner.complete_current_line() == desired_output[i]
         i += 1
         [symbol_type, symbol_id] = new_scanner.get_symbol()
+
+
+def test_line_tracking(tmp_path):
+    '''line numbers and lines are kept across comments and blank lines'''
+    path = tmp_path / 'lines.txt'
+    path.write_text('(DEVICE a is AND 2) /* two\nline comment */\n\n'
+                    '// whole line\n  (MONITOR a)\n')
+    new_scanner = Scanner(str(path), Names())
+    for _ in range(7):
+        new_scanner.get_symbol()
+    assert new_scanner.line_number == 1
+    assert new_scanner.complete_current_line() == ['(DEVICE a is AND 2) '
+                                                   '/* two', 19]
+    new_scanner.get_symbol()  # '(' after the comments
+    assert new_scanner.line_number == 5
+    assert new_scanner.current_line == '  ('
+    assert list(new_scanner.line_offsets) == [0, 0, 27, 43, 44, 58]
+    assert [new_scanner.get_line(n) for n in range(7)] == [
+        '', '(DEVICE a is AND 2) /* two', 'line comment */', '',
+        '// whole line', '  (MONITOR a)', '']
+
+
+def test_symbols(tmp_path):
+    '''the symbol stream gives the position just after each symbol'''
+    path = tmp_path / 'symbols.txt'
+    path.write_text('(DEVICE sw is\n  SWITCH 01) /* comment\n*/ $')
+    new_names = Names()
+    new_scanner = Scanner(str(path), new_names)
+    [DEVICE_ID, SW_ID, IS_ID, SWITCH_ID, LEFT_ID, RIGHT_ID, BAD_NUMBER_ID,
+     BAD_CHARACTER_ID] = new_names.lookup(['DEVICE', 'sw', 'is', 'SWITCH',
+                                           '(', ')', 'Number starting with 0',
+                                           'Unrecogonized character'])
+    symbols = new_scanner.symbols()
+    assert [next(symbols) for _ in range(9)] == [
+        (new_scanner.PUNCTUATION, LEFT_ID, 1, 1),
+        (new_scanner.KEYWORD, DEVICE_ID, 1, 7),
+        (new_scanner.NAME, SW_ID, 1, 10),
+        (new_scanner.KEYWORD, IS_ID, 1, 13),
+        (new_scanner.KEYWORD, SWITCH_ID, 2, 8),
+        (new_scanner.SYNTAX_ERROR, BAD_NUMBER_ID, 2, 11),
+        (new_scanner.PUNCTUATION, RIGHT_ID, 2, 12),
+        (new_scanner.SYNTAX_ERROR, BAD_CHARACTER_ID, 3, 4),
+        (new_scanner.EOF, 1, 3, 4)]
+    assert next(symbols)[0] == new_scanner.EOF
+
+
+@pytest.mark.parametrize("definition, mapped", [
+    ('(DEVICE sw is SWITCH 1) // comment\n(MONITOR sw)\n', True),
+    ('(DEVICE sw is SWITCH 1) // comment\r\n(MONITOR sw)\r\n', True),
+    ('/* été */ (DEVICE sw is SWITCH 1) // →\n(MONITOR sw)\n', True),
+    ('(DEVICE sw is SWITCH 1) // comment\r(MONITOR sw)\r', False),
+    ('(DEVICE sw is SWITCH 1) // comment\n(MONITOR sw)\né', False)])
+def test_mapped_and_text_sources(tmp_path, definition, mapped):
+    '''Mapped files give the same symbols and lines as their text'''
+    path = tmp_path / 'definition.txt'
+    path.write_bytes(definition.encode('utf-8'))
+    new_scanner = Scanner(str(path), Names())
+    assert new_scanner.mapped == mapped
+
+    text_scanner = Scanner(str(path), Names(),
+                           source=definition.replace('\r\n', '\n')
+                           .replace('\r', '\n'))
+    assert list(itertools.islice(new_scanner.symbols(), 12)) == \
+        list(itertools.islice(text_scanner.symbols(), 12))
+    assert new_scanner.get_line(1) == text_scanner.get_line(1)
+    assert new_scanner.complete_current_line() == \
+        text_scanner.complete_current_line()
+
+
+def test_empty_file_not_mapped(tmp_path):
+    '''Empty files cannot be mapped and are read as text'''
+    empty_path = tmp_path / 'empty.txt'
+    empty_path.write_text('')
+    empty_scanner = Scanner(str(empty_path), Names())
+    assert not empty_scanner.mapped
+    assert empty_scanner.get_symbol()[0] == empty_scanner.EOF
@@ -0,0 +1,156 @@
+"""Test the server module."""
+import asyncio
+import base64
+import json
+
+import pytest
+
+from netcache import NetlistCache
+from server import SimulationServer, parse_address
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Return a SimulationServer instance with its own cache directory."""
+    return SimulationServer(NetlistCache(str(tmp_path / 'cache')))
+
+
+def test_parse_address():
+    """Test that only Unix sockets and loopback addresses are accepted."""
+    assert parse_address('unix:/tmp/logsim.sock') == ['unix',
+                                                      '/tmp/logsim.sock']
+    assert parse_address('8080') == ['http', ('127.0.0.1', 8080)]
+    assert parse_address('localhost:80') == ['http', ('localhost', 80)]
+    assert parse_address('[::1]:80') == ['http', ('::1', 80)]
+    assert parse_address('0.0.0.0:80') is None
+    assert parse_address('example.com:80') is None
+    assert parse_address('127.0.0.1:http') is None
+    assert parse_address('unix:') is None
+
+
+def test_handle_request(server):
+    """Test loading, running and reading the traces of a circuit."""
+    async def run_requests():
+        load = await server.handle_request(
+            {'command': 'load', 'paths': ['test_files/sr_bistable.txt']})
+        assert load['ok']
+        assert load['switches'] == ['SW1', 'SW2']
+        assert load['monitors'] == ['G1', 'G2']
+        session = load['session']
+        responses = [await server.handle_request(dict(request,
+                                                      session=session))
+                     for request in [
+                         {'command': 'continue', 'cycles': 2},
+                         {'command': 'run', 'cycles': 3},
+                         {'command': 'monitor', 'signal': 'SW1'},
+                         {'command': 'monitor', 'signal': 'SW9'},
+                         {'command': 'switch', 'switch': 'SW1', 'level': 1},
+                         {'command': 'continue', 'cycles': 2,
+                          'encoding': 'json'},
+                         {'command': 'traces', 'encoding': 'base64'},
+                         {'command': 'close'},
+                         {'command': 'traces'}]]
+        return session, responses
+
+    session, responses = asyncio.run(run_requests())
+    assert [response['ok'] for response in responses] == [
+        False, True, True, False, True, True, True, True, False]
+    assert responses[5]['cycles_completed'] == 5
+    assert responses[5]['traces'] == {'G1': [1, 1, 1, 0, 0],
+                                      'G2': [1, 1, 1, 1, 1],
+                                      'SW1': [None, None, None, 1, 1]}
+    assert base64.b64decode(responses[6]['traces']['SW1']) == \
+        b'\xff\xff\xff\x01\x01'
+    # the closed session is removed
+    assert server.sessions == {}
+
+
+def test_invalid_requests(server):
+    """Test that requests with values of the wrong type are errors."""
+    async def run_requests():
+        load = await server.handle_request(
+            {'command': 'load', 'paths': ['test_files/sr_bistable.txt']})
+        session = load['session']
+        return [await server.handle_request(request) for request in [
+            {'command': 'traces', 'session': [session]},
+            {'command': 'traces', 'session': {}},
+            {'command': 'traces', 'session': True},
+            {'command': 'traces', 'session': session + 1},
+            {'command': 'run', 'session': session, 'cycles': True},
+            {'command': 'run', 'session': session, 'cycles': 2,
+             'seed': False},
+            {'command': 'switch', 'session': session, 'switch': 'SW1',
+             'level': True},
+            {'command': 'run', 'session': session, 'cycles': 2}]]
+
+    responses = asyncio.run(run_requests())
+    assert [response.get('error') for response in responses] == [
+        'Error! Expected a session.', 'Error! Expected a session.',
+        'Error! Expected a session.', 'Error! Unknown session.',
+        'Error! Expected a number.', 'Error! Expected a number.',
+        'Error! Invalid switch.', None]
+
+
+def test_load_reuses_netlist(server, tmp_path, capsys):
+    """Test that an unchanged circuit is not parsed again."""
+    path = tmp_path / 'circuit.txt'
+    path.write_text(open('test_files/sr_bistable.txt').read())
+    first_session, messages = server.load_circuit([str(path)])
+    netlist = server.netlists[(str(path),)][1]
+    server.cache.cache_dir = str(tmp_path / 'empty')  # not used again
+    second_session, messages = server.load_circuit([str(path)])
+    assert server.netlists[(str(path),)][1] is netlist
+    assert second_session.get_switch_names() == ['SW1', 'SW2']
+    assert second_session.names is not first_session.names
+
+    path.write_text('DEVICES')
+    third_session, messages = server.load_circuit([str(path)])
+    assert third_session is None
+    assert '[ERROR #1]' in messages
+    assert capsys.readouterr().out == ''  # collected, not printed
+
+
+def test_unix_socket_and_http(server, tmp_path):
+    """Test that requests are served on a Unix socket and over HTTP."""
+    async def run_clients():
+        unix_server = await server.start('unix:' + str(tmp_path / 'sock'))
+        http_server = await server.start('127.0.0.1:0')
+        port = http_server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_unix_connection(
+            str(tmp_path / 'sock'))
+        writer.write(b'{"command": "load", '
+                     b'"paths": ["test_files/sr_bistable.txt"]}\n'
+                     b'not json\n')
+        load = json.loads(await reader.readline())
+        invalid = json.loads(await reader.readline())
+        writer.close()
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for body in [b'{"command": "run", "cycles": 2, "session": %d}' %
+                     load['session'], b'{"command": "traces"}']:
+            writer.write(b'POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n' %
+                         len(body) + body)
+            status = await reader.readline()
+            headers = {}
+            line = await reader.readline()
+            while line.strip():
+                key, value = line.decode().split(':', 1)
+                headers[key.lower()] = value.strip()
+                line = await reader.readline()
+            body = await reader.readexactly(int(headers['content-length']))
+            responses.append([status, json.loads(body)])
+        writer.close()
+        unix_server.close()
+        http_server.close()
+        return load, invalid, responses
+
+    load, invalid, responses = asyncio.run(run_clients())
+    assert load['ok']
+    assert invalid == {'ok': False, 'error': 'Error! Invalid JSON.'}
+    assert responses == [
+        [b'HTTP/1.1 200 OK\r\n', {'ok': True, 'cycles_completed': 2,
+                                  'oscillating': False}],
+        [b'HTTP/1.1 200 OK\r\n', {'ok': False,
+                                  'error': 'Error! Expected a session.'}]]
@@ -0,0 +1,74 @@
+"""Test the shards module."""
+import pytest
+
+from shards import ShardParser, parse_shard
+
+
+@pytest.fixture
+def shard_paths(tmp_path):
+    """Return the paths of a circuit split across two files."""
+    switches = tmp_path / 'switches.txt'
+    switches.write_text('(DEVICE sw1 sw2 are SWITCH 0)\n'
+                        '(CONNECT sw1 to g1.I1)\n'
+                        '(MONITOR g1)\n')
+    gates = tmp_path / 'gates.txt'
+    gates.write_text('(DEVICE g1 is NAND 2)\n'
+                     '(CONNECT sw2 to g1.I2)\n'
+                     '(MONITOR sw1 sw2)\n')
+    return [str(switches), str(gates)]
+
+
+def test_parse_shard(shard_paths):
+    """Test that connections to other files are deferred."""
+    [message, error_count, netlist, device_names, connections,
+     monitor_list] = parse_shard(shard_paths[0])
+    assert error_count == 0
+    assert device_names == ['sw1', 'sw2']
+    assert connections == [('sw1', None, 'g1', 'I1', (2, 12))]
+    assert [monitor[:2] for monitor in monitor_list] == [('g1', None)]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_shards_merged(shard_paths, max_workers, make_instances):
+    """Test that the files are merged into one connected network."""
+    shard_parser = ShardParser(*make_instances(), shard_paths,
+                               max_workers)
+    assert shard_parser.parse_network()
+
+    names = shard_parser.names
+    network = shard_parser.network
+    [SW1, SW2, G1, I1, I2] = names.lookup(['sw1', 'sw2', 'g1', 'I1', 'I2'])
+    assert network.get_connected_output(G1, I1) == (SW1, None)
+    assert network.get_connected_output(G1, I2) == (SW2, None)
+    assert network.check_network()
+    assert sorted(shard_parser.monitors.monitors_dictionary) == \
+        sorted([(G1, None), (SW1, None), (SW2, None)])
+
+
+def test_shards_give_errors(tmp_path, shard_paths, make_instances, capsys):
+    """Test the errors found when merging the files."""
+    shard_parser = ShardParser(*make_instances(), shard_paths[:1], 1)
+    assert not shard_parser.parse_network()
+    assert shard_parser.error_count == 2  # undefined g1 in two statements
+    assert '[ERROR #2]' in capsys.readouterr().out
+
+    # in test mode the messages are collected without being printed
+    shard_parser = ShardParser(*make_instances(), shard_paths[:1], 1,
+                               test_mode=True)
+    assert not shard_parser.parse_network()
+    assert '[ERROR #2]' in shard_parser.message
+    assert capsys.readouterr().out == ''
+
+    extra = tmp_path / 'extra.txt'
+    extra.write_text('(DEVICE g1 is NOT)\n')
+    shard_parser = ShardParser(*make_instances(), shard_paths + [str(extra)],
+                               1)
+    assert not shard_parser.parse_network()
+    assert "'g1' is defined in more than one file" in shard_parser.message
+
+    unconnected = tmp_path / 'unconnected.txt'
+    unconnected.write_text('(DEVICE g2 is NOT)\n')
+    shard_parser = ShardParser(*make_instances(),
+                               shard_paths + [str(unconnected)], 1)
+    assert not shard_parser.parse_network()
+    assert 'g2.I1' in shard_parser.message
@@ -0,0 +1,40 @@
+"""Test the signalindex module."""
+import pytest
+
+from userint import UserInterface
+from signalindex import SignalIndex
+
+
+@pytest.fixture
+def user_interface(parse_file):
+    """Return a quiet UserInterface instance for a ripple counter."""
+    return UserInterface(*parse_file('test_files/4_ripple_counter.txt'),
+                         quiet=True)
+
+
+def test_get_signal_ids(user_interface):
+    """Test that devices, inputs and outputs are resolved."""
+    names = user_interface.names
+    signal_index = SignalIndex(names, user_interface.devices)
+    [D0, Q, CLK, SET] = names.query('D0'), names.query('Q'), \
+        names.query('CLK'), names.query('Set')
+    assert signal_index.get_signal_ids('D0.Q') == [D0, Q]
+    assert signal_index.get_signal_ids('D0.CLK') == [D0, CLK]
+    assert signal_index.get_signal_ids('Set') == [SET, None]
+    assert signal_index.get_device_id('Set') == SET
+    assert signal_index.get_device_id('D0.Q') is None
+    # port names which are not ports of the device are unknown
+    assert signal_index.get_signal_ids('Set.Q') is None
+    assert signal_index.get_signal_ids('Q') is None
+
+
+def test_commands_never_add_names(user_interface):
+    """Test that scripted commands with unknown names leave the names."""
+    name_list = list(user_interface.names.name_list)
+    user_interface.batch_interface('r 2; m D9.Q; m D0.Q9; z X; s X 1; '
+                                   'm D0.QBAR; s Set 1; c 2')
+    assert user_interface.error_count == 4
+    assert user_interface.names.name_list == name_list
+    assert [user_interface.devices.get_signal_name(*signal) for signal
+            in user_interface.monitors.monitors_dictionary] == [
+                'D0.Q', 'D1.Q', 'D2.Q', 'D3.Q', 'D0.QBAR']
@@ -0,0 +1,65 @@
+"""Test the sweep module."""
+import io
+
+import pytest
+
+from sweep import SweepRunner
+
+
+@pytest.fixture
+def make_sweep_runner(parse_file):
+    """Return a function making SweepRunner instances.
+
+    The function takes the path of a definition file, the names of the
+    switches to sweep, and optionally the cycles and max_workers.
+    """
+    def make(path, switch_names, cycles=5, max_workers=1):
+        [names, devices, network, monitors] = parse_file(path)
+        return SweepRunner(names, devices, network, monitors,
+                           names.lookup(switch_names), cycles, max_workers)
+    return make
+
+
+@pytest.fixture
+def sweep_runner(make_sweep_runner):
+    """Return a SweepRunner instance for an SR bistable."""
+    return make_sweep_runner('test_files/sr_bistable.txt', ['SW1', 'SW2'])
+
+
+def test_get_assignments(sweep_runner):
+    """Test that every setting, or a sample of them, is returned."""
+    assert sweep_runner.get_assignments() == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    sample = sweep_runner.get_assignments(samples=3, seed=1)
+    assert len(set(sample)) == 3
+    assert set(sample) < set(sweep_runner.get_assignments())
+    assert sweep_runner.get_assignments(samples=3, seed=1) == sample
+    assert len(sweep_runner.get_assignments(samples=10)) == 4
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_sweep(sweep_runner, max_workers):
+    """Test that every setting is run from the same starting state."""
+    sweep_runner.max_workers = max_workers
+    output = io.StringIO()
+    assert sweep_runner.sweep(output) == 0
+    assert output.getvalue() == ('# SW1=0 SW2=0\nG1: -----\nG2: -----\n\n'
+                                 '# SW1=0 SW2=1\nG1: -----\nG2: _____\n\n'
+                                 '# SW1=1 SW2=0\nG1: _____\nG2: -----\n\n'
+                                 '# SW1=1 SW2=1\nG1: -----\nG2: _____\n\n')
+
+    # the results do not depend on the settings run before
+    assignments = sweep_runner.get_assignments()[::-1]
+    results = list(sweep_runner.run_assignments(assignments))
+    assert results[0] == [5, 'G1: -----\nG2: _____\n']
+
+
+def test_sweep_oscillating(tmp_path, make_sweep_runner):
+    """Test that settings for which the network oscillates are counted."""
+    path = tmp_path / 'oscillator.txt'
+    path.write_text('(DEVICE SW is SWITCH 0)\n(DEVICE A is NAND 2)\n'
+                    '(CONNECT SW to A.I1)\n(CONNECT A to A.I2)\n'
+                    '(MONITOR A)\n')
+    sweep_runner = make_sweep_runner(path, ['SW'])
+    output = io.StringIO()
+    assert sweep_runner.sweep(output) == 1
+    assert '# SW=1 (oscillating after 0 cycles)' in output.getvalue()
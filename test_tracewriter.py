@@ -0,0 +1,66 @@
+"""Test the tracewriter module."""
+import ast
+import io
+import json
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from tracewriter import TraceWriter, NPY_MAGIC
+
+
+@pytest.fixture
+def trace_writer():
+    """Return a TraceWriter instance for two monitors with known traces."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1, SW2] = names.lookup(['Sw1', 'Sw2'])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    monitors.make_monitor(SW1, None)
+    for level in [devices.HIGH, devices.LOW, devices.RISING]:
+        devices.get_device(SW1).outputs[None] = level
+        monitors.record_signals()
+    monitors.make_monitor(SW2, None, 3)
+    devices.get_device(SW1).outputs[None] = devices.FALLING
+    devices.get_device(SW2).outputs[None] = devices.HIGH
+    monitors.record_signals()
+    return TraceWriter(devices, monitors, chunk_cycles=3)
+
+
+def test_write_csv(trace_writer):
+    """Test that a row is written for each cycle."""
+    output = io.StringIO()
+    trace_writer.write(output, 'csv')
+    assert output.getvalue() == 'Sw1,Sw2\n1,\n0,\n1,\n0,1\n'
+
+
+def test_write_jsonl(trace_writer):
+    """Test that an object is written for each chunk of each signal."""
+    output = io.StringIO()
+    trace_writer.write(output, 'jsonl')
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {'signal': 'Sw1', 'start': 0, 'levels': [1, 0, 1]},
+        {'signal': 'Sw2', 'start': 0, 'levels': [None, None, None]},
+        {'signal': 'Sw1', 'start': 3, 'levels': [0]},
+        {'signal': 'Sw2', 'start': 3, 'levels': [1]}]
+
+
+def test_write_npy(trace_writer):
+    """Test that a valid .npy matrix of levels is written."""
+    output = io.BytesIO()
+    trace_writer.write(output, 'npy')
+    data = output.getvalue()
+    assert data.startswith(NPY_MAGIC)
+    header_length = int.from_bytes(data[8:10], 'little')
+    assert (10 + header_length) % 64 == 0
+    header = ast.literal_eval(data[10:10 + header_length].decode('latin1'))
+    assert header == {'descr': '|i1', 'fortran_order': False,
+                      'shape': (2, 4)}
+    assert data[10 + header_length:] == bytes([1, 0, 1, 0,
+                                               255, 255, 255, 1])
@@ -0,0 +1,190 @@
+"""Write monitored signal traces in machine-readable formats.
+
+Used in the Logic Simulator project to write the signal traces of the
+monitors as CSV, JSON lines or a NumPy .npy matrix, in chunks of cycles so
+that long traces are never formatted into one string.
+
+Classes
+-------
+TraceWriter - writes the signal traces of the monitors to a file.
+"""
+import json
+
+# Output formats, and the formats written to binary files
+FORMATS = ['text', 'csv', 'jsonl', 'npy']
+BINARY_FORMATS = ['npy']
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'  # NumPy .npy format version 1.0
+NO_LEVEL = 0xFF  # level byte of BLANK signals
+
+
+class TraceWriter:
+
+    """Write the signal traces of the monitors to a file.
+
+    The signals are written as levels, with RISING written as HIGH (1),
+    FALLING as LOW (0), and BLANK signals, recorded before a monitor was
+    made, written as an empty CSV field, a JSON null or -1 in the .npy
+    matrix. The traces are read and formatted chunk_cycles cycles at a time.
+
+    The formats are:
+    csv - a header row of signal names, then one row for each cycle.
+    jsonl - one JSON object for each chunk of each signal, holding the
+            "signal" name, the "start" cycle and the list of "levels".
+    npy - a NumPy .npy matrix of int8 levels, with one row for each signal
+          and one column for each cycle.
+    text - the traces as displayed by Monitors.display_signals().
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    monitors: instance of the monitors.Monitors() class.
+    chunk_cycles: number of cycles read and formatted at a time.
+
+    Public methods
+    --------------
+    get_signal_names(self): Returns the names of the monitored signals.
+
+    get_cycle_count(self): Returns the number of cycles in the longest trace.
+
+    get_chunks(self): Yields the start cycle and the level bytes of every
+                      monitor for each chunk of cycles.
+
+    get_levels(self): Returns the level bytes of the whole trace of every
+                      monitor.
+
+    join_levels(self, traces, separator, row_end, blank): Returns the
+                      levels of one or more traces as rows of text.
+
+    write_csv(self, file): Writes the traces as CSV.
+
+    write_jsonl(self, file): Writes the traces as JSON lines.
+
+    write_npy(self, file): Writes the traces as a .npy matrix to a binary
+                           file.
+
+    write(self, file, output_format): Writes the traces in output_format.
+    """
+
+    def __init__(self, devices, monitors, chunk_cycles=65536):
+        """Initialise the instances and the level translation table."""
+        self.devices = devices
+        self.monitors = monitors
+        self.chunk_cycles = chunk_cycles
+
+        # Translation table from signals to level bytes
+        self.level_table = bytearray([NO_LEVEL]) * 256
+        for signal, level in [(devices.LOW, 0), (devices.HIGH, 1),
+                              (devices.RISING, 1), (devices.FALLING, 0)]:
+            self.level_table[signal] = level
+        self.level_table = bytes(self.level_table)
+        # Translation table from level bytes to characters, with BLANK
+        # signals as a 0 byte which is replaced once the rows are joined
+        self.character_table = bytearray(256)
+        self.character_table[0:2] = b'01'
+        self.character_table = bytes(self.character_table)
+
+    def get_signal_names(self):
+        """Return the names of the monitored signals, in order."""
+        return [self.devices.get_signal_name(device_id, output_id)
+                for device_id, output_id in self.monitors.monitors_dictionary]
+
+    def get_cycle_count(self):
+        """Return the number of cycles in the longest trace."""
+        return max((len(signal_list) for signal_list
+                    in self.monitors.monitors_dictionary.values()), default=0)
+
+    def get_chunks(self):
+        """Yield [start cycle, level bytes of every monitor] for each chunk.
+
+        Traces shorter than the longest are padded with BLANK signals.
+        """
+        signal_lists = list(self.monitors.monitors_dictionary.values())
+        cycle_count = self.get_cycle_count()
+        for start in range(0, cycle_count, self.chunk_cycles):
+            end = min(start + self.chunk_cycles, cycle_count)
+            chunk = []
+            for signal_list in signal_lists:
+                levels = bytes(signal_list[start:end]).translate(
+                    self.level_table)
+                chunk.append(levels + bytes([NO_LEVEL]) * (end - start -
+                                                           len(levels)))
+            yield [start, chunk]
+
+    def get_levels(self):
+        """Return the level bytes of the whole trace of every monitor."""
+        traces = [bytearray() for signal_list
+                  in self.monitors.monitors_dictionary.values()]
+        for start, chunk in self.get_chunks():
+            for trace, levels in zip(traces, chunk):
+                trace += levels
+        return [bytes(trace) for trace in traces]
+
+    def join_levels(self, traces, separator, row_end, blank):
+        """Return the levels of equal length traces as rows of text.
+
+        Each row holds the level of every trace in one cycle, separated by
+        separator and ended by row_end, with BLANK signals written as
+        blank. The rows are interleaved with slice assignments rather than
+        formatted cycle by cycle.
+        """
+        trace_count = len(traces)
+        cycle_count = len(traces[0])
+        rows = bytearray(2 * trace_count * cycle_count)
+        for index, levels in enumerate(traces):
+            rows[2 * index::2 * trace_count] = levels.translate(
+                self.character_table)
+            end = row_end if index == trace_count - 1 else separator
+            rows[2 * index + 1::2 * trace_count] = end * cycle_count
+        return rows.replace(b'\x00', blank).decode('ascii')
+
+    def write_csv(self, file):
+        """Write a header row of signal names, then a row for each cycle."""
+        file.write(','.join(self.get_signal_names()) + '\n')
+        for start, chunk in self.get_chunks():
+            file.write(self.join_levels(chunk, b',', b'\n', b''))
+
+    def write_jsonl(self, file):
+        """Write a JSON object for each chunk of each signal."""
+        signal_names = self.get_signal_names()
+        for start, chunk in self.get_chunks():
+            for signal_name, levels in zip(signal_names, chunk):
+                file.write('{"signal": %s, "start": %d, "levels": [%s]}\n' % (
+                    json.dumps(signal_name), start,
+                    self.join_levels([levels], b',', b',', b'null')[:-1]))
+
+    def write_npy(self, file):
+        """Write the traces as a .npy matrix of int8 levels.
+
+        The matrix has one row for each signal, written a chunk at a time.
+        """
+        signal_lists = list(self.monitors.monitors_dictionary.values())
+        cycle_count = self.get_cycle_count()
+        header = repr({'descr': '|i1', 'fortran_order': False,
+                       'shape': (len(signal_lists), cycle_count)})
+        # the header ends in a new line and is padded so that the data is
+        # aligned to 64 bytes
+        padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+        header = (header + ' ' * padding + '\n').encode('latin1')
+        file.write(NPY_MAGIC + len(header).to_bytes(2, 'little') + header)
+        for signal_list in signal_lists:
+            for start in range(0, cycle_count, self.chunk_cycles):
+                end = min(start + self.chunk_cycles, cycle_count)
+                levels = bytes(signal_list[start:end]).translate(
+                    self.level_table)
+                file.write(levels + bytes([NO_LEVEL]) * (end - start -
+                                                         len(levels)))
+
+    def write(self, file, output_format):
+        """Write the traces to file in output_format, one of FORMATS.
+
+        The file must be binary for the formats in BINARY_FORMATS.
+        """
+        if output_format == 'csv':
+            self.write_csv(file)
+        elif output_format == 'jsonl':
+            self.write_jsonl(file)
+        elif output_format == 'npy':
+            self.write_npy(file)
+        else:
+            self.monitors.display_signals(file=file)
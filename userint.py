@@ -11,6 +11,9 @@ UserInterface - reads and parses user commands.
 import sys
 import gettext
 import os
+import re
+
+from signalindex import SignalIndex
 
 
 class UserInterface:
@@ -28,12 +31,34 @@ class UserInterface:
     devices: instance of the devices.Devices() class.
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
+    quiet: if True, prompts and messages other than errors are not printed,
+           errors are printed to standard error and counted, and the signal
+           traces are not displayed after each run.
+    progress: instance of the progress.ProgressReporter() class, which
+              reports the progress of each run, or None.
+    checkpoint: instance of the checkpoint.Checkpoint() class, which saves
+                checkpoints during each run, or None.
 
     Public methods:
     ---------------
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
+    batch_interface(self, commands): Runs the commands in a string without
+                                     prompts.
+
+    resume(self, run_state): Finishes the run and the commands saved in a
+                             checkpoint.
+
+    get_run_state(self, done, cycles): Returns the state of the user
+                                       interface saved in checkpoints.
+
+    execute_command(self, command): Calls the function of a command.
+
+    report(self, message): Prints a message unless in quiet mode.
+
+    report_error(self, message): Prints an error message and counts it.
+
     get_line(self): Prints a prompt for the user and updates the user entry.
 
     read_command(self): Returns the first non-whitespace character.
@@ -46,7 +71,7 @@ class UserInterface:
 
     read_string(self): Returns the next alphanumeric string.
 
-    read_name(self): Returns the name ID of the current string.
+    read_name(self): Returns the device ID of the current string.
 
     read_signal_name(self): Returns the device and port IDs of the current
                             signal name.
@@ -70,15 +95,26 @@ class UserInterface:
     continue_command(self): Continues a previously run simulation.
     """
 
-    def __init__(self, names, devices, network, monitors):
+    def __init__(self, names, devices, network, monitors, quiet=False,
+                 progress=None, checkpoint=None):
         """Initialise variables."""
         self.names = names
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        # Names are resolved through the index, so that commands never add
+        # to the names table
+        self.signal_index = SignalIndex(names, devices)
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
+        self.quiet = quiet
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.pending_commands = []  # batch commands after the current one
+        self.error_count = 0  # number of commands which gave errors
+        self.oscillating = False  # whether the network has oscillated
+
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
         self.cursor = 0  # cursor position
@@ -88,29 +124,101 @@ class UserInterface:
         gettext.install('gui', localedir)
 
     def command_interface(self):
-        """Read the command entered and call the corresponding function."""
+        """Read the command entered and call the corresponding function.
+
+        Where the readline module is available, earlier commands can be
+        recalled and edited with the arrow keys.
+        """
+        try:
+            import readline  # adds history and line editing to input()
+        except ImportError:
+            pass
         print(_("Logic Simulator: interactive command line user interface.\n"),
               _("Enter 'h' for help."))
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
-            if command == "h":
-                self.help_command()
-            elif command == "s":
-                self.switch_command()
-            elif command == "m":
-                self.monitor_command()
-            elif command == "z":
-                self.zap_command()
-            elif command == "r":
-                self.run_command()
-            elif command == "c":
-                self.continue_command()
-            else:
-                print(_("Invalid command. Enter 'h' for help."))
+            self.execute_command(command)
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def batch_interface(self, commands):
+        """Run the commands in a string.
+
+        Commands are separated by new lines or ';', and empty commands and
+        lines starting with '#' are ignored. The commands stop at 'q'.
+        """
+        lines = re.split('[;\n]', commands)
+        for index, line in enumerate(lines):
+            if line.strip() == "" or line.lstrip().startswith("#"):
+                continue
+            self.pending_commands = lines[index + 1:]
+            self.cursor = 0
+            self.line = line
+            command = self.read_command()  # read the first character
+            if command == "q":
+                break
+            self.execute_command(command)
+        self.pending_commands = []
+
+    def resume(self, run_state):
+        """Finish the run and the batch commands saved in a checkpoint.
+
+        run_state is the state saved by get_run_state(), and the network
+        and monitors must have been restored from the same checkpoint.
+        """
+        self.signal_index.build()  # the devices were restored since made
+        self.cycles_completed = run_state['cycles_completed']
+        self.error_count = run_state['error_count']
+        cycles_left = run_state['cycles_left']
+        if cycles_left > 0 and self.run_network(cycles_left):
+            self.cycles_completed += cycles_left
+        self.batch_interface("\n".join(run_state['commands']))
+
+    def get_run_state(self, done, cycles):
+        """Return the state of the user interface saved in checkpoints.
+
+        done is the number of cycles done so far of a run of cycles cycles.
+        """
+        return {'cycles_completed': self.cycles_completed + done,
+                'cycles_left': cycles - done,
+                'commands': self.pending_commands,
+                'error_count': self.error_count}
+
+    def execute_command(self, command):
+        """Call the function corresponding to the command character."""
+        if command == "h":
+            self.help_command()
+        elif command == "s":
+            self.switch_command()
+        elif command == "m":
+            self.monitor_command()
+        elif command == "z":
+            self.zap_command()
+        elif command == "r":
+            self.run_command()
+        elif command == "c":
+            self.continue_command()
+        else:
+            self.report_error(_("Invalid command. Enter 'h' for help."))
+
+    def report(self, message):
+        """Print a message, unless in quiet mode."""
+        if not self.quiet:
+            print(message)
+
+    def report_error(self, message):
+        """Print an error message and count it.
+
+        In quiet mode the message is printed to standard error, after the
+        command which gave it.
+        """
+        self.error_count += 1
+        if self.quiet:
+            print(self.line.strip() + ": " + message, file=sys.stderr)
+        else:
+            print(message)
+
     def get_line(self):
         """Print prompt for the user and update the user entry."""
         self.cursor = 0
@@ -142,7 +250,7 @@ class UserInterface:
         self.skip_spaces()
         name_string = ""
         if not self.character.isalpha():  # the string must start with a letter
-            print(_("Error! Expected a name."))
+            self.report_error(_("Error! Expected a name."))
             return None
         while self.character.isalnum():
             name_string = "".join([name_string, self.character])
@@ -150,34 +258,35 @@ class UserInterface:
         return name_string
 
     def read_name(self):
-        """Return the name ID of the current string if valid.
+        """Return the device ID of the current string if valid.
 
-        Return None if the current string is not a valid name string.
+        Return None if the current string is not the name of a device.
         """
         name_string = self.read_string()
         if name_string is None:
             return None
-        else:
-            name_id = self.names.query(name_string)
-        if name_id is None:
-            print(_("Error! Unknown name."))
-        return name_id
+        device_id = self.signal_index.get_device_id(name_string)
+        if device_id is None:
+            self.report_error(_("Error! Unknown name."))
+        return device_id
 
     def read_signal_name(self):
         """Return the device and port IDs of the current signal name.
 
-        Return None if either is invalid.
+        Return None if the name is not a device or a port of a device.
         """
-        device_id = self.read_name()
-        if device_id is None:
+        signal_name = self.read_string()
+        if signal_name is None:
             return None
         elif self.character == ".":
-            port_id = self.read_name()
-            if port_id is None:
+            port_name = self.read_string()
+            if port_name is None:
                 return None
-        else:
-            port_id = None
-        return [device_id, port_id]
+            signal_name = ".".join([signal_name, port_name])
+        signal = self.signal_index.get_signal_ids(signal_name)
+        if signal is None:
+            self.report_error(_("Error! Unknown name."))
+        return signal
 
     def read_number(self, lower_bound, upper_bound):
         """Return the current number.
@@ -188,7 +297,7 @@ class UserInterface:
         self.skip_spaces()
         number_string = ""
         if not self.character.isdigit():
-            print(_("Error! Expected a number."))
+            self.report_error(_("Error! Expected a number."))
             return None
         while self.character.isdigit():
             number_string = "".join([number_string, self.character])
@@ -197,26 +306,32 @@ class UserInterface:
 
         if upper_bound is not None:
             if number > upper_bound:
-                print(_("Number out of range."))
+                self.report_error(_("Number out of range."))
                 return None
 
         if lower_bound is not None:
             if number < lower_bound:
-                print(_("Number out of range."))
+                self.report_error(_("Number out of range."))
                 return None
 
         return number
 
     def help_command(self):
-        """Print a list of valid commands."""
-        print(_("User commands:"))
-        print(_("r N       - run the simulation for N cycles"))
-        print(_("c N       - continue the simulation for N cycles"))
-        print(_("s X N     - set switch X to N (0 or 1)"))
-        print(_("m X       - set a monitor on signal X"))
-        print(_("z X       - zap the monitor on signal X"))
-        print(_("h         - help (this command)"))
-        print(_("q         - quit the program"))
+        """Print a list of valid commands.
+
+        In quiet mode the list is printed to standard error, so that it is
+        not mixed with the traces written to standard output.
+        """
+        file = sys.stderr if self.quiet else sys.stdout
+        print(_("User commands:"), file=file)
+        print(_("r N       - run the simulation for N cycles"), file=file)
+        print(_("c N       - continue the simulation for N cycles"),
+              file=file)
+        print(_("s X N     - set switch X to N (0 or 1)"), file=file)
+        print(_("m X       - set a monitor on signal X"), file=file)
+        print(_("z X       - zap the monitor on signal X"), file=file)
+        print(_("h         - help (this command)"), file=file)
+        print(_("q         - quit the program"), file=file)
 
     def switch_command(self):
         """Set the specified switch to the specified signal level."""
@@ -225,9 +340,9 @@ class UserInterface:
             switch_state = self.read_number(0, 1)
             if switch_state is not None:
                 if self.devices.set_switch(switch_id, switch_state):
-                    print(_("Successfully set switch."))
+                    self.report(_("Successfully set switch."))
                 else:
-                    print(_("Error! Invalid switch."))
+                    self.report_error(_("Error! Invalid switch."))
 
     def monitor_command(self):
         """Set the specified monitor."""
@@ -237,9 +352,9 @@ class UserInterface:
             monitor_error = self.monitors.make_monitor(device, port,
                                                        self.cycles_completed)
             if monitor_error == self.monitors.NO_ERROR:
-                print(_("Successfully made monitor."))
+                self.report(_("Successfully made monitor."))
             else:
-                print(_("Error! Could not make monitor."))
+                self.report_error(_("Error! Could not make monitor."))
 
     def zap_command(self):
         """Remove the specified monitor."""
@@ -247,22 +362,41 @@ class UserInterface:
         if monitor is not None:
             [device, port] = monitor
             if self.monitors.remove_monitor(device, port):
-                print(_("Successfully zapped monitor"))
+                self.report(_("Successfully zapped monitor"))
             else:
-                print(_("Error! Could not zap monitor."))
+                self.report_error(_("Error! Could not zap monitor."))
 
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
         Return True if successful.
         """
-        for _ in range(cycles):
+        progress = self.progress
+        checkpoint = self.checkpoint
+        if progress is not None:
+            progress.start(cycles)
+        if checkpoint is not None:
+            checkpoint.start()
+        for cycle in range(cycles):
+            if progress is not None and cycle >= progress.next_update:
+                progress.update(cycle)
+            if checkpoint is not None and cycle >= checkpoint.next_update:
+                if not checkpoint.update(cycle,
+                                         self.get_run_state(cycle, cycles)):
+                    self.report_error(_("Error! Could not write the "
+                                        "checkpoint file."))
             if self.network.execute_network():
                 self.monitors.record_signals()
             else:
-                print(_("Error! Network oscillating."))
+                if progress is not None:
+                    progress.finish(cycle)
+                self.oscillating = True
+                self.report_error(_("Error! Network oscillating."))
                 return False
-        self.monitors.display_signals()
+        if progress is not None:
+            progress.finish(cycles)
+        if not self.quiet:
+            self.monitors.display_signals()
         return True
 
     def run_command(self):
@@ -272,7 +406,8 @@ class UserInterface:
 
         if cycles is not None:  # if the number of cycles provided is valid
             self.monitors.reset_monitors()
-            print("".join([_("Running for "), str(cycles), _(" cycles")]))
+            self.report("".join([_("Running for "), str(cycles),
+                                 _(" cycles")]))
             self.devices.cold_startup()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
@@ -282,8 +417,9 @@ class UserInterface:
         cycles = self.read_number(0, None)
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
-                print(_("Error! Nothing to continue. Run first."))
+                self.report_error(_("Error! Nothing to continue. Run first."))
             elif self.run_network(cycles):
                 self.cycles_completed += cycles
-                print(" ".join([_("Continuing for"), str(cycles), _("cycles."),
-                                _("Total:"), str(self.cycles_completed)]))
+                self.report(" ".join([_("Continuing for"), str(cycles),
+                                      _("cycles."), _("Total:"),
+                                      str(self.cycles_completed)]))